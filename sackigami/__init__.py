@@ -4,9 +4,29 @@ Sackigami!
 Posting interesting NFL sack stat-lines.
 
 These are the submodules:
+- `batch`: Answers files of stat lines with a single join against the history.
 - `bot`: Main submodule running the bot and parsing most of the data.
+- `changes`: Detects inserted, corrected and deleted games between data refreshes.
 - `cli`: Command line interface.
 - `constants`: Compiles global constants.
+- `digest`: Packs the posts of a game day into a single thread.
+- `expected`: Monte Carlo model of how often a game at least as bad is expected.
+- `gamedays`: Tracks which gamedays of the schedule are complete.
+- `history`: Precomputed indexes over the complete team stats history.
+- `leaders`: Keeps the all-time, per season and per team worst games of every sack stat.
+- `live`: Tracks sacks from streamed play-by-play events.
+- `locking`: Advisory file locks and atomic writes of the shared state files.
+- `mockx`: Local stand-in of the X API for load tests.
+- `pbp`: Derives detailed sack stats from play-by-play data.
+- `personas`: Posts for several accounts with their own rules from one history.
+- `profiling`: Captures polars query profiles and a Python profile of a command.
+- `render`: Renders the posts of many stat lines at once.
+- `scheduler`: Ranks posts and releases them under a posting budget.
+- `server`: Serves stat line history queries over local HTTP.
+- `startup`: Loads the data of a run concurrently and times the phases.
+- `surprise`: Opponent adjusted model of the expected sacks of a game.
 - `teams`: Fetches NFL team data and some data manipulation.
+- `tuning`: Replays grids of posting thresholds against the history.
+- `website`: Generates the static stats site from the history and the posted games.
 - `x`: Uses the X API to make posts.
 """
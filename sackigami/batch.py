@@ -0,0 +1,112 @@
+from pathlib import Path
+from typing import Callable
+
+import polars as pl
+
+from sackigami.constants import COL, SACK_STAT_COLUMNS
+
+SCANNERS: dict[str, Callable[[Path], pl.LazyFrame]] = {
+    ".csv": pl.scan_csv,
+    ".parquet": pl.scan_parquet,
+    ".jsonl": pl.scan_ndjson,
+    ".ndjson": pl.scan_ndjson,
+}
+"""Lazy readers of stat line files by file extension."""
+
+SINKS: dict[str, Callable[[pl.LazyFrame, Path], None]] = {
+    ".csv": pl.LazyFrame.sink_csv,
+    ".parquet": pl.LazyFrame.sink_parquet,
+    ".jsonl": pl.LazyFrame.sink_ndjson,
+    ".ndjson": pl.LazyFrame.sink_ndjson,
+}
+"""Streaming writers of result files by file extension."""
+
+
+def scan_stat_lines(path: Path) -> pl.LazyFrame:
+    """Lazily reads a file of stat lines.
+
+    Args:
+        path (Path): CSV, Parquet or JSON Lines file with at least the sack stat columns.
+
+    Raises:
+        ValueError: If the file type is not supported.
+
+    Returns:
+        pl.LazyFrame: The stat lines.
+    """
+    scanner = SCANNERS.get(path.suffix)
+    if scanner is None:
+        raise ValueError(f"Unsupported file type {path.suffix}")
+    return scanner(path)
+
+
+def fingerprint_aggregate(
+    complete_team_stats: pl.LazyFrame | pl.DataFrame,
+    columns: tuple[str, ...] = SACK_STAT_COLUMNS,
+) -> pl.LazyFrame:
+    """Aggregates the history per fingerprint.
+
+    The complete team stats are expected in chronological order.
+
+    Args:
+        complete_team_stats (pl.LazyFrame | pl.DataFrame): Complete team stats.
+        columns (tuple[str, ...], optional): Columns of the fingerprint. Defaults to SACK_STAT_COLUMNS.
+
+    Returns:
+        pl.LazyFrame: Count and last gameday per fingerprint.
+    """
+    return (
+        complete_team_stats.lazy()
+        .group_by(pl.col(column).cast(pl.Int64) for column in columns)
+        .agg(
+            pl.len().alias("count"),
+            COL.season.last().alias("last_season"),
+            COL.week.last().alias("last_week"),
+        )
+    )
+
+
+def answer_stat_lines(
+    stat_lines: pl.LazyFrame,
+    complete_team_stats: pl.LazyFrame | pl.DataFrame,
+    columns: tuple[str, ...] = SACK_STAT_COLUMNS,
+) -> pl.LazyFrame:
+    """Answers how often and when arbitrary stat lines happened with a single join.
+
+    Unlike `find_similar_stat_lines` the stat lines are not expected to be part
+    of the history, so nothing is left out of the counts.
+
+    Args:
+        stat_lines (pl.LazyFrame): The stat lines.
+        complete_team_stats (pl.LazyFrame | pl.DataFrame): Complete team stats.
+        columns (tuple[str, ...], optional): Columns of the fingerprint. Defaults to SACK_STAT_COLUMNS.
+
+    Returns:
+        pl.LazyFrame: The stat lines with count, last season and last week. Count is 0 and the last gameday null if it never happened.
+    """
+    return (
+        stat_lines.with_columns(pl.col(column).cast(pl.Int64) for column in columns)
+        .join(
+            fingerprint_aggregate(complete_team_stats, columns),
+            on=columns,
+            how="left",
+            maintain_order="left",
+        )
+        .with_columns(pl.col("count").fill_null(0))
+    )
+
+
+def write_results(results: pl.LazyFrame, path: Path) -> None:
+    """Streams results to a CSV, Parquet or JSON Lines file.
+
+    Args:
+        results (pl.LazyFrame): The results.
+        path (Path): Path of the output file.
+
+    Raises:
+        ValueError: If the file type is not supported.
+    """
+    sink = SINKS.get(path.suffix)
+    if sink is None:
+        raise ValueError(f"Unsupported file type {path.suffix}")
+    sink(results, path)
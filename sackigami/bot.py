@@ -2,21 +2,40 @@ import json
 import os
 import random
 import time
+from dataclasses import dataclass, field
 from datetime import date
+from functools import cached_property
 from pathlib import Path
-from typing import Any, Optional
+from typing import IO, Any, Optional
 
 import polars as pl
 
 import sackigami.x as x
-from sackigami.constants import BOT_CONF, COL, STAT_THRESHOLDS, TEAMS
+from sackigami.constants import (
+    API_CRED,
+    BOT_CONF,
+    COL,
+    STAT_THRESHOLDS,
+    APICred,
+)
+from sackigami.expected import ExpectedFrequency
+from sackigami.history import (
+    DominatingStatLines,
+    HistoryIndexes,
+    PartitionedStatLines,
+    PartitionIndex,
+)
+from sackigami.leaders import LEADER_NAMES, Leaderboards, LeaderRank, ordinal
+from sackigami.locking import acquire, atomic_write, file_lock
+from sackigami.surprise import Surprise, SurpriseModel
 from sackigami.teams import (
     GameDay,
     SackStatLine,
     SimilarStatLines,
-    find_similar_stat_lines,
     parse_last_gameday,
     parse_sack_data,
+    retrieve_weekly_stats,
+    team_name,
 )
 
 # TODO: Reduce save file size by only storing identifyind data
@@ -62,6 +81,13 @@ def set_correct_path(path: Optional[Path], fallback: Path) -> Path:
         return path
 
 
+_LEDGERS: dict[Path, tuple[tuple[int, int], list[dict[str, int | str]]]] = {}
+"""Parsed save files by path with the modification time and size they were read at."""
+
+_RUNS: dict[Path, Optional[IO]] = {}
+"""Shared locks on the runs of the save files this process wrote to."""
+
+
 def save_game_to_json(
     sack_stat_line: SackStatLine,
     path: Optional[Path] = BOT_CONF.save_path,
@@ -76,10 +102,108 @@ def save_game_to_json(
     """
     path = set_correct_path(path, fallback)
 
-    exiting_games: list[dict[str, int | str]] = load_game_from_json(path, fallback)
+    with file_lock(path):
+        append_game(sack_stat_line, path)
+
+
+def append_game(sack_stat_line: SackStatLine, path: Path) -> None:
+    """Appends a game to a save file. The caller has to hold its lock.
+
+    The file is replaced atomically, so readers never need the lock. The
+    process keeps a shared lock on the runs of the file until
+    `clear_offline_ledger`, marking that it still relies on the file.
+
+    Args:
+        sack_stat_line (SackStatLine): Stat line to save.
+        path (Path): The save file.
+    """
+    exiting_games: list[dict[str, int | str]] = load_game_from_json(path, path)
     exiting_games.append(sack_stat_line.as_dict())
 
-    path.write_text(json.dumps(exiting_games, indent=4))
+    _write_games(exiting_games, path)
+
+
+def _write_games(games: list[dict[str, int | str]], path: Path) -> None:
+    """Replaces the games of a save file. The caller has to hold its lock.
+
+    Args:
+        games (list[dict[str, int | str]]): All games of the save file.
+        path (Path): The save file.
+    """
+    if path not in _RUNS:
+        _RUNS[path] = acquire(runs_path(path), shared=True)
+
+    atomic_write(path, json.dumps(games, indent=4))
+
+
+def reserve_games(
+    sack_stat_lines: list[SackStatLine], path: Path
+) -> list[SackStatLine]:
+    """Saves the games not in a save file yet, before they are posted.
+
+    Checking and saving happen under the lock of the save file, so of
+    concurrent runs only one gets to post a game. The lock is not held while
+    posting, a post waiting out a rate limit does not block other runs.
+
+    Args:
+        sack_stat_lines (list[SackStatLine]): Stat lines about to be posted.
+        path (Path): The save file.
+
+    Returns:
+        list[SackStatLine]: The reserved stat lines, all not saved before, in the same order.
+    """
+    with file_lock(path):
+        exiting_games: list[dict[str, int | str]] = load_game_from_json(path, path)
+        reserved: list[SackStatLine] = []
+        for sack_stat_line in sack_stat_lines:
+            if sack_stat_line.as_dict() not in exiting_games:
+                exiting_games.append(sack_stat_line.as_dict())
+                reserved.append(sack_stat_line)
+
+        if reserved:
+            _write_games(exiting_games, path)
+    return reserved
+
+
+def release_games(sack_stat_lines: list[SackStatLine], path: Path) -> None:
+    """Removes reserved games from a save file again, e.g. after their post failed.
+
+    Args:
+        sack_stat_lines (list[SackStatLine]): Reserved stat lines that were not posted.
+        path (Path): The save file.
+    """
+    if not sack_stat_lines:
+        return
+
+    with file_lock(path):
+        exiting_games: list[dict[str, int | str]] = load_game_from_json(path, path)
+        for sack_stat_line in sack_stat_lines:
+            if sack_stat_line.as_dict() in exiting_games:
+                exiting_games.remove(sack_stat_line.as_dict())
+        _write_games(exiting_games, path)
+
+
+def runs_path(path: Path) -> Path:
+    """Path whose lock marks the runs relying on a save file."""
+    return path.with_name(path.name + ".runs")
+
+
+def clear_offline_ledger(path: Path = BOT_CONF.save_path_offline) -> None:
+    """Removes an offline save file once no other run relies on it anymore.
+
+    Args:
+        path (Path, optional): The offline save file. Defaults to BOT_CONF.save_path_offline.
+    """
+    handle: Optional[IO] = _RUNS.pop(path, None)
+    if handle is not None:
+        handle.close()
+
+    with file_lock(path):
+        other_runs: Optional[IO] = acquire(runs_path(path), blocking=False)
+        if other_runs is None:
+            return
+        other_runs.close()
+        path.unlink(missing_ok=True)
 
 
 def load_game_from_json(
@@ -88,6 +212,9 @@ def load_game_from_json(
 ) -> list[dict[str, int | str]] | Any:
     """Load game data from a JSON file.
 
+    The file is only parsed again after it changed on disk, so repeated
+    lookups during a run share one read.
+
     Args:
         path (Optional[Path], optional): Path to the saved gama data JSON file. Defaults to BOT_CONF.save_path.
         fallback (Path, optional): Path where to the saved JSON data when offline testing. Defaults to BOT_CONF.save_path_offline.
@@ -96,11 +223,21 @@ def load_game_from_json(
         list[dict[str, int | str]]: List with all saved game data.
     """
     path = set_correct_path(path, fallback)
-    if path.exists():
-        return json.loads(path.read_text())
-    else:
+    if not path.exists():
         return []
 
+    stat: os.stat_result = path.stat()
+    version: tuple[int, int] = (stat.st_mtime_ns, stat.st_size)
+    cached: Optional[tuple[tuple[int, int], list[dict[str, int | str]]]] = _LEDGERS.get(
+        path
+    )
+    if cached is None or cached[0] != version:
+        cached = (version, json.loads(path.read_text()))
+        _LEDGERS[path] = cached
+
+    # Callers append to the list
+    return list(cached[1])
+
 
 def plural_s(word: str, num: int | float) -> str:
     """Pluralize words that are pularilzed with an appending 's' when needing the plural.
@@ -116,20 +253,38 @@ def plural_s(word: str, num: int | float) -> str:
 
 
 def create_string(
-    sack_stat_line: SackStatLine, similar: Optional[SimilarStatLines]
+    sack_stat_line: SackStatLine,
+    similar: Optional[SimilarStatLines],
+    dominating: Optional[DominatingStatLines] = None,
+    partitioned: Optional[PartitionedStatLines] = None,
+    expected: Optional[ExpectedFrequency] = None,
+    leader: Optional[LeaderRank] = None,
+    surprise: Optional[Surprise] = None,
+    limit: int = BOT_CONF.post_length,
 ) -> str:
     """Creates a string which is to be posted on stdout and X.
 
+    The stat line and how often it happened before are always part of the
+    string, worded more compactly if they do not fit into the limit. The
+    further sentences follow in order of priority, each only if the string
+    still fits into the limit.
+
     Args:
         sack_stat_line (SackStatLine): Sack line to create string for.
         similar (Optional[SimilarStatLines]): Data how often the same game stats happened before. None if never.
+        dominating (Optional[DominatingStatLines], optional): Data how often a game at least this bad happened before. Omitted if None. Defaults to None.
+        partitioned (Optional[PartitionedStatLines], optional): Data how often the team and matchup had the same game stats before. Omitted if None. Defaults to None.
+        expected (Optional[ExpectedFrequency], optional): How often a game at least this bad is expected. Omitted if None. Defaults to None.
+        leader (Optional[LeaderRank], optional): Best all-time rank of the stat line. Omitted if None. Defaults to None.
+        surprise (Optional[Surprise], optional): Sacks expected against the opponent. Omitted if None. Defaults to None.
+        limit (int, optional): Maximum amount of characters of the string. Defaults to BOT_CONF.post_length.
 
     Returns:
         str: The string which is to be posted.
     """
     output: list[str] = []
-    team: str = TEAMS[sack_stat_line.team]
-    opponent_team: str = TEAMS[sack_stat_line.opponent_team]
+    team: str = team_name(sack_stat_line.team)
+    opponent_team: str = team_name(sack_stat_line.opponent_team)
     sacks_suffered: int = sack_stat_line.suffered
     sack_yards_lost: int = sack_stat_line.yards_lost
     sack_fumbles: int = sack_stat_line.fumbles
@@ -151,6 +306,9 @@ def create_string(
             f"{sack_fumbles} of those sacks were strip-sacks, resulting in {sack_fumbles_lost} {plural_s("turnover", sack_fumbles_lost)}."
         )
 
+    # Further sentences by priority, a later sentence of a group depends on
+    # the earlier ones
+    extras: list[list[str]] = []
     if similar is None:
         output.insert(0, "Sackigami!\n")
         output.append("\nThis has never happened before.")
@@ -160,9 +318,99 @@ def create_string(
             f"\nThis has happened {similar.count} {plural_s("time", similar.count)} before. Most recently in week {similar.last_gameday.week} of the {similar.last_gameday.season} season."
         )
 
+        if partitioned is not None:
+            extras.append(create_partitioned_strings(sack_stat_line, partitioned))
+
+    if dominating is not None:
+        extras.append(
+            [
+                f"A game at least this bad has happened {dominating.count} {plural_s("time", dominating.count)} before. Most recently in week {dominating.last_gameday.week} of the {dominating.last_gameday.season} season."
+            ]
+        )
+
+    if expected is not None:
+        extras.append([create_expected_string(expected)])
+
+    if leader is not None:
+        most: str = "most" if leader.rank == 1 else f"{ordinal(leader.rank)}-most"
+        extras.append(
+            [
+                f"This is the {most} {LEADER_NAMES[leader.column]} in a game since {leader.first_season}."
+            ]
+        )
+
+    if surprise is not None:
+        extras.append(
+            [
+                f"Against the {opponent_team} only {surprise.expected:.1f} {plural_s("sack", round(surprise.expected, 1))} were expected, this is {surprise.z_score:.1f} standard deviations more."
+            ]
+        )
+
+    length: int = len("\n".join(output))
+    if length > limit:
+        compact: str = (
+            f"The {team} suffered {sacks_suffered} {plural_s("sack", sacks_suffered)} against the {opponent_team} for a total of {abs(sack_yards_lost)} {plural_s("yard", sack_yards_lost)} lost."
+        )
+        length -= len(output[1]) - len(compact)
+        output[1] = compact
+
+    for group in extras:
+        for sentence in group:
+            if length + 1 + len(sentence) > limit:
+                break
+            output.append(sentence)
+            length += 1 + len(sentence)
+
     return "\n".join(output)
 
 
+def create_expected_string(expected: ExpectedFrequency) -> str:
+    """Creates the sentence on how often a game at least this bad is expected.
+
+    Args:
+        expected (ExpectedFrequency): The expected frequency.
+
+    Returns:
+        str: The sentence.
+    """
+    if expected.lower_bound:
+        return f"A game at least this bad is expected less than once every {expected.seasons:.0f} seasons."
+    if expected.seasons >= 1.5:
+        return f"A game at least this bad is expected about once every {expected.seasons:.0f} seasons."
+
+    per_season: float = 1 / expected.seasons
+    return f"A game at least this bad is expected about {per_season:.0f} {plural_s("time", round(per_season))} per season."
+
+
+def create_partitioned_strings(
+    sack_stat_line: SackStatLine, partitioned: PartitionedStatLines
+) -> list[str]:
+    """Creates the sentences on how often the team and matchup had the same stats.
+
+    Args:
+        sack_stat_line (SackStatLine): Sack line to create the sentences for.
+        partitioned (PartitionedStatLines): Data how often the team and matchup had the same game stats before.
+
+    Returns:
+        list[str]: The sentences.
+    """
+    team: str = team_name(sack_stat_line.team)
+    opponent_team: str = team_name(sack_stat_line.opponent_team)
+
+    if partitioned.team is None:
+        return [f"This is a first for the {team}."]
+
+    output: list[str] = [
+        f"The {team} did this {partitioned.team.count} {plural_s("time", partitioned.team.count)} before. Most recently in week {partitioned.team.last_gameday.week} of the {partitioned.team.last_gameday.season} season."
+    ]
+    if partitioned.matchup is not None:
+        output.append(
+            f"{partitioned.matchup.count} of those {"was" if partitioned.matchup.count == 1 else "were"} against the {opponent_team}."
+        )
+
+    return output
+
+
 def random_delay(
     base: int = BOT_CONF.post_timeout, variance: int = int(BOT_CONF.post_timeout * 0.3)
 ) -> float:
@@ -191,6 +439,8 @@ def post(
     similar: Optional[SimilarStatLines],
     path: Optional[Path] = BOT_CONF.save_path,
     fallback: Path = BOT_CONF.save_path_offline,
+    dominating: Optional[DominatingStatLines] = None,
+    partitioned: Optional[PartitionedStatLines] = None,
 ) -> None:
     """Posts a game to stdout and X.
 
@@ -199,18 +449,58 @@ def post(
         similar (Optional[dict[str, int]]): Dict that contains data how often the same game stats happened before. None if never.
         path (Optional[Path], optional): Path where to save games of completed posts. Defaults to BOT_CONF.save_path.
         fallback (Path, optional): Path where to save save games of completed posts when offline testing. Defaults to BOT_CONF.save_path_offline.
+        dominating (Optional[DominatingStatLines], optional): Data how often a game at least this bad happened before. Defaults to None.
+        partitioned (Optional[PartitionedStatLines], optional): Data how often the team and matchup had the same game stats before. Defaults to None.
     """
-    output: str = create_string(sack_stat_line, similar)
+    output: str = create_string(sack_stat_line, similar, dominating, partitioned)
 
-    print(output)
+    publish(output, sack_stat_line, path, fallback)
 
     if not offline_test():
-        x.post(output)
+        apply_delay()
+
+
+def publish(
+    output: str,
+    sack_stat_line: SackStatLine,
+    path: Optional[Path] = BOT_CONF.save_path,
+    fallback: Path = BOT_CONF.save_path_offline,
+    cred: APICred = API_CRED,
+) -> bool:
+    """Publishes an already created string to stdout and X and saves the game.
 
-    save_game_to_json(sack_stat_line, path, fallback)
+    The game is reserved in the save file before posting, see
+    `reserve_games`, and removed again if the post fails.
+
+    Args:
+        output (str): The string to post.
+        sack_stat_line (SackStatLine): Sack stat line the string was created for.
+        path (Optional[Path], optional): Path where to save games of completed posts. Defaults to BOT_CONF.save_path.
+        fallback (Path, optional): Path where to save save games of completed posts when offline testing. Defaults to BOT_CONF.save_path_offline.
+        cred (APICred, optional): Credentials of the account to post with. Defaults to API_CRED.
+
+    Returns:
+        bool: True if the string was posted, False if another run already posted the game.
+    """
+    path = set_correct_path(path, fallback)
+
+    if not reserve_games([sack_stat_line], path):
+        print(
+            f"{sack_stat_line.team} in week {sack_stat_line.gameday.week} of "
+            f"{sack_stat_line.gameday.season} was already posted by another run"
+        )
+        return False
+
+    print(output)
 
     if not offline_test():
-        apply_delay()
+        try:
+            x.post(output, cred=cred)
+        except Exception:
+            # Not posted after all, a later run may try again
+            release_games([sack_stat_line], path)
+            raise
+    return True
 
 
 def has_been_posted(
@@ -233,7 +523,13 @@ def has_been_posted(
 
 
 def worth_posting(
-    sack_stat_line: SackStatLine, similar: Optional[SimilarStatLines]
+    sack_stat_line: SackStatLine,
+    similar: Optional[SimilarStatLines],
+    thresholds: dict[str, int] = STAT_THRESHOLDS,
+    path: Optional[Path] = BOT_CONF.save_path,
+    fallback: Path = BOT_CONF.save_path_offline,
+    expected: Optional[ExpectedFrequency] = None,
+    surprise: Optional[Surprise] = None,
 ) -> bool:
     """Checks whether a game is worth posting.
 
@@ -243,65 +539,340 @@ def worth_posting(
     Args:
         sack_stat_line (SackStatLine): Sack stat line to check for.
         similar (Optional[dict[str, int]]): Dict that contains data how often the same game stats happened before. None if never.
+        thresholds (dict[str, int], optional): Stat thresholds above which a game is worth posting. Defaults to STAT_THRESHOLDS.
+        path (Optional[Path], optional): Path where to look for saved games in JSON format. Defaults to BOT_CONF.save_path.
+        fallback (Path, optional): Path where to look for saved games in JSON format when offline testing. Defaults to BOT_CONF.save_path_offline.
+        expected (Optional[ExpectedFrequency], optional): How often a game at least this bad is expected. Not considered if None. Defaults to None.
+        surprise (Optional[Surprise], optional): Sacks expected against the opponent. Not considered if None. Defaults to None.
 
     Returns:
         bool: True if the game is worth, False if not.
     """
 
-    if has_been_posted(sack_stat_line):
+    if has_been_posted(sack_stat_line, path, fallback):
         return False
 
     if similar is None:
         return True
 
-    if similar.count <= 4:
+    if similar.count <= BOT_CONF.similar_count_cutoff:
+        return True
+
+    if similar.last_gameday.season <= date.today().year - BOT_CONF.similar_years_cutoff:
         return True
 
-    if similar.last_gameday.season <= date.today().year - 15:
+    if expected is not None and expected.seasons >= BOT_CONF.expected_seasons:
+        return True
+
+    if surprise is not None and surprise.z_score >= BOT_CONF.surprise_z_score:
         return True
 
     if (
-        sack_stat_line.suffered >= STAT_THRESHOLDS["sacks_suffered"]
+        sack_stat_line.suffered >= thresholds["sacks_suffered"]
         # TODO: Prbly to unrealistic
         and sack_stat_line.yards_lost == 0
     ):
         return True
 
     if (
-        (sack_stat_line.suffered >= STAT_THRESHOLDS["sacks_suffered"])
-        or (abs(sack_stat_line.yards_lost) >= abs(STAT_THRESHOLDS["sack_yards_lost"]))
-        or (sack_stat_line.fumbles >= STAT_THRESHOLDS["sack_fumbles"])
-        or (sack_stat_line.fumbles_lost >= STAT_THRESHOLDS["sack_fumbles_lost"])
+        (sack_stat_line.suffered >= thresholds["sacks_suffered"])
+        or (abs(sack_stat_line.yards_lost) >= abs(thresholds["sack_yards_lost"]))
+        or (sack_stat_line.fumbles >= thresholds["sack_fumbles"])
+        or (sack_stat_line.fumbles_lost >= thresholds["sack_fumbles_lost"])
     ):
         return True
 
     return False
 
 
-def loop_over_week(week: pl.DataFrame, complete_team_stats: pl.DataFrame) -> None:
-    """Iterates over a game day, parses the data and post Sackigami! data.
+@dataclass
+class Evaluation:
+    """A stat line worth posting together with its history."""
+
+    sack_stat_line: SackStatLine
+    """The stat line."""
+
+    similar: Optional[SimilarStatLines]
+    """Similar stat lines. None if never."""
+
+    dominating: Optional[DominatingStatLines]
+    """Stat lines at least as bad. None if never."""
+
+    partitioned: PartitionedStatLines
+    """Similar stat lines of the team and the matchup."""
+
+    expected: Optional[ExpectedFrequency] = None
+    """How often a game at least this bad is expected. None if not modelled."""
+
+    leader: Optional[LeaderRank] = None
+    """Best all-time rank of the stat line. None if it makes no leaderboard."""
+
+    surprise: Optional[Surprise] = None
+    """Sacks expected against the opponent. None if the game is not surprising."""
+
+    def create_string(self, limit: int = BOT_CONF.post_length) -> str:
+        """Creates the string which is to be posted.
+
+        Args:
+            limit (int, optional): Maximum amount of characters of the string. Defaults to BOT_CONF.post_length.
+
+        Returns:
+            str: The string which is to be posted.
+        """
+        return create_string(
+            self.sack_stat_line,
+            self.similar,
+            self.dominating,
+            self.partitioned,
+            self.expected,
+            self.leader,
+            self.surprise,
+            limit,
+        )
+
+
+def evaluate_stat_line(
+    sack_stat_line: SackStatLine,
+    indexes: HistoryIndexes,
+    thresholds: dict[str, int] = STAT_THRESHOLDS,
+    path: Optional[Path] = BOT_CONF.save_path,
+    fallback: Path = BOT_CONF.save_path_offline,
+) -> Optional[Evaluation]:
+    """Compares a single stat line against the history and decides if it is worth posting.
 
     Args:
-        week (pl.DataFrame): Game stats of the week,
-        complete_team_stats (pl.DataFrame): All stats.
+        sack_stat_line (SackStatLine): Sack stat line to evaluate.
+        indexes (HistoryIndexes): Precomputed indexes of the history.
+        thresholds (dict[str, int], optional): Stat thresholds above which a game is worth posting. Defaults to STAT_THRESHOLDS.
+        path (Optional[Path], optional): Path where to look for saved games in JSON format. Defaults to BOT_CONF.save_path.
+        fallback (Path, optional): Path where to look for saved games in JSON format when offline testing. Defaults to BOT_CONF.save_path_offline.
+
+    Returns:
+        Optional[Evaluation]: The evaluation if worth posting, else None.
+    """
+    sim: Optional[SimilarStatLines] = indexes.fingerprints.find_similar_stat_lines(
+        sack_stat_line
+    )
+    expected: Optional[ExpectedFrequency] = (
+        None
+        if indexes.expected is None
+        else indexes.expected.expected_frequency(sack_stat_line)
+    )
+    surprise: Optional[Surprise] = indexes.surprises.get(
+        (
+            sack_stat_line.gameday.season,
+            sack_stat_line.gameday.week,
+            sack_stat_line.team,
+        )
+    )
+    if surprise is not None and surprise.z_score < BOT_CONF.surprise_z_score:
+        surprise = None
+
+    if sim is None:
+        if has_been_posted(sack_stat_line, path, fallback):
+            return None
+    elif not worth_posting(
+        sack_stat_line, sim, thresholds, path, fallback, expected, surprise
+    ):
+        return None
+
+    return Evaluation(
+        sack_stat_line=sack_stat_line,
+        similar=sim,
+        dominating=indexes.dominance.find_dominating_stat_lines(sack_stat_line),
+        partitioned=indexes.partitions.find_partitioned_stat_lines(sack_stat_line),
+        expected=expected,
+        leader=(
+            None
+            if indexes.leaders is None
+            else indexes.leaders.best_rank(sack_stat_line)
+        ),
+        surprise=surprise,
+    )
+
+
+def post_evaluation(
+    evaluation: Evaluation,
+    path: Optional[Path] = BOT_CONF.save_path,
+    fallback: Path = BOT_CONF.save_path_offline,
+    limit: int = BOT_CONF.post_length,
+) -> None:
+    """Posts an evaluated game with all of its sentences that fit to stdout and X.
+
+    Args:
+        evaluation (Evaluation): The evaluation of the game.
+        path (Optional[Path], optional): Path where to save games of completed posts. Defaults to BOT_CONF.save_path.
+        fallback (Path, optional): Path where to save save games of completed posts when offline testing. Defaults to BOT_CONF.save_path_offline.
+        limit (int, optional): Maximum amount of characters of the post. Defaults to BOT_CONF.post_length.
+    """
+    publish(evaluation.create_string(limit), evaluation.sack_stat_line, path, fallback)
+
+    if not offline_test():
+        apply_delay()
+
+
+def process_stat_line(sack_stat_line: SackStatLine, indexes: HistoryIndexes) -> None:
+    """Compares a single stat line against the history and posts it if worth it.
+
+    Args:
+        sack_stat_line (SackStatLine): Sack stat line to process.
+        indexes (HistoryIndexes): Precomputed indexes of the history.
+    """
+    evaluation: Optional[Evaluation] = evaluate_stat_line(sack_stat_line, indexes)
+    print("--------------")
+    if evaluation is not None:
+        post_evaluation(evaluation)
+
+
+@dataclass
+class WeekContext:
+    """A game day together with the loaded history.
+
+    Derived data is computed at most once on first use, so several post types
+    can run against the same context.
     """
-    week_sack_data: pl.DataFrame = parse_sack_data(week)
-    for stat_line in week_sack_data.iter_rows(named=True):
-        sack_stat_line = SackStatLine.from_dict(stat_line)
 
-        sim: Optional[SimilarStatLines] = find_similar_stat_lines(
-            complete_team_stats, sack_stat_line
+    complete_team_stats: pl.DataFrame
+    """All stats."""
+
+    week: pl.DataFrame
+    """Game stats of the week."""
+
+    partitions: Optional[PartitionIndex] = field(default=None, repr=False)
+    """Already loaded per team and matchup history. Built from complete_team_stats if None."""
+
+    leaders: Optional[Leaderboards] = field(default=None, repr=False)
+    """Already loaded leaderboards. Built from complete_team_stats if None."""
+
+    surprise_model: Optional[SurpriseModel] = field(default=None, repr=False)
+    """Already loaded model of all games before the game day. Built from complete_team_stats if None."""
+
+    previous: Optional["WeekContext"] = field(default=None, repr=False)
+    """Context of the game day before in a catch-up. Its indexes are advanced to this game day instead of building new ones."""
+
+    @cached_property
+    def week_sack_data(self) -> pl.DataFrame:
+        """Relevant columns of the game stats of the week."""
+        return parse_sack_data(self.week)
+
+    @cached_property
+    def indexes(self) -> HistoryIndexes:
+        """Precomputed indexes of the history."""
+        previous: Optional[WeekContext] = self.previous
+        if previous is not None:
+            indexes: HistoryIndexes = previous.indexes
+            # Used once more, the earlier game day builds its indexes again
+            del previous.indexes
+            self.previous = None
+
+            indexes.append(
+                self.complete_team_stats.slice(previous.complete_team_stats.height),
+                self.complete_team_stats,
+            )
+            return indexes
+
+        return HistoryIndexes.from_df(
+            self.complete_team_stats,
+            self.partitions,
+            leaders=self.leaders,
+            surprise_model=self.surprise_model,
+        )
+
+
+def catch_up(context: WeekContext, gamedays: list[GameDay]) -> list[WeekContext]:
+    """Game days together with the history as it was when each was final.
+
+    Every game day only sees the games up to itself, so a game of a missed
+    week is not compared against games played after it. The indexes are
+    built once for the first game day and advanced from one game day to the
+    next, so the contexts are best used in chronological order. Without
+    missed game days the loaded context is reused.
+
+    Args:
+        context (WeekContext): The latest game day and the loaded history.
+        gamedays (list[GameDay]): The game days in chronological order.
+
+    Returns:
+        list[WeekContext]: One context per game day, in the same order.
+    """
+    if gamedays == [parse_last_gameday(context.complete_team_stats)]:
+        return [context]
+
+    contexts: list[WeekContext] = []
+    for gameday in gamedays:
+        history: pl.DataFrame = context.complete_team_stats.filter(
+            (COL.season < gameday.season)
+            | ((COL.season == gameday.season) & (COL.week <= gameday.week))
         )
-        print("--------------")
-        if sim is None:
-            if not has_been_posted(sack_stat_line):
-                post(sack_stat_line, None)
-        else:
-            if worth_posting(sack_stat_line, sim):
-                post(sack_stat_line, sim)
+        contexts.append(
+            WeekContext(
+                history,
+                retrieve_weekly_stats(history, gameday),
+                previous=contexts[-1] if contexts else None,
+            )
+        )
+
+    return contexts
+
+
+def evaluate_week(context: WeekContext) -> list[Evaluation]:
+    """Evaluates all stat lines of a game day.
+
+    Args:
+        context (WeekContext): The game day and the loaded history.
+
+    Returns:
+        list[Evaluation]: The evaluations of the stat lines worth posting.
+    """
+    evaluations: list[Evaluation] = []
+    for stat_line in context.week_sack_data.iter_rows(named=True):
+        evaluation: Optional[Evaluation] = evaluate_stat_line(
+            SackStatLine.from_dict(stat_line), context.indexes
+        )
+        if evaluation is not None:
+            evaluations.append(evaluation)
+    return evaluations
+
+
+def post_weeks(contexts: list[WeekContext]) -> None:
+    """Decides on all game days first and then posts them in chronological order.
+
+    Args:
+        contexts (list[WeekContext]): The game days in chronological order, e.g. as returned by `catch_up`.
+    """
+    decisions: list[list[Evaluation]] = [evaluate_week(context) for context in contexts]
+
+    for evaluations in decisions:
+        for evaluation in evaluations:
+            print("--------------")
+            post_evaluation(evaluation)
 
     if offline_test():
-        Path(BOT_CONF.save_path_offline).unlink(missing_ok=True)
+        clear_offline_ledger()
+
+
+def post_week(context: WeekContext) -> None:
+    """Iterates over a game day and posts Sackigami! data.
+
+    Args:
+        context (WeekContext): The game day and the loaded history.
+    """
+    post_weeks([context])
+
+
+def loop_over_week(
+    week: pl.DataFrame,
+    complete_team_stats: pl.DataFrame,
+    partitions: Optional[PartitionIndex] = None,
+) -> None:
+    """Iterates over a game day, parses the data and post Sackigami! data.
+
+    Args:
+        week (pl.DataFrame): Game stats of the week,
+        complete_team_stats (pl.DataFrame): All stats.
+        partitions (Optional[PartitionIndex], optional): Per team and matchup history. Built from complete_team_stats if None. Defaults to None.
+    """
+    post_week(WeekContext(complete_team_stats, week, partitions))
 
 
 def no_sack_average(complete_team_stats: pl.DataFrame) -> float:
@@ -326,21 +897,19 @@ def no_sack_average(complete_team_stats: pl.DataFrame) -> float:
     return amount / game_day.week
 
 
-def loop_over_no_sacks(week: pl.DataFrame, complete_team_stats: pl.DataFrame) -> None:
-    """Iterates over a game day, parses the data and post teams that did not surrender a sack.
+def post_no_sacks(context: WeekContext) -> None:
+    """Iterates over a game day and posts teams that did not surrender a sack.
 
     Args:
-        week (pl.DataFrame): Game stats of the week,
-        complete_team_stats (pl.DataFrame): All stats.
+        context (WeekContext): The game day and the loaded history.
     """
     teams_no_sacks: list[str] = []
 
-    week_sack_data: pl.DataFrame = parse_sack_data(week)
-    for game in week_sack_data.iter_rows(named=True):
+    for game in context.week_sack_data.iter_rows(named=True):
         if game["sacks_suffered"] == 0:
             teams_no_sacks.append(game["team"])
 
-    output: str = create_string_no_sacks(teams_no_sacks, complete_team_stats)
+    output: str = create_string_no_sacks(teams_no_sacks, context.complete_team_stats)
 
     print(output)
 
@@ -348,6 +917,16 @@ def loop_over_no_sacks(week: pl.DataFrame, complete_team_stats: pl.DataFrame) ->
         x.post(output)
 
 
+def loop_over_no_sacks(week: pl.DataFrame, complete_team_stats: pl.DataFrame) -> None:
+    """Iterates over a game day, parses the data and post teams that did not surrender a sack.
+
+    Args:
+        week (pl.DataFrame): Game stats of the week,
+        complete_team_stats (pl.DataFrame): All stats.
+    """
+    post_no_sacks(WeekContext(complete_team_stats, week))
+
+
 def create_string_no_sacks(
     teams_no_sacks: list[str], complete_team_stats: pl.DataFrame
 ) -> str:
@@ -367,7 +946,7 @@ def create_string_no_sacks(
     )
 
     for team in teams_no_sacks:
-        output.append(TEAMS[team])
+        output.append(team_name(team))
     avg: float = no_sack_average(complete_team_stats)
     output.append(
         f"\nThis season, on average {avg:.2f} {plural_s("team", round(avg, 2))} do not surrender a sack per game day."
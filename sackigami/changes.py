@@ -0,0 +1,325 @@
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import polars as pl
+
+from sackigami.bot import (
+    Evaluation,
+    clear_offline_ledger,
+    evaluate_stat_line,
+    load_game_from_json,
+    offline_test,
+    process_stat_line,
+)
+from sackigami.constants import BOT_CONF, COL
+from sackigami.history import (
+    SNAPSHOT_COLUMNS,
+    DominanceIndex,
+    HistoryIndexes,
+    PartitionIndex,
+    snapshot_version,
+)
+from sackigami.locking import atomic_write_parquet, file_lock
+from sackigami.teams import GameDay, SackStatLine, parse_last_gameday
+
+GAME_KEY: tuple[str, ...] = ("season", "week", "team")
+"""Columns identifying a single team game."""
+
+
+@dataclass
+class ChangeSet:
+    """Team games that changed between two refreshes."""
+
+    inserted: pl.DataFrame
+    """Games that are new."""
+
+    updated: pl.DataFrame
+    """New versions of games whose stats were corrected."""
+
+    previous: pl.DataFrame
+    """Old versions of the updated games."""
+
+    deleted: pl.DataFrame
+    """Games that are gone."""
+
+    base_version: tuple[int, int]
+    """Snapshot version of the previous snapshot the changes apply to."""
+
+    def is_empty(self) -> bool:
+        return (
+            self.inserted.is_empty()
+            and self.updated.is_empty()
+            and self.deleted.is_empty()
+        )
+
+    def affected(self) -> pl.DataFrame:
+        """Old and new versions of all changed games.
+
+        Returns:
+            pl.DataFrame: The changed games.
+        """
+        return pl.concat([self.inserted, self.updated, self.previous, self.deleted])
+
+    def removed(self) -> pl.DataFrame:
+        """Old versions of the updated games and the deleted games.
+
+        Returns:
+            pl.DataFrame: The games no longer part of the history.
+        """
+        return pl.concat([self.previous, self.deleted])
+
+    def added(self) -> pl.DataFrame:
+        """New versions of the updated games and the inserted games.
+
+        Returns:
+            pl.DataFrame: The games new to the history.
+        """
+        return pl.concat([self.updated, self.inserted])
+
+
+def snapshot(complete_team_stats: pl.DataFrame) -> pl.DataFrame:
+    """Reduces the team stats to the columns compared between refreshes.
+
+    Args:
+        complete_team_stats (pl.DataFrame): Complete team stats.
+
+    Returns:
+        pl.DataFrame: The snapshot.
+    """
+    return complete_team_stats.select(SNAPSHOT_COLUMNS)
+
+
+def diff_snapshots(previous: pl.DataFrame, current: pl.DataFrame) -> ChangeSet:
+    """Diffs two snapshots by joining on the game key and comparing row hashes.
+
+    Args:
+        previous (pl.DataFrame): Snapshot of the last refresh.
+        current (pl.DataFrame): Snapshot of this refresh.
+
+    Returns:
+        ChangeSet: The changed games.
+    """
+    hashed_previous: pl.DataFrame = previous.with_columns(
+        previous.hash_rows().alias("hash")
+    )
+    hashed_current: pl.DataFrame = current.with_columns(
+        current.hash_rows().alias("hash")
+    )
+
+    changed_keys: pl.DataFrame = (
+        hashed_current.select(*GAME_KEY, "hash")
+        .join(
+            hashed_previous.select(*GAME_KEY, "hash"),
+            on=GAME_KEY,
+            how="inner",
+            suffix="_previous",
+        )
+        .filter(pl.col("hash") != pl.col("hash_previous"))
+        .select(GAME_KEY)
+    )
+
+    return ChangeSet(
+        inserted=current.join(previous, on=GAME_KEY, how="anti", maintain_order="left"),
+        updated=current.join(
+            changed_keys, on=GAME_KEY, how="semi", maintain_order="left"
+        ),
+        previous=previous.join(
+            changed_keys, on=GAME_KEY, how="semi", maintain_order="left"
+        ),
+        deleted=previous.join(current, on=GAME_KEY, how="anti", maintain_order="left"),
+        base_version=snapshot_version(previous),
+    )
+
+
+def snapshot_path(directory: Path = BOT_CONF.cache_dir) -> Path:
+    """Path of the stored snapshot. Its lock guards a whole refresh.
+
+    Args:
+        directory (Path, optional): Directory of the data cache. Defaults to BOT_CONF.cache_dir.
+
+    Returns:
+        Path: The path.
+    """
+    return directory / "snapshot.parquet"
+
+
+def detect_changes(
+    complete_team_stats: pl.DataFrame, directory: Path = BOT_CONF.cache_dir
+) -> ChangeSet:
+    """Diffs the team stats against the stored snapshot.
+
+    Without a stored snapshot the last gameday counts as inserted, which
+    matches evaluating the latest week from scratch. The new snapshot is only
+    stored by `store_snapshot` once the changes are posted, so a failed
+    refresh detects them again.
+
+    Args:
+        complete_team_stats (pl.DataFrame): Complete team stats.
+        directory (Path, optional): Directory of the data cache. Defaults to BOT_CONF.cache_dir.
+
+    Returns:
+        ChangeSet: The changed games.
+    """
+    current: pl.DataFrame = snapshot(complete_team_stats)
+    path: Path = snapshot_path(directory)
+
+    if path.exists():
+        previous: pl.DataFrame = pl.read_parquet(path)
+    else:
+        last_gameday: GameDay = parse_last_gameday(current)
+        previous = current.filter(
+            (COL.season != last_gameday.season) | (COL.week != last_gameday.week)
+        )
+
+    return diff_snapshots(previous, current)
+
+
+def store_snapshot(
+    complete_team_stats: pl.DataFrame,
+    dominance: DominanceIndex,
+    directory: Path = BOT_CONF.cache_dir,
+) -> None:
+    """Stores the snapshot of the team stats together with the matching dominance index.
+
+    Args:
+        complete_team_stats (pl.DataFrame): Complete team stats.
+        dominance (DominanceIndex): The dominance index of the team stats.
+        directory (Path, optional): Directory of the data cache. Defaults to BOT_CONF.cache_dir.
+    """
+    dominance.save(directory)
+    atomic_write_parquet(snapshot(complete_team_stats), snapshot_path(directory))
+
+
+def refresh_partition_index(
+    complete_team_stats: pl.DataFrame,
+    changes: ChangeSet,
+    directory: Path = BOT_CONF.cache_dir,
+) -> PartitionIndex:
+    """Brings the persisted partition index up to date with a change set.
+
+    Args:
+        complete_team_stats (pl.DataFrame): Complete team stats.
+        changes (ChangeSet): The changed games.
+        directory (Path, optional): Directory of the data cache. Defaults to BOT_CONF.cache_dir.
+
+    Returns:
+        PartitionIndex: The up to date index.
+    """
+    with file_lock(directory / "partitions.json"):
+        index: Optional[PartitionIndex] = PartitionIndex.load(directory)
+
+        if index is None or index.last_gameday is None:
+            index = PartitionIndex(complete_team_stats)
+        else:
+            index.refresh(changes.affected(), complete_team_stats)
+
+        index.save(directory)
+    return index
+
+
+def refresh_dominance_index(
+    complete_team_stats: pl.DataFrame,
+    changes: ChangeSet,
+    directory: Path = BOT_CONF.cache_dir,
+) -> DominanceIndex:
+    """Brings the persisted dominance index up to date with a change set.
+
+    Unlike the partition index, which recounts the touched entries, the
+    dominance index is adjusted by the changes. It is therefore persisted
+    only by `store_snapshot`, together with the snapshot it matches. An index
+    not matching the previous snapshot, e.g. after an interrupted refresh, is
+    built from scratch.
+
+    Args:
+        complete_team_stats (pl.DataFrame): Complete team stats.
+        changes (ChangeSet): The changed games.
+        directory (Path, optional): Directory of the data cache. Defaults to BOT_CONF.cache_dir.
+
+    Returns:
+        DominanceIndex: The up to date index.
+    """
+    index: Optional[DominanceIndex] = DominanceIndex.load(directory)
+
+    if index is None or index.version != changes.base_version:
+        return DominanceIndex(complete_team_stats)
+
+    index.refresh(changes.removed(), changes.added(), complete_team_stats)
+    return index
+
+
+def posted_before(
+    sack_stat_line: SackStatLine,
+    path: Optional[Path] = BOT_CONF.save_path,
+    fallback: Path = BOT_CONF.save_path_offline,
+) -> bool:
+    """Checks whether any version of a game has already been posted.
+
+    Args:
+        sack_stat_line (SackStatLine): Stat line to check for.
+        path (Optional[Path], optional): Path where to look for saved games in JSON format. Defaults to BOT_CONF.save_path.
+        fallback (Path, optional): Path where to look for saved games in JSON format when offline testing. Defaults to BOT_CONF.save_path_offline.
+
+    Returns:
+        bool: True if the game has been posted, with the same or other stats.
+    """
+    key = (
+        sack_stat_line.gameday.season,
+        sack_stat_line.gameday.week,
+        sack_stat_line.team,
+    )
+    return any(
+        (game["season"], game["week"], game["team"]) == key
+        for game in load_game_from_json(path, fallback)
+    )
+
+
+def post_changes(
+    changes: ChangeSet,
+    complete_team_stats: pl.DataFrame,
+    partitions: Optional[PartitionIndex] = None,
+    dominance: Optional[DominanceIndex] = None,
+) -> list[Evaluation]:
+    """Evaluates only the changed games and posts the new ones worth it.
+
+    Corrected games that are worth posting are flagged instead of posted, so
+    a correction never ends up as a duplicate post.
+
+    Args:
+        changes (ChangeSet): The changed games.
+        complete_team_stats (pl.DataFrame): All stats.
+        partitions (Optional[PartitionIndex], optional): Per team and matchup history. Built from complete_team_stats if None. Defaults to None.
+        dominance (Optional[DominanceIndex], optional): Refreshed dominance index. Built from complete_team_stats if None. Defaults to None.
+
+    Returns:
+        list[Evaluation]: The flagged corrections.
+    """
+    indexes: HistoryIndexes = HistoryIndexes.from_df(
+        complete_team_stats, partitions, dominance
+    )
+
+    for stat_line in changes.inserted.iter_rows(named=True):
+        process_stat_line(SackStatLine.from_dict(stat_line), indexes)
+
+    flagged: list[Evaluation] = []
+    for stat_line in changes.updated.iter_rows(named=True):
+        evaluation: Optional[Evaluation] = evaluate_stat_line(
+            SackStatLine.from_dict(stat_line), indexes
+        )
+        if evaluation is None:
+            continue
+
+        line: SackStatLine = evaluation.sack_stat_line
+        state: str = "was posted before" if posted_before(line) else "newly qualifies"
+        print("--------------")
+        print(
+            f"Flagged correction of the {line.team} in week {line.gameday.week} "
+            f"of the {line.gameday.season} season, which {state}:"
+        )
+        print(evaluation.create_string())
+        flagged.append(evaluation)
+
+    if offline_test():
+        clear_offline_ledger()
+
+    return flagged
@@ -1,17 +1,70 @@
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Annotated, Any, Callable, Optional
+
 import polars as pl
 import typer
 from dotenv import load_dotenv
 
 load_dotenv()
 
+from sackigami.batch import answer_stat_lines, scan_stat_lines, write_results
 from sackigami.bot import (
-    loop_over_no_sacks,
-    loop_over_week,
+    WeekContext,
+    catch_up,
+    load_game_from_json,
+    post_no_sacks,
+    post_week,
+    post_weeks,
+    set_correct_path,
+)
+from sackigami.changes import (
+    ChangeSet,
+    detect_changes,
+    post_changes,
+    refresh_dominance_index,
+    refresh_partition_index,
+    snapshot_path,
+    store_snapshot,
 )
+from sackigami.constants import BOT_CONF, SCHEDULER_CONF
+from sackigami.digest import post_digest
+from sackigami.gamedays import (
+    last_covered_gameday,
+    load_last_run,
+    load_schedule,
+    new_completed_gameday,
+    next_useful_run,
+    pending_gamedays,
+    save_last_run,
+)
+from sackigami.history import DominanceIndex, PartitionIndex, load_partition_index
+from sackigami.leaders import LEADER_NAMES, Leaderboards, load_leaderboards
+from sackigami.live import FileReplayFeed, track_live
+from sackigami.locking import file_lock
+from sackigami.mockx import MockXServer, render_season, replay_posts
+from sackigami.pbp import retrieve_pbp_sack_stats
+from sackigami.personas import Persona, load_personas, post_personas
+from sackigami.profiling import record_phase, start_profiling, stop_profiling
+from sackigami.render import render_posts
+from sackigami.scheduler import PostQueue, run_queue, schedule_week
+from sackigami.server import QueryService, load_test, serve
+from sackigami.startup import Startup, load_startup
 from sackigami.teams import (
+    GameDay,
+    parse_last_gameday,
     retrieve_complete_team_stats,
-    retrieve_weekly_stats,
 )
+from sackigami.tuning import (
+    TUNING_GRID,
+    candidate_grid,
+    current_configuration,
+    evaluate_grid,
+    pareto_front,
+)
+from sackigami.website import SiteBuild, build_site, site_pages
 
 app = typer.Typer(
     suggest_commands=True,
@@ -20,32 +73,581 @@ app = typer.Typer(
 """Typer app."""
 
 
+@app.callback()
+def options(
+    ctx: typer.Context,
+    profile: Annotated[
+        Optional[Path],
+        typer.Option(
+            help="Profile the command and write query plans, node timings, a pstats dump and a report to this directory. Python calls in worker threads, e.g. the concurrent startup loaders, are not profiled reliably, their time only shows in the phase timings."
+        ),
+    ] = None,
+) -> None:
+    """Sackigami! Posting interesting NFL sack stat-lines."""
+    if profile is None:
+        return
+
+    start_profiling()
+    start: float = time.perf_counter()
+
+    def finish() -> None:
+        record_phase(f"command: {ctx.invoked_subcommand}", time.perf_counter() - start)
+        print(f"Profile written to {stop_profiling(profile)}")
+
+    ctx.call_on_close(finish)
+
+
+def schedule_post_week(context: WeekContext) -> None:
+    """Queues the game-by-game posts to be released under the posting budget."""
+    schedule_week(context.week, context.complete_team_stats, indexes=context.indexes)
+
+
+POST_TYPES: dict[str, Callable[[WeekContext], None]] = {
+    "digest": post_digest,
+    "gbg": post_week,
+    "gbg-scheduled": schedule_post_week,
+    "nosacks": post_no_sacks,
+}
+"""Post types runnable against a loaded game day by name."""
+
+
+def describe_next_run(schedule: pl.DataFrame) -> str:
+    """Describes when the next run will find new completed games.
+
+    Args:
+        schedule (pl.DataFrame): The schedule of the current season.
+
+    Returns:
+        str: The description.
+    """
+    next_run: Optional[datetime] = next_useful_run(schedule)
+    if next_run is None:
+        return "No games left this season."
+    return f"Next useful run at {next_run:%Y-%m-%d %H:%M %Z}."
+
+
+def new_games_final(schedule: Optional[pl.DataFrame] = None) -> bool:
+    """Checks the schedule for a completed gameday without a run yet.
+
+    Args:
+        schedule (Optional[pl.DataFrame], optional): Already loaded schedule of the current season. Loaded if None. Defaults to None.
+
+    Returns:
+        bool: True if there are new completed games.
+    """
+    if schedule is None:
+        print("Checking schedule ...")
+        schedule = load_schedule()
+    gameday: Optional[GameDay] = new_completed_gameday(schedule)
+
+    if gameday is None:
+        print(f"No new completed games. {describe_next_run(schedule)}")
+        return False
+
+    print(f"Week {gameday.week} of the {gameday.season} season is complete")
+    return True
+
+
+def start_run(with_partitions: bool, force: bool) -> list[WeekContext]:
+    """Checks for new games and loads everything a run needs concurrently.
+
+    The cached schedule is checked before anything else is loaded. As the
+    game data usually lags behind the schedule, the run also stops if the
+    loaded data has not advanced past the last run. Every game day after the
+    last run is pending, so game days missed e.g. while the runner was down
+    are caught up on in the same run.
+
+    Args:
+        with_partitions (bool): Also load the per team history from the data cache.
+        force (bool): Run even if the schedule has no new completed games. Runs the latest game day if none is pending.
+
+    Returns:
+        list[WeekContext]: The pending game days with the history up to each, in chronological order. Empty if there are no new games.
+    """
+    if not force and not new_games_final():
+        return []
+
+    startup: Startup = load_startup(with_partitions, with_schedule=False)
+    print(startup.report())
+
+    context: WeekContext = startup.context
+    gamedays: list[GameDay] = pending_gamedays(
+        context.complete_team_stats, load_last_run()
+    )
+    if not gamedays:
+        if not force:
+            print("The game data has not advanced past the last run yet")
+            return []
+        gamedays = [parse_last_gameday(context.complete_team_stats)]
+    if len(gamedays) > 1:
+        print(f"Catching up on {len(gamedays)} game days since the last run")
+    return catch_up(context, gamedays)
+
+
+def finish_run(contexts: list[WeekContext]) -> None:
+    """Moves the high-water mark to the latest game day of a run the data fully covers.
+
+    A game day with scheduled games still missing from the data stays
+    pending, so the next run evaluates it again once they arrived.
+
+    Args:
+        contexts (list[WeekContext]): The game days of the run in chronological order.
+    """
+    gamedays: list[GameDay] = [
+        parse_last_gameday(context.complete_team_stats) for context in contexts
+    ]
+    covered: Optional[GameDay] = last_covered_gameday(
+        contexts[-1].complete_team_stats, load_schedule(), gamedays
+    )
+    if covered != gamedays[-1]:
+        pending: GameDay = gamedays[
+            0 if covered is None else gamedays.index(covered) + 1
+        ]
+        print(
+            f"Week {pending.week} of the {pending.season} season is missing games, "
+            "it is evaluated again on the next run"
+        )
+
+    last_run: Optional[GameDay] = load_last_run()
+    if covered is not None and (
+        last_run is None
+        or (covered.season, covered.week) > (last_run.season, last_run.week)
+    ):
+        save_last_run(covered)
+
+
+ForceOption = Annotated[
+    bool, typer.Option(help="Run even if the schedule has no new completed games.")
+]
+"""Option to skip the schedule check."""
+
+
 # TODO: Option to post on X with disabling degbug mode
 @app.command()
-def gbg() -> None:
+def gbg(
+    schedule: Annotated[
+        bool,
+        typer.Option(
+            help="Rank and queue all posts of the week. Release them under the posting budget with the release command."
+        ),
+    ] = False,
+    force: ForceOption = False,
+) -> None:
     """Runs the game-by-game Sackigami!"""
+    contexts: list[WeekContext] = start_run(with_partitions=True, force=force)
+    if not contexts:
+        return
+
+    if schedule:
+        print("Scheduling games")
+        for context in contexts:
+            schedule_post_week(context)
+    else:
+        print("Looping over games")
+        post_weeks(contexts)
+
+    finish_run(contexts)
+
+
+@app.command()
+def release(
+    wait: Annotated[
+        bool,
+        typer.Option(
+            help="Keep running until the queue is empty instead of posting only what is due now."
+        ),
+    ] = False,
+) -> None:
+    """Releases the posts of the persisted queue that are due, e.g. from a cron job."""
+    path: Path = set_correct_path(
+        SCHEDULER_CONF.queue_path, SCHEDULER_CONF.queue_path_offline
+    )
+    print(f"{len(PostQueue.load(path))} posts queued")
+    run_queue(path, wait=wait)
+
+
+@app.command()
+def refresh() -> None:
+    """Evaluate only the games inserted or corrected since the last refresh."""
     print("Getting game data ...")
     complete_stats: pl.DataFrame = retrieve_complete_team_stats()
 
-    print("Parse latest week and filter for relevancy ...")
-    last_week: pl.DataFrame = retrieve_weekly_stats(complete_stats)
+    # The snapshot only moves on once the changes are posted, under the lock
+    # overlapping refreshes do not post the same changes
+    with file_lock(snapshot_path()):
+        print("Diffing against the last snapshot ...")
+        changes: ChangeSet = detect_changes(complete_stats)
+        print(
+            f"{changes.inserted.height} inserted, {changes.updated.height} updated, "
+            f"{changes.deleted.height} deleted"
+        )
+        if changes.is_empty():
+            return
 
-    print("Looping over games")
-    loop_over_week(last_week, complete_stats)
+        print("Updating per team history ...")
+        partitions: PartitionIndex = refresh_partition_index(complete_stats, changes)
+        dominance: DominanceIndex = refresh_dominance_index(complete_stats, changes)
+
+        post_changes(changes, complete_stats, partitions, dominance)
+        store_snapshot(complete_stats, dominance)
 
 
 @app.command()
 def nosacks() -> None:
     """Run and post teams that did not get sacked."""
+    startup: Startup = load_startup(with_partitions=False, with_schedule=False)
+    print(startup.report())
+    context: WeekContext = startup.context
+
+    print("Looping over games")
+    post_no_sacks(context)
+
+
+@app.command()
+def run(
+    post_types: Annotated[
+        list[str],
+        typer.Option(
+            "--type",
+            help=f"Post types to run in order. Any of: {", ".join(POST_TYPES)}.",
+        ),
+    ] = ["gbg", "nosacks"],
+    force: ForceOption = False,
+) -> None:
+    """Load the history once and run several post types against it."""
+    unknown: list[str] = [name for name in post_types if name not in POST_TYPES]
+    if unknown:
+        raise typer.BadParameter(f"Unknown post types: {", ".join(unknown)}")
+
+    contexts: list[WeekContext] = start_run(
+        with_partitions=any(name != "nosacks" for name in post_types), force=force
+    )
+    if not contexts:
+        return
+
+    for context in contexts:
+        for name in post_types:
+            print(f"Running {name} ...")
+            POST_TYPES[name](context)
+
+    finish_run(contexts)
+
+
+@app.command()
+def personas(
+    config: Annotated[
+        Path, typer.Option(help="TOML file with the persona configs.")
+    ] = BOT_CONF.personas_path,
+    force: ForceOption = False,
+) -> None:
+    """Post the latest game day for several accounts from one loaded history."""
+    loaded: list[Persona] = load_personas(config)
+
+    contexts: list[WeekContext] = start_run(with_partitions=True, force=force)
+    if not contexts:
+        return
+
+    print(f"Posting for {", ".join(persona.name for persona in loaded)} ...")
+    for context in contexts:
+        for name, count in post_personas(context, loaded).items():
+            print(f"{name}: {count} {"post" if count == 1 else "posts"}")
+
+    finish_run(contexts)
+
 
+@app.command(name="next-run")
+def next_run() -> None:
+    """Print when the next run will find new completed games."""
+    schedule: pl.DataFrame = load_schedule()
+
+    if new_completed_gameday(schedule) is not None:
+        print("New games are final, run now.")
+    else:
+        print(describe_next_run(schedule))
+
+
+@app.command()
+def live(
+    replay: Annotated[
+        Path, typer.Option(help="JSON Lines file of play-by-play events to replay.")
+    ],
+    speed: Annotated[
+        float, typer.Option(help="Replay speed relative to real time.")
+    ] = 100.0,
+) -> None:
+    """Track sacks from play-by-play and post games as soon as they are final."""
     print("Getting game data ...")
     complete_stats: pl.DataFrame = retrieve_complete_team_stats()
 
-    print("Parse latest week and filter for relevancy ...")
-    last_week: pl.DataFrame = retrieve_weekly_stats(complete_stats)
+    print("Updating per team history ...")
+    partitions: PartitionIndex = load_partition_index(complete_stats)
+    leaders: Leaderboards = load_leaderboards(complete_stats)
 
-    print("Looping over games")
-    loop_over_no_sacks(last_week, complete_stats)
+    print("Tracking live games ...")
+    track_live(FileReplayFeed(replay, speed), complete_stats, partitions, leaders)
+
+
+@app.command()
+def pbp(
+    output: Annotated[
+        Path, typer.Option(help="Parquet file to write the detailed sack stats to.")
+    ] = BOT_CONF.cache_dir
+    / "pbp_sack_stats.parquet",
+) -> None:
+    """Derive detailed sack stats per game from play-by-play data."""
+    print("Getting play-by-play data and aggregating sacks ...")
+    pbp_sack_stats: pl.DataFrame = retrieve_pbp_sack_stats()
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    pbp_sack_stats.write_parquet(output)
+    print(f"Wrote {pbp_sack_stats.height} team games to {output}")
+
+
+@app.command()
+def query(
+    input: Annotated[
+        Path,
+        typer.Option(help="CSV, Parquet or JSON Lines file with the stat lines."),
+    ],
+    output: Annotated[
+        Path, typer.Option(help="CSV, Parquet or JSON Lines file to write to.")
+    ],
+    render: Annotated[
+        bool, typer.Option(help="Also render the post of every stat line.")
+    ] = False,
+) -> None:
+    """Answer how often and when every stat line in a file happened."""
+    print("Getting game data ...")
+    complete_stats: pl.DataFrame = retrieve_complete_team_stats()
+
+    print("Answering stat lines ...")
+    results: pl.LazyFrame = answer_stat_lines(scan_stat_lines(input), complete_stats)
+    if render:
+        results = render_posts(results)
+    write_results(results, output)
+    print(f"Wrote results to {output}")
+
+
+@app.command()
+def leaders(
+    column: Annotated[
+        str, typer.Option(help=f"Sack stat column: {", ".join(LEADER_NAMES)}.")
+    ] = "sack_yards_lost",
+    season: Annotated[
+        Optional[int], typer.Option(help="Only games of this season.")
+    ] = None,
+    team: Annotated[
+        Optional[str], typer.Option(help="Only games of this team.")
+    ] = None,
+    size: Annotated[
+        int, typer.Option(help="Amount of games to show.")
+    ] = BOT_CONF.leaderboard_size,
+) -> None:
+    """Show the worst games of a sack stat, all-time, per season or per team."""
+    if column not in LEADER_NAMES:
+        raise typer.BadParameter(f"Unknown column {column}", param_hint="--column")
+    if season is not None and team is not None:
+        raise typer.BadParameter("Use either --season or --team")
+
+    print("Getting game data ...")
+    boards = Leaderboards(retrieve_complete_team_stats(), size)
+
+    scope, group = "all", None
+    if season is not None:
+        scope, group = "season", season
+    elif team is not None:
+        scope, group = "team", team
+
+    for rank, (value, game_season, week, game_team, opponent) in enumerate(
+        boards.leaders(column, scope, group), start=1
+    ):
+        print(
+            f"{rank}. {game_team} vs {opponent}, week {week} of {game_season}: {value}"
+        )
+
+
+def grid_option(name: str, description: str) -> Any:
+    """Option of the candidate values of a tuning parameter."""
+    return typer.Option(
+        f"--{name.replace("_", "-")}",
+        help=f"Candidate {description}, repeat for several. Defaults to {", ".join(map(str, TUNING_GRID[name]))}.",
+    )
+
+
+@app.command()
+def tune(
+    target: Annotated[
+        float, typer.Option(help="Targeted amount of posts per week.")
+    ] = 3.0,
+    since: Annotated[
+        Optional[int], typer.Option(help="First season to replay. All if not set.")
+    ] = None,
+    sacks: Annotated[
+        Optional[list[int]], grid_option("sacks_suffered", "sack thresholds")
+    ] = None,
+    yards: Annotated[
+        Optional[list[int]], grid_option("sack_yards_lost", "sack yards thresholds")
+    ] = None,
+    fumbles: Annotated[
+        Optional[list[int]], grid_option("sack_fumbles", "strip-sack thresholds")
+    ] = None,
+    fumbles_lost: Annotated[
+        Optional[list[int]],
+        grid_option("sack_fumbles_lost", "strip-sack turnover thresholds"),
+    ] = None,
+    count_cutoff: Annotated[
+        Optional[list[int]],
+        grid_option(
+            "count_cutoff", "amounts of similar stat lines still worth posting"
+        ),
+    ] = None,
+    years_cutoff: Annotated[
+        Optional[list[int]],
+        grid_option(
+            "years_cutoff", "years since the last similar stat line worth posting"
+        ),
+    ] = None,
+) -> None:
+    """Replay a grid of posting thresholds against the history and show the best ones."""
+    chosen: dict[str, Optional[list[int]]] = {
+        "sacks_suffered": sacks,
+        "sack_yards_lost": yards,
+        "sack_fumbles": fumbles,
+        "sack_fumbles_lost": fumbles_lost,
+        "count_cutoff": count_cutoff,
+        "years_cutoff": years_cutoff,
+    }
+    grid: dict[str, list[int]] = {
+        name: values or TUNING_GRID[name] for name, values in chosen.items()
+    }
+
+    print("Getting game data ...")
+    complete_stats: pl.DataFrame = retrieve_complete_team_stats()
+
+    candidates: pl.DataFrame = candidate_grid(grid)
+    print(f"Replaying {candidates.height} candidates ...")
+    results: pl.DataFrame = evaluate_grid(complete_stats, candidates, since)
+    current: pl.DataFrame = evaluate_grid(
+        complete_stats,
+        candidate_grid(
+            {name: [value] for name, value in current_configuration().items()}
+        ),
+        since,
+    )
+
+    with pl.Config(tbl_rows=-1, tbl_cols=-1, tbl_hide_dataframe_shape=True):
+        print("Current configuration:")
+        print(current.drop("candidate"))
+        print(f"Pareto-best configurations for {target} posts per week:")
+        print(pareto_front(results, target).drop("candidate"))
+
+
+@app.command()
+def site(
+    output: Annotated[
+        Path, typer.Option(help="Directory of the site.")
+    ] = BOT_CONF.site_dir,
+    workers: Annotated[
+        Optional[int],
+        typer.Option(help="Processes rendering the pages. One per core if not set."),
+    ] = None,
+) -> None:
+    """Generate the static stats site, rebuilding only pages whose data changed."""
+    print("Getting game data ...")
+    complete_stats: pl.DataFrame = retrieve_complete_team_stats()
+
+    print("Building site ...")
+    build: SiteBuild = build_site(
+        site_pages(complete_stats, load_game_from_json()), output, workers
+    )
+    print(
+        f"{build.written} pages written, {build.unchanged} unchanged, "
+        f"{build.removed} removed in {output}"
+    )
+
+
+@app.command(name="serve")
+def serve_command(
+    host: Annotated[str, typer.Option(help="Host to bind to.")] = "127.0.0.1",
+    port: Annotated[int, typer.Option(help="Port to bind to.")] = 8080,
+) -> None:
+    """Serve "how often has this happened" queries over local HTTP/JSON."""
+    print("Getting game data ...")
+    complete_stats: pl.DataFrame = retrieve_complete_team_stats()
+
+    print("Building indexes ...")
+    service = QueryService(complete_stats, load_partition_index(complete_stats))
+
+    serve(service, host, port)
+
+
+@app.command()
+def loadtest(
+    url: Annotated[
+        str, typer.Option(help="URL to request, including the query.")
+    ] = "http://127.0.0.1:8080/similar?sacks_suffered=7&sack_yards_lost=-45&sack_fumbles=3&sack_fumbles_lost=2",
+    clients: Annotated[int, typer.Option(help="Concurrent clients.")] = 8,
+    requests: Annotated[int, typer.Option(help="Requests per client.")] = 1000,
+) -> None:
+    """Load test a running query service and report latencies."""
+    print(load_test(url, clients, requests).report())
+
+
+RateLimitOption = Annotated[
+    int, typer.Option(help="Posts per window the X stand-in accepts.")
+]
+"""Option of the rate limit of the X stand-in."""
+
+WindowOption = Annotated[
+    float, typer.Option(help="Rate limit window of the X stand-in in seconds.")
+]
+"""Option of the rate limit window of the X stand-in."""
+
+LatencyOption = Annotated[
+    float, typer.Option(help="Maximum latency the X stand-in injects in ms.")
+]
+"""Option of the injected latency of the X stand-in."""
+
+
+@app.command()
+def mockx(
+    host: Annotated[str, typer.Option(help="Host to bind to.")] = "127.0.0.1",
+    port: Annotated[int, typer.Option(help="Port to bind to.")] = 8081,
+    rate_limit: RateLimitOption = 300,
+    window: WindowOption = 900.0,
+    latency: LatencyOption = 0.0,
+) -> None:
+    """Serve a local stand-in of the X API, use it with X_API_BASE_URL."""
+    with MockXServer((host, port), rate_limit, window, (0.0, latency / 1000)) as server:
+        print(f"Serving X stand-in on {server.base_url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+@app.command()
+def postload(
+    season: Annotated[int, typer.Option(help="Season to replay.")],
+    rate_limit: RateLimitOption = 300,
+    window: WindowOption = 15.0,
+    latency: LatencyOption = 50.0,
+) -> None:
+    """Replay a full season of posts through the posting code against a local X stand-in."""
+    print("Getting game data ...")
+    complete_stats: pl.DataFrame = retrieve_complete_team_stats()
+
+    print(f"Rendering posts of the {season} season ...")
+    posts: list[str] = render_season(complete_stats, season)
+
+    with MockXServer(
+        ("127.0.0.1", 0), rate_limit, window, (0.0, latency / 1000)
+    ) as server:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Posting {len(posts)} posts ...")
+        print(replay_posts(posts, server.base_url).report())
+        print(f"{server.rejected} requests rate limited")
+        server.shutdown()
 
 
 def main() -> None:
@@ -1,7 +1,8 @@
 import os
 from dataclasses import dataclass, field
+from datetime import time, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Literal, Optional, Self
 
 import polars as pl
 
@@ -35,6 +36,10 @@ class ColumnsOfInterest:
     """Fumbles lost or turnovers after a strip-sack."""
 
 
+X_API_URL: str = "https://api.twitter.com"
+"""Base URL of the X API."""
+
+
 @dataclass(frozen=True)
 class BotConfig:
     offline_test: bool = True
@@ -49,6 +54,92 @@ class BotConfig:
     post_timeout: int = 45
     """Base timeout between seperate X posts."""
 
+    post_length: int = 280
+    """Maximum amount of characters of a single X post."""
+
+    personas_path: Path = Path("personas.toml")
+    """Default path of the persona configs."""
+
+    api_base_url: str = field(
+        default_factory=lambda: os.getenv("X_API_BASE_URL", X_API_URL)
+    )
+    """Base URL of the X API, e.g. a local stand-in."""
+
+    cache_dir: Path = Path(".sackigami")
+    """Directory of the local data cache."""
+
+    site_dir: Path = Path("site")
+    """Directory of the generated stats site."""
+
+    index_cache_size: int = 8
+    """Maximum amount of fingerprint indexes kept in memory."""
+
+    leaderboard_size: int = 10
+    """Amount of games on every leaderboard."""
+
+    download_workers: int = 8
+    """Maximum amount of seasons downloaded concurrently."""
+
+    download_retries: int = 3
+    """Attempts to download a single season before giving up."""
+
+    schedule_max_age: timedelta = timedelta(hours=6)
+    """Age after which the cached schedule is downloaded again."""
+
+    game_duration: timedelta = timedelta(hours=4)
+    """Time after kickoff a game is expected to be final."""
+
+    simulation_samples: int = 200_000
+    """Amount of simulated team games of the expected frequency model."""
+
+    simulation_seed: int = 26
+    """Seed of the expected frequency simulation."""
+
+    expected_seasons: float = 20.0
+    """Expected seasons between games at least as bad above which a game is worth posting."""
+
+    similar_count_cutoff: int = 4
+    """Amount of similar stat lines up to which a game is worth posting."""
+
+    similar_years_cutoff: int = 15
+    """Years since the last similar stat line from which on a game is worth posting."""
+
+    surprise_window: int = 16
+    """Amount of prior games of a team the sack rates of the surprise model average over."""
+
+    surprise_min_games: int = 4
+    """Amount of prior games of a team needed to score its games with the surprise model."""
+
+    surprise_z_score: float = 2.5
+    """Surprise z-score above which a game is worth posting."""
+
+
+@dataclass(frozen=True)
+class SchedulerConfig:
+    posts_per_hour: int = 3
+    """Maximum amount of posts released per hour."""
+
+    posts_per_day: int = 12
+    """Maximum amount of posts released per day."""
+
+    window_start: time = time(10)
+    """Local time the posting window opens."""
+
+    window_end: time = time(23)
+    """Local time the posting window closes."""
+
+    overflow: Literal["spill", "drop"] = "spill"
+    """What happens to queued posts once the window closes or the daily budget is used up.
+
+    Either keep them for the next window ("spill") or discard them ("drop").
+    """
+
+    queue_path: Path = Path("post_queue.json")
+    """Default save path for the post queue."""
+
+    queue_path_offline: Path = Path("post_queue_offline.json")
+    """Default save path for the post queue for offline runs."""
+
 
 # repr=False is mandatory to not leak keys!!!
 @dataclass(frozen=True)
@@ -73,11 +164,30 @@ class APICred:
     )
     """Secret X API acccess token"""
 
+    @classmethod
+    def from_env(cls, prefix: str = "") -> Self:
+        """Reads the credentials from prefixed environment variables.
+
+        Args:
+            prefix (str, optional): Prefix of the variables, e.g. "DEEP_CUTS_" for DEEP_CUTS_API_KEY. Defaults to "".
+
+        Returns:
+            Self: The credentials.
+        """
+        return cls(
+            api_key=os.getenv(f"{prefix}API_KEY"),
+            api_secret=os.getenv(f"{prefix}API_SECRET"),
+            access_token=os.getenv(f"{prefix}ACCESS_TOKEN"),
+            access_secret=os.getenv(f"{prefix}ACCESS_SECRET"),
+        )
+
 
 COL: ColumnsOfInterest = ColumnsOfInterest()
 
 BOT_CONF: BotConfig = BotConfig()
 
+SCHEDULER_CONF: SchedulerConfig = SchedulerConfig()
+
 API_CRED: APICred = APICred()
 
 
@@ -93,6 +203,36 @@ DATA_OF_INTEREST: tuple[str, ...] = (
 )
 """Tuple containg data fields of interest."""
 
+SACK_STAT_COLUMNS: tuple[str, ...] = (
+    "sacks_suffered",
+    "sack_yards_lost",
+    "sack_fumbles",
+    "sack_fumbles_lost",
+)
+"""Tuple containing the sack stat fields a stat line is compared by."""
+
+PBP_DATA_OF_INTEREST: dict[str, pl.DataType] = {
+    "season": pl.Int32(),
+    "week": pl.Int32(),
+    "posteam": pl.String(),
+    "defteam": pl.String(),
+    "qtr": pl.Int32(),
+    "down": pl.Int32(),
+    "yardline_100": pl.Int32(),
+    "sack": pl.Int32(),
+    "safety": pl.Int32(),
+}
+"""Dict containing the play-by-play fields of interest and their data types."""
+
+NFLVERSE_URL: str = "https://github.com/nflverse/nflverse-data/releases/download/"
+"""Base URL of the nflverse data releases."""
+
+PBP_URL: str = NFLVERSE_URL + "pbp/play_by_play_{season}.parquet"
+"""URL of the nflverse play-by-play file of a season."""
+
+TEAM_STATS_PATH: str = "stats_team/stats_team_week_{season}.parquet"
+"""Path of the weekly team stats file of a season relative to the base URL."""
+
 TEAMS: dict[str, str] = {
     "ARI": "Arizona Cardinals",
     "ATL": "Atlanta Falcons",
@@ -129,6 +269,13 @@ TEAMS: dict[str, str] = {
 }
 """Dictionary of all NFL teams. Short as keys long as values."""
 
+HISTORIC_TEAMS: dict[str, tuple[str, str]] = {
+    "OAK": ("LV", "Oakland Raiders"),
+    "SD": ("LAC", "San Diego Chargers"),
+    "STL": ("LA", "St. Louis Rams"),
+}
+"""Team codes of relocated franchises. Short as keys, current short and long of the time as values."""
+
 
 STAT_THRESHOLDS: dict[str, int] = {
     "sacks_suffered": 6,
@@ -0,0 +1,208 @@
+from pathlib import Path
+from typing import Optional
+
+import sackigami.x as x
+from sackigami.bot import (
+    Evaluation,
+    WeekContext,
+    clear_offline_ledger,
+    evaluate_stat_line,
+    offline_test,
+    plural_s,
+    release_games,
+    reserve_games,
+    set_correct_path,
+)
+from sackigami.constants import BOT_CONF
+from sackigami.teams import GameDay, SackStatLine, parse_last_gameday
+
+
+def create_digest_entry(evaluation: Evaluation) -> str:
+    """Creates the compact line of a stat line in the digest.
+
+    Args:
+        evaluation (Evaluation): The evaluated stat line.
+
+    Returns:
+        str: The line.
+    """
+    line: SackStatLine = evaluation.sack_stat_line
+    entry: str = (
+        f"{line.team} vs {line.opponent_team}: {line.suffered} {plural_s("sack", line.suffered)}, "
+        f"{abs(line.yards_lost)} {plural_s("yard", line.yards_lost)}, "
+        f"{line.fumbles} strip-{plural_s("sack", line.fumbles)}, {line.fumbles_lost} lost."
+    )
+
+    if evaluation.similar is None:
+        return f"{entry} Sackigami!"
+
+    return (
+        f"{entry} {evaluation.similar.count}x before, last in week "
+        f"{evaluation.similar.last_gameday.week} of {evaluation.similar.last_gameday.season}."
+    )
+
+
+def create_no_sacks_entry(teams_no_sacks: list[str]) -> Optional[str]:
+    """Creates the digest line of teams that did not surrender a sack.
+
+    Args:
+        teams_no_sacks (list[str]): Teams that did not get sacked.
+
+    Returns:
+        Optional[str]: The line or None if every team got sacked.
+    """
+    if not teams_no_sacks:
+        return None
+    return f"No sacks allowed: {", ".join(teams_no_sacks)}."
+
+
+def pack_posts(
+    header: str, entries: list[str], limit: int = BOT_CONF.post_length
+) -> list[str]:
+    """Bin-packs entries into as few posts as possible.
+
+    Entries are placed first fit decreasing by length, which keeps the amount
+    of posts close to optimal. Within a post and across posts the entries
+    keep their original order as far as the packing allows. The header opens
+    the first post.
+
+    Args:
+        header (str): First line of the first post.
+        entries (list[str]): Lines to pack.
+        limit (int, optional): Maximum amount of characters per post. Defaults to BOT_CONF.post_length.
+
+    Raises:
+        ValueError: If the header or a single entry does not fit into a post.
+
+    Returns:
+        list[str]: The posts.
+    """
+    if len(header) > limit:
+        raise ValueError(f"Header longer than {limit} characters")
+
+    bins: list[list[int]] = [[]]
+    lengths: list[int] = [len(header)]
+
+    for index in sorted(range(len(entries)), key=lambda i: -len(entries[i])):
+        needed: int = len(entries[index]) + 1
+        if needed - 1 > limit:
+            raise ValueError(f"Entry longer than {limit} characters: {entries[index]}")
+
+        for number, length in enumerate(lengths):
+            if length + needed <= limit:
+                bins[number].append(index)
+                lengths[number] += needed
+                break
+        else:
+            bins.append([index])
+            lengths.append(needed - 1)
+
+    ordered: list[list[int]] = [bins[0]] + sorted(
+        (sorted(indices) for indices in bins[1:]), key=min
+    )
+    posts: list[str] = []
+    for number, indices in enumerate(ordered):
+        lines: list[str] = [entries[index] for index in sorted(indices)]
+        if number == 0:
+            lines.insert(0, header)
+        posts.append("\n".join(lines))
+
+    return posts
+
+
+def create_digest(
+    context: WeekContext, with_no_sacks: bool = True, reserve: Optional[Path] = None
+) -> tuple[list[str], list[Evaluation]]:
+    """Renders and packs all stat lines of a game day worth posting.
+
+    Args:
+        context (WeekContext): The game day and the loaded history.
+        with_no_sacks (bool, optional): Also list the teams that did not surrender a sack. Defaults to True.
+        reserve (Optional[Path], optional): Save file to reserve the games in before packing, see `reserve_games`. Games another run saved meanwhile are left out. Nothing is reserved if None. Defaults to None.
+
+    Returns:
+        tuple[list[str], list[Evaluation]]: The posts of the thread and the evaluations in them.
+    """
+    evaluations: list[Evaluation] = []
+    teams_no_sacks: list[str] = []
+
+    for stat_line in context.week_sack_data.iter_rows(named=True):
+        if stat_line["sacks_suffered"] == 0:
+            teams_no_sacks.append(stat_line["team"])
+
+        evaluation: Optional[Evaluation] = evaluate_stat_line(
+            SackStatLine.from_dict(stat_line), context.indexes
+        )
+        if evaluation is not None:
+            evaluations.append(evaluation)
+
+    if reserve is not None:
+        reserved: list[SackStatLine] = reserve_games(
+            [evaluation.sack_stat_line for evaluation in evaluations], reserve
+        )
+        evaluations = [
+            evaluation
+            for evaluation in evaluations
+            if evaluation.sack_stat_line in reserved
+        ]
+
+    # Sackigamis first
+    evaluations.sort(key=lambda evaluation: evaluation.similar is not None)
+    entries: list[str] = [create_digest_entry(evaluation) for evaluation in evaluations]
+
+    no_sacks: Optional[str] = create_no_sacks_entry(teams_no_sacks)
+    if with_no_sacks and no_sacks is not None:
+        entries.append(no_sacks)
+
+    if not entries:
+        return [], []
+
+    gameday: GameDay = parse_last_gameday(context.week)
+    header: str = (
+        f"Sackigami! digest for week {gameday.week} of the {gameday.season} season"
+    )
+
+    return pack_posts(header, entries), evaluations
+
+
+def post_digest(context: WeekContext) -> None:
+    """Posts all stat lines of a game day worth posting as a single thread.
+
+    The whole thread is posted in one burst without delays between the posts.
+    The games are reserved in the save file before posting. If the thread
+    fails partway, the games of the posts not made are removed again and
+    left to the next run.
+
+    Args:
+        context (WeekContext): The game day and the loaded history.
+    """
+    path: Path = set_correct_path(BOT_CONF.save_path, BOT_CONF.save_path_offline)
+    posts, evaluations = create_digest(context, reserve=path)
+    if not posts:
+        print("Nothing to post")
+        return
+
+    for text in posts:
+        print("--------------")
+        print(text)
+
+    if not offline_test():
+        ids: list[str] = []
+        try:
+            x.post_thread(posts, ids=ids)
+        except Exception:
+            posted: set[str] = {
+                line for text in posts[: len(ids)] for line in text.split("\n")
+            }
+            release_games(
+                [
+                    evaluation.sack_stat_line
+                    for evaluation in evaluations
+                    if create_digest_entry(evaluation) not in posted
+                ],
+                path,
+            )
+            raise
+
+    if offline_test():
+        clear_offline_ledger()
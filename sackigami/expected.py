@@ -0,0 +1,162 @@
+from dataclasses import dataclass
+from typing import Any
+
+import polars as pl
+
+from sackigami.constants import BOT_CONF, COL, SACK_STAT_COLUMNS
+from sackigami.teams import SackStatLine
+
+
+@dataclass
+class ExpectedFrequency:
+    seasons: float
+    """Expected seasons between two games at least as bad."""
+
+    lower_bound: bool
+    """Whether no simulated game was at least as bad, so seasons is only a lower bound."""
+
+
+class ExpectedFrequencyModel:
+    """Monte Carlo model of how often a game at least as bad as a stat line happens.
+
+    The model is fit to the history in one vectorized pass. Team games are
+    simulated by drawing the amount of sacks from the per game distribution
+    and the yards of every sack from the yards per sack distribution. Every
+    sack is a strip-sack and every strip-sack is lost with the historic
+    rates. The simulation runs once with a fixed seed, afterwards a query is
+    a vectorized comparison against all simulated games.
+    """
+
+    def __init__(
+        self,
+        complete_team_stats: pl.DataFrame,
+        samples: int = BOT_CONF.simulation_samples,
+        seed: int = BOT_CONF.simulation_seed,
+    ) -> None:
+        """Fits the model and simulates the games.
+
+        Args:
+            complete_team_stats (pl.DataFrame): Complete team stats.
+            samples (int, optional): Amount of simulated team games. Defaults to BOT_CONF.simulation_samples.
+            seed (int, optional): Seed of the simulation. Defaults to BOT_CONF.simulation_seed.
+        """
+        self.samples: int = samples
+        """Amount of simulated team games."""
+
+        self.games_per_season: float = (
+            complete_team_stats.height
+            / complete_team_stats.select(COL.season.n_unique()).item()
+        )
+        """Average amount of team games per season."""
+
+        totals: dict[str, Any] = complete_team_stats.select(
+            COL.sacks_suffered.sum(),
+            COL.sack_fumbles.sum(),
+            COL.sack_fumbles_lost.sum(),
+        ).row(0, named=True)
+
+        sacked: pl.DataFrame = complete_team_stats.filter(COL.sacks_suffered > 0)
+        # One value per historic sack, the average of its game
+        yards_per_sack: pl.Series = (
+            sacked.select(
+                (COL.sack_yards_lost.abs() / COL.sacks_suffered).repeat_by(
+                    COL.sacks_suffered
+                )
+            )
+            .to_series()
+            .explode()
+        )
+
+        sacks: pl.Series = complete_team_stats.get_column("sacks_suffered").sample(
+            samples, with_replacement=True, seed=seed
+        )
+        total: int = int(sacks.sum())
+
+        # Bernoulli draws as samples of indicator series with the historic rate
+        fumbled: pl.Series = self._indicators(
+            totals["sack_fumbles"], totals["sacks_suffered"]
+        ).sample(total, with_replacement=True, seed=seed + 1)
+        lost: pl.Series = self._indicators(
+            totals["sack_fumbles_lost"], totals["sack_fumbles"]
+        ).sample(total, with_replacement=True, seed=seed + 2)
+        yards: pl.Series = yards_per_sack.sample(
+            total, with_replacement=True, seed=seed + 3
+        )
+
+        # Sacks of game i are the slice [ends[i] - sacks[i], ends[i]) of the draws
+        ends: pl.Series = sacks.cum_sum()
+        starts: pl.Series = ends - sacks
+
+        def per_game(draws: pl.Series) -> pl.Series:
+            cumulative: pl.Series = pl.concat(
+                [pl.Series([0], dtype=draws.dtype), draws.cum_sum()]
+            )
+            return cumulative.gather(ends) - cumulative.gather(starts)
+
+        self._simulated: pl.DataFrame = pl.DataFrame(
+            {
+                "sacks_suffered": sacks,
+                "sack_yards_lost": per_game(yards.cast(pl.Float64)).round(0),
+                "sack_fumbles": per_game(fumbled),
+                "sack_fumbles_lost": per_game(fumbled * lost),
+            }
+        )
+
+    @staticmethod
+    def _indicators(hits: int, total: int) -> pl.Series:
+        """Series of ones and zeros drawing a one with probability hits / total."""
+        if total == 0:
+            return pl.Series([0], dtype=pl.Int64)
+        return pl.Series([1] * hits + [0] * (total - hits), dtype=pl.Int64)
+
+    def _at_least_as_bad(self, stat_line: dict[str, Any]) -> pl.Expr:
+        return pl.all_horizontal(
+            pl.col(column) >= abs(stat_line[column]) for column in SACK_STAT_COLUMNS
+        )
+
+    def expected_frequency(
+        self, sack_stat_line: SackStatLine | dict[str, Any]
+    ) -> ExpectedFrequency:
+        """Expected seasons between two games at least as bad as a stat line.
+
+        Args:
+            sack_stat_line (SackStatLine | dict[str, Any]): The stat line. A dict has to contain the sack stat columns.
+
+        Returns:
+            ExpectedFrequency: The expected frequency.
+        """
+        stat_line: dict[str, Any] = (
+            sack_stat_line
+            if isinstance(sack_stat_line, dict)
+            else sack_stat_line.as_dict()
+        )
+        hits: int = self._simulated.select(
+            self._at_least_as_bad(stat_line).sum()
+        ).item()
+
+        return ExpectedFrequency(
+            seasons=self.samples / (max(hits, 1) * self.games_per_season),
+            lower_bound=hits == 0,
+        )
+
+    def expected_frequencies(self, stat_lines: pl.DataFrame) -> list[ExpectedFrequency]:
+        """Expected frequencies of several stat lines, computed in a single pass.
+
+        Args:
+            stat_lines (pl.DataFrame): The stat lines with the sack stat columns.
+
+        Returns:
+            list[ExpectedFrequency]: The expected frequencies in order of the stat lines.
+        """
+        hits: tuple[int, ...] = self._simulated.select(
+            self._at_least_as_bad(stat_line).sum().alias(str(number))
+            for number, stat_line in enumerate(stat_lines.iter_rows(named=True))
+        ).row(0)
+
+        return [
+            ExpectedFrequency(
+                seasons=self.samples / (max(count, 1) * self.games_per_season),
+                lower_bound=count == 0,
+            )
+            for count in hits
+        ]
@@ -0,0 +1,231 @@
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+import nflreadpy as nfl
+import polars as pl
+
+from sackigami.constants import BOT_CONF, COL
+from sackigami.locking import atomic_write
+from sackigami.teams import GameDay
+
+KICKOFF_TIMEZONE: ZoneInfo = ZoneInfo("America/New_York")
+"""Timezone of the kickoff times in the schedule."""
+
+
+def load_schedule(
+    path: Path = BOT_CONF.cache_dir / "schedule.parquet",
+    season: Optional[int] = None,
+) -> pl.DataFrame:
+    """Loads the schedule of a season, downloading it only if the cache is stale.
+
+    Args:
+        path (Path, optional): Path of the cached schedule. Defaults to BOT_CONF.cache_dir / "schedule.parquet".
+        season (Optional[int], optional): The season. The current season if None. Defaults to None.
+
+    Returns:
+        pl.DataFrame: One row per game with kickoff and scores.
+    """
+    if season is None:
+        season = nfl.get_current_season()
+
+    if path.exists():
+        age: float = time.time() - path.stat().st_mtime
+        schedule: pl.DataFrame = pl.read_parquet(path)
+        if (
+            age < BOT_CONF.schedule_max_age.total_seconds()
+            and schedule.select((COL.season == season).all()).item()
+        ):
+            return schedule
+
+    schedule = nfl.load_schedules(seasons=season).select(
+        "season", "week", "gameday", "gametime", "home_score", "away_score"
+    )
+    path.parent.mkdir(parents=True, exist_ok=True)
+    schedule.write_parquet(path)
+    return schedule
+
+
+def gameday_status(schedule: pl.DataFrame) -> pl.DataFrame:
+    """Aggregates the schedule per gameday.
+
+    Args:
+        schedule (pl.DataFrame): The schedule.
+
+    Returns:
+        pl.DataFrame: Whether every game of a gameday is final, its amount of games and when its last game kicks off, in order.
+    """
+    return (
+        schedule.group_by("season", "week")
+        .agg(
+            pl.col("home_score").is_not_null().all().alias("complete"),
+            pl.len().alias("games"),
+            (pl.col("gameday") + " " + pl.col("gametime"))
+            .str.to_datetime("%Y-%m-%d %H:%M")
+            .max()
+            .alias("last_kickoff"),
+        )
+        .sort("season", "week")
+    )
+
+
+def last_completed_gameday(schedule: pl.DataFrame) -> Optional[GameDay]:
+    """Latest gameday all games of which are final.
+
+    Args:
+        schedule (pl.DataFrame): The schedule.
+
+    Returns:
+        Optional[GameDay]: The gameday or None if no gameday is complete yet.
+    """
+    completed: pl.DataFrame = gameday_status(schedule).filter(pl.col("complete"))
+    if completed.is_empty():
+        return None
+    return GameDay(*completed.select("season", "week").row(-1))
+
+
+def next_useful_run(schedule: pl.DataFrame) -> Optional[datetime]:
+    """Time the next incomplete gameday is expected to be final.
+
+    Args:
+        schedule (pl.DataFrame): The schedule.
+
+    Returns:
+        Optional[datetime]: Kickoff of the last game of the gameday plus the game duration. None if the season is over.
+    """
+    pending: pl.DataFrame = gameday_status(schedule).filter(~pl.col("complete"))
+    if pending.is_empty():
+        return None
+
+    last_kickoff: datetime = pending.select("last_kickoff").row(0)[0]
+    return last_kickoff.replace(tzinfo=KICKOFF_TIMEZONE) + BOT_CONF.game_duration
+
+
+def load_last_run(
+    path: Path = BOT_CONF.cache_dir / "last_run.json",
+) -> Optional[GameDay]:
+    """Loads the last gameday a run was made for.
+
+    Args:
+        path (Path, optional): Path of the state file. Defaults to BOT_CONF.cache_dir / "last_run.json".
+
+    Returns:
+        Optional[GameDay]: The gameday or None if there was no run yet.
+    """
+    if not path.exists():
+        return None
+    return GameDay(**json.loads(path.read_text()))
+
+
+def save_last_run(
+    gameday: GameDay, path: Path = BOT_CONF.cache_dir / "last_run.json"
+) -> None:
+    """Stores the gameday a run was made for.
+
+    Args:
+        gameday (GameDay): The gameday.
+        path (Path, optional): Path of the state file. Defaults to BOT_CONF.cache_dir / "last_run.json".
+    """
+    atomic_write(
+        path, json.dumps({"season": gameday.season, "week": gameday.week}, indent=4)
+    )
+
+
+def pending_gamedays(
+    complete_team_stats: pl.DataFrame,
+    last_run: Optional[GameDay],
+) -> list[GameDay]:
+    """Game days in the data after the high-water mark of the last run.
+
+    Args:
+        complete_team_stats (pl.DataFrame): Complete team stats.
+        last_run (Optional[GameDay]): Last gameday a run was made for. Only the latest gameday is pending if None.
+
+    Returns:
+        list[GameDay]: The pending game days in chronological order.
+    """
+    gamedays: pl.DataFrame = (
+        complete_team_stats.select(COL.season, COL.week)
+        .unique()
+        .sort(COL.season, COL.week)
+    )
+    if last_run is None:
+        return [GameDay(*gamedays.row(-1))] if gamedays.height else []
+
+    pending: pl.DataFrame = gamedays.filter(
+        (COL.season > last_run.season)
+        | ((COL.season == last_run.season) & (COL.week > last_run.week))
+    )
+    return [GameDay(*row) for row in pending.rows()]
+
+
+def last_covered_gameday(
+    complete_team_stats: pl.DataFrame, schedule: pl.DataFrame, gamedays: list[GameDay]
+) -> Optional[GameDay]:
+    """Latest of a run's game days up to which the game data holds every game.
+
+    A game day is covered once the schedule has all its games final and the
+    team stats hold both teams of every game. Game days missing from the
+    schedule, e.g. of an earlier season, are taken as covered. Stats of a
+    late game often arrive after the schedule marks it final, so a run must
+    not move its high-water mark past a game day that is not covered yet.
+
+    Args:
+        complete_team_stats (pl.DataFrame): Complete team stats.
+        schedule (pl.DataFrame): The schedule.
+        gamedays (list[GameDay]): The game days of the run in chronological order.
+
+    Returns:
+        Optional[GameDay]: The game day or None if the first one is not covered yet.
+    """
+    status: dict[tuple[int, int], tuple[bool, int]] = {
+        (season, week): (complete, games)
+        for season, week, complete, games in gameday_status(schedule)
+        .select("season", "week", "complete", "games")
+        .iter_rows()
+    }
+    team_games: dict[tuple[int, int], int] = {
+        (season, week): count
+        for season, week, count in complete_team_stats.group_by(COL.season, COL.week)
+        .len()
+        .iter_rows()
+    }
+
+    covered: Optional[GameDay] = None
+    for gameday in gamedays:
+        key: tuple[int, int] = (gameday.season, gameday.week)
+        if key in status:
+            complete, games = status[key]
+            if not complete or team_games.get(key, 0) < 2 * games:
+                break
+        covered = gameday
+    return covered
+
+
+def new_completed_gameday(
+    schedule: pl.DataFrame, path: Path = BOT_CONF.cache_dir / "last_run.json"
+) -> Optional[GameDay]:
+    """The latest completed gameday if no run has been made for it yet.
+
+    Args:
+        schedule (pl.DataFrame): The schedule.
+        path (Path, optional): Path of the state file. Defaults to BOT_CONF.cache_dir / "last_run.json".
+
+    Returns:
+        Optional[GameDay]: The gameday or None if there is nothing new.
+    """
+    completed: Optional[GameDay] = last_completed_gameday(schedule)
+    if completed is None:
+        return None
+
+    last_run: Optional[GameDay] = load_last_run(path)
+    if last_run is not None and (last_run.season, last_run.week) >= (
+        completed.season,
+        completed.week,
+    ):
+        return None
+
+    return completed
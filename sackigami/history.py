@@ -0,0 +1,1063 @@
+import json
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from itertools import product
+from pathlib import Path
+from typing import Any, Iterator, Optional, Self
+
+import polars as pl
+
+from sackigami.constants import BOT_CONF, COL, SACK_STAT_COLUMNS
+from sackigami.expected import ExpectedFrequencyModel
+from sackigami.leaders import Leaderboards
+from sackigami.locking import atomic_write, atomic_write_parquet, file_lock
+from sackigami.profiling import collect
+from sackigami.surprise import (
+    Surprise,
+    SurpriseModel,
+    extend_surprise_model,
+    surprise_index,
+)
+from sackigami.teams import GameDay, SackStatLine, SimilarStatLines, parse_last_gameday
+
+_NO_ROW: int = -1
+"""Placeholder row index for empty cells."""
+
+
+@dataclass
+class DominatingStatLines:
+    last_gameday: GameDay
+    """Gameday a stat line at least as bad occured the last time."""
+
+    count: int
+    """How often a stat line at least as bad occured."""
+
+
+SNAPSHOT_COLUMNS: tuple[str, ...] = (
+    "season",
+    "week",
+    "team",
+    "opponent_team",
+    *SACK_STAT_COLUMNS,
+)
+"""Columns identifying a game and its sack stats, compared between refreshes."""
+
+
+def snapshot_version(team_stats: pl.DataFrame) -> tuple[int, int]:
+    """Dataset version of the snapshot columns of team stats.
+
+    Args:
+        team_stats (pl.DataFrame): Team stats or a snapshot of them.
+
+    Returns:
+        tuple[int, int]: The version as returned by `dataset_version`.
+    """
+    return dataset_version(team_stats.select(SNAPSHOT_COLUMNS))
+
+
+def _merge_recent(first: tuple[int, int], second: tuple[int, int]) -> tuple[int, int]:
+    """Merges two pairs of most recent row indices into the two most recent ones.
+
+    Args:
+        first (tuple[int, int]): Most and second most recent row index.
+        second (tuple[int, int]): Most and second most recent row index. May share rows with first.
+
+    Returns:
+        tuple[int, int]: The two most recent distinct row indices of both pairs.
+    """
+    newest, second_newest, *_ = sorted({*first, *second}, reverse=True) + [
+        _NO_ROW,
+        _NO_ROW,
+    ]
+    return newest, second_newest
+
+
+class DominanceIndex:
+    """Precomputed dominance counts over the sack stat columns.
+
+    A game dominates a stat line if it is at least as bad in every sack stat,
+    i.e. at least as many sacks suffered, yards lost, strip-sacks and fumbles
+    lost. The index stores a dense grid over the distinct (absolute) values of
+    every sack stat. Each cell holds the amount of games dominating it and the
+    row indices of the two most recent ones, so a query only needs a binary
+    search per column.
+
+    The complete team stats are expected in chronological order, which is the
+    same assumption `parse_last_gameday` makes.
+    """
+
+    def __init__(self, complete_team_stats: pl.DataFrame) -> None:
+        """Builds the index.
+
+        Args:
+            complete_team_stats (pl.DataFrame): Complete team stats.
+        """
+        self._build(complete_team_stats)
+
+    def _build(self, complete_team_stats: pl.DataFrame) -> None:
+        """Builds the grid from scratch.
+
+        Args:
+            complete_team_stats (pl.DataFrame): Complete team stats.
+        """
+        badness: pl.DataFrame = complete_team_stats.select(
+            pl.col(column).abs() for column in SACK_STAT_COLUMNS
+        )
+        self._set_axes(
+            [
+                badness.get_column(column).unique().sort().to_list()
+                for column in SACK_STAT_COLUMNS
+            ]
+        )
+
+        size: int = self._strides[0] * self._shape[0] if self._axes else 0
+        self._counts: list[int] = [0 for _ in range(size)]
+        self._recent: list[tuple[int, int]] = [(_NO_ROW, _NO_ROW) for _ in range(size)]
+
+        self._set_rows(complete_team_stats)
+
+        for row, values in enumerate(self._badness):
+            cell: int = self._cell(values)
+            self._counts[cell] += 1
+            self._recent[cell] = _merge_recent(self._recent[cell], (row, _NO_ROW))
+
+        # Suffix sums along every axis turn the per cell counts into counts of
+        # all games with at least the cell's values.
+        for axis, stride in enumerate(self._strides):
+            for cell in reversed(range(size)):
+                if (cell // stride) % self._shape[axis] + 1 < self._shape[axis]:
+                    self._counts[cell] += self._counts[cell + stride]
+                    self._recent[cell] = _merge_recent(
+                        self._recent[cell], self._recent[cell + stride]
+                    )
+
+    def _set_axes(self, axes: list[list[int]]) -> None:
+        """Sets the distinct values of every sack stat and the grid layout.
+
+        Args:
+            axes (list[list[int]]): Sorted distinct absolute values per sack stat.
+        """
+        self._axes: list[list[int]] = axes
+        self._shape: list[int] = [len(axis) for axis in self._axes]
+        self._strides: list[int] = [1 for _ in self._axes]
+        for axis in reversed(range(len(self._axes) - 1)):
+            self._strides[axis] = self._strides[axis + 1] * self._shape[axis + 1]
+
+    def _set_rows(self, complete_team_stats: pl.DataFrame) -> None:
+        """Takes the per game data of the queries from the team stats.
+
+        Args:
+            complete_team_stats (pl.DataFrame): Complete team stats.
+        """
+        self._badness: list[tuple[int, ...]] = complete_team_stats.select(
+            pl.col(column).abs() for column in SACK_STAT_COLUMNS
+        ).rows()
+        self._gamedays: list[tuple[int, int]] = complete_team_stats.select(
+            COL.season, COL.week
+        ).rows()
+        self._rows: dict[tuple[int, int, str], int] = {
+            key: row
+            for row, key in enumerate(
+                complete_team_stats.select(COL.season, COL.week, COL.team).rows()
+            )
+        }
+        self.version: tuple[int, int] = snapshot_version(complete_team_stats)
+        """Snapshot version of the team stats the index covers."""
+
+    def _in_axes(self, values: tuple[int, ...]) -> bool:
+        """Checks whether all values are part of the axes.
+
+        Args:
+            values (tuple[int, ...]): Absolute sack stats.
+
+        Returns:
+            bool: True if the values have a cell.
+        """
+        for axis, value in zip(self._axes, values):
+            coordinate: int = bisect_left(axis, value)
+            if coordinate == len(axis) or axis[coordinate] != value:
+                return False
+        return True
+
+    def _lower_set(self, values: tuple[int, ...]) -> Iterator[int]:
+        """Yields every cell a game with the given values dominates.
+
+        Args:
+            values (tuple[int, ...]): Absolute sack stats which are all part of the axes.
+
+        Yields:
+            int: Flat index of the cell.
+        """
+        coordinates: list[int] = [
+            bisect_left(axis, value) for axis, value in zip(self._axes, values)
+        ]
+        for point in product(*(range(coordinate + 1) for coordinate in coordinates)):
+            yield sum(
+                position * stride for position, stride in zip(point, self._strides)
+            )
+
+    def refresh(
+        self,
+        removed: pl.DataFrame,
+        added: pl.DataFrame,
+        complete_team_stats: pl.DataFrame,
+    ) -> None:
+        """Updates only the cells touched by changed games.
+
+        The counts of every cell a changed game dominates, with its old as well
+        as its new stats, are adjusted by one and the most recent games of
+        these cells are merged again from their neighbours. Falls back to a
+        full build if games moved within the history, e.g. because games were
+        deleted, or a stat value is new to the grid.
+
+        Args:
+            removed (pl.DataFrame): Old versions of updated and deleted games.
+            added (pl.DataFrame): New versions of updated and inserted games.
+            complete_team_stats (pl.DataFrame): Complete team stats after the changes.
+        """
+
+        def badness(team_stats: pl.DataFrame) -> list[tuple[int, ...]]:
+            return team_stats.select(
+                pl.col(column).abs() for column in SACK_STAT_COLUMNS
+            ).rows()
+
+        removed_values: list[tuple[int, ...]] = badness(removed)
+        added_values: list[tuple[int, ...]] = badness(added)
+        previous_keys: list[tuple[int, int, str]] = list(self._rows)
+        keys: list[tuple[Any, ...]] = complete_team_stats.select(
+            COL.season, COL.week, COL.team
+        ).rows()
+
+        if keys[: len(previous_keys)] != previous_keys or not all(
+            self._in_axes(values) for values in removed_values + added_values
+        ):
+            self._build(complete_team_stats)
+            return
+
+        self._set_rows(complete_team_stats)
+
+        touched: set[int] = set()
+        for values, delta in [(values, -1) for values in removed_values] + [
+            (values, 1) for values in added_values
+        ]:
+            for cell in self._lower_set(values):
+                self._counts[cell] += delta
+                touched.add(cell)
+
+        exact: dict[int, tuple[int, int]] = {}
+        for row, values in enumerate(self._badness):
+            cell: int = self._cell(values)
+            if cell in touched:
+                exact[cell] = _merge_recent(
+                    exact.get(cell, (_NO_ROW, _NO_ROW)), (row, _NO_ROW)
+                )
+
+        # Neighbours have higher flat indices, so they are up to date first
+        for cell in sorted(touched, reverse=True):
+            recent: tuple[int, int] = exact.get(cell, (_NO_ROW, _NO_ROW))
+            for axis, stride in enumerate(self._strides):
+                if (cell // stride) % self._shape[axis] + 1 < self._shape[axis]:
+                    recent = _merge_recent(recent, self._recent[cell + stride])
+            self._recent[cell] = recent
+
+    def save(self, directory: Path) -> None:
+        """Persists the index as parquet files.
+
+        The metadata is removed first and written last, so an interrupted save
+        leaves no index behind instead of one mixing old and new files.
+
+        Args:
+            directory (Path): Directory of the data cache.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / "dominance.json").unlink(missing_ok=True)
+
+        atomic_write_parquet(
+            pl.DataFrame(
+                {
+                    "count": self._counts,
+                    "newest": [recent[0] for recent in self._recent],
+                    "second_newest": [recent[1] for recent in self._recent],
+                },
+                schema={
+                    "count": pl.Int64,
+                    "newest": pl.Int64,
+                    "second_newest": pl.Int64,
+                },
+            ),
+            directory / "dominance_cells.parquet",
+        )
+        atomic_write_parquet(
+            pl.DataFrame(
+                [(*key, *values) for key, values in zip(self._rows, self._badness)],
+                schema=["season", "week", "team", *SACK_STAT_COLUMNS],
+                orient="row",
+            ),
+            directory / "dominance_rows.parquet",
+        )
+        atomic_write(
+            directory / "dominance.json",
+            json.dumps({"axes": self._axes, "version": self.version}, indent=4),
+        )
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional[Self]:
+        """Loads a persisted index.
+
+        Args:
+            directory (Path): Directory of the data cache.
+
+        Returns:
+            Optional[Self]: The index or None if nothing has been persisted.
+        """
+        meta_path: Path = directory / "dominance.json"
+        cells_path: Path = directory / "dominance_cells.parquet"
+        rows_path: Path = directory / "dominance_rows.parquet"
+        if not (meta_path.exists() and cells_path.exists() and rows_path.exists()):
+            return None
+
+        meta: dict[str, Any] = json.loads(meta_path.read_text())
+        index: Self = cls.__new__(cls)
+        index._set_axes(meta["axes"])
+
+        cells: pl.DataFrame = pl.read_parquet(cells_path)
+        index._counts = cells.get_column("count").to_list()
+        index._recent = list(
+            zip(cells.get_column("newest"), cells.get_column("second_newest"))
+        )
+
+        rows: pl.DataFrame = pl.read_parquet(rows_path)
+        index._badness = rows.select(SACK_STAT_COLUMNS).rows()
+        index._gamedays = rows.select(COL.season, COL.week).rows()
+        index._rows = {
+            key: row
+            for row, key in enumerate(
+                rows.select(COL.season, COL.week, COL.team).rows()
+            )
+        }
+        index.version = tuple(meta["version"])
+        return index
+
+    def _cell(self, values: tuple[int, ...]) -> int:
+        """Returns the grid cell of values which are all part of the axes.
+
+        Args:
+            values (tuple[int, ...]): Absolute sack stats.
+
+        Returns:
+            int: Flat index of the cell.
+        """
+        return sum(
+            bisect_left(axis, value) * stride
+            for axis, value, stride in zip(self._axes, values, self._strides)
+        )
+
+    def _query_cell(self, values: tuple[int, ...]) -> Optional[int]:
+        """Returns the grid cell holding all games with at least the given values.
+
+        Args:
+            values (tuple[int, ...]): Absolute sack stats, not necessarily part of the axes.
+
+        Returns:
+            Optional[int]: Flat index of the cell or None if no game has at least these values.
+        """
+        cell: int = 0
+        for axis, value, stride in zip(self._axes, values, self._strides):
+            coordinate: int = bisect_left(axis, value)
+            if coordinate == len(axis):
+                return None
+            cell += coordinate * stride
+        return cell
+
+    def count_at_least(self, values: tuple[int, ...]) -> int:
+        """Counts all games with at least the given absolute sack stats.
+
+        Args:
+            values (tuple[int, ...]): Absolute sack stats in the order of SACK_STAT_COLUMNS.
+
+        Returns:
+            int: Amount of games.
+        """
+        cell: Optional[int] = self._query_cell(values)
+        return 0 if cell is None else self._counts[cell]
+
+    def find_dominating_stat_lines(
+        self, sack_stat_line: SackStatLine
+    ) -> Optional[DominatingStatLines]:
+        """Finds the amount of and the last time a game at least this bad occured.
+
+        The stat line itself is not counted if it is part of the history.
+
+        Args:
+            sack_stat_line (SackStatLine): The stat line to look for.
+
+        Returns:
+            Optional[DominatingStatLines]: The dominating stat lines or None if none found.
+        """
+        query: tuple[int, ...] = (
+            abs(sack_stat_line.suffered),
+            abs(sack_stat_line.yards_lost),
+            abs(sack_stat_line.fumbles),
+            abs(sack_stat_line.fumbles_lost),
+        )
+
+        cell: Optional[int] = self._query_cell(query)
+        if cell is None:
+            return None
+
+        count: int = self._counts[cell]
+        recent: list[int] = [row for row in self._recent[cell] if row != _NO_ROW]
+
+        own: Optional[int] = self._rows.get(
+            (
+                sack_stat_line.gameday.season,
+                sack_stat_line.gameday.week,
+                sack_stat_line.team,
+            )
+        )
+        if own is not None and all(
+            own_value >= value for own_value, value in zip(self._badness[own], query)
+        ):
+            count -= 1
+            recent = [row for row in recent if row != own]
+
+        if count == 0 or not recent:
+            return None
+
+        last_season, last_week = self._gamedays[max(recent)]
+        return DominatingStatLines(GameDay(last_season, last_week), count)
+
+
+@dataclass
+class PartitionedStatLines:
+    team: Optional[SimilarStatLines]
+    """Similar stat lines of the same team. None if never."""
+
+    matchup: Optional[SimilarStatLines]
+    """Similar stat lines of the same team against the same opponent. None if never."""
+
+
+@dataclass
+class _Occurrences:
+    count: int
+    """How often the stat line occured in the partition."""
+
+    last: tuple[int, int]
+    """Season and week of the last occurence."""
+
+    previous: Optional[tuple[int, int]]
+    """Season and week of the second to last occurence. None if only one."""
+
+
+_PARTITION_KEYS: dict[str, tuple[str, ...]] = {
+    "team": ("team", *SACK_STAT_COLUMNS),
+    "matchup": ("team", "opponent_team", *SACK_STAT_COLUMNS),
+}
+"""Key columns of every partition."""
+
+
+class PartitionIndex:
+    """Stat line fingerprint counts partitioned by team and by matchup.
+
+    Every partition maps a team (and opponent) together with the sack stats to
+    the amount of occurences and the two most recent gamedays, so a lookup is
+    a single dict access. New weeks can be appended without rebuilding.
+    """
+
+    def __init__(self, complete_team_stats: Optional[pl.DataFrame] = None) -> None:
+        """Builds the index.
+
+        Args:
+            complete_team_stats (Optional[pl.DataFrame], optional): Complete team stats. Creates an empty index if None. Defaults to None.
+        """
+        self._partitions: dict[str, dict[tuple[Any, ...], _Occurrences]] = {
+            name: {} for name in _PARTITION_KEYS
+        }
+        self.last_gameday: Optional[GameDay] = None
+        """Last gameday covered by the index."""
+
+        if complete_team_stats is not None:
+            self.append(complete_team_stats)
+
+    def append(self, team_stats: pl.DataFrame) -> None:
+        """Adds new games to the index.
+
+        The games have to be in chronological order and newer than any game
+        already in the index.
+
+        Args:
+            team_stats (pl.DataFrame): Team stats of the new games.
+        """
+        if team_stats.is_empty():
+            return
+
+        for name in _PARTITION_KEYS:
+            self._append_partition(name, team_stats)
+
+        self.last_gameday = parse_last_gameday(team_stats)
+
+    def _append_partition(self, name: str, team_stats: pl.DataFrame) -> None:
+        """Adds games in chronological order to a single partition.
+
+        Args:
+            name (str): Name of the partition.
+            team_stats (pl.DataFrame): Team stats of the games.
+        """
+        keys: tuple[str, ...] = _PARTITION_KEYS[name]
+        partition: dict[tuple[Any, ...], _Occurrences] = self._partitions[name]
+        grouped: pl.DataFrame = collect(
+            team_stats.lazy()
+            .group_by(keys, maintain_order=True)
+            .agg(
+                pl.len().alias("count"),
+                COL.season.tail(2).alias("seasons"),
+                COL.week.tail(2).alias("weeks"),
+            ),
+            f"partition_{name}",
+        )
+        for row in grouped.iter_rows(named=True):
+            key: tuple[Any, ...] = tuple(row[column] for column in keys)
+            gamedays: list[tuple[int, int]] = list(zip(row["seasons"], row["weeks"]))
+            existing: Optional[_Occurrences] = partition.get(key)
+
+            if existing is None:
+                previous = gamedays[-2] if len(gamedays) == 2 else None
+                partition[key] = _Occurrences(row["count"], gamedays[-1], previous)
+            else:
+                previous = gamedays[-2] if len(gamedays) == 2 else existing.last
+                partition[key] = _Occurrences(
+                    existing.count + row["count"], gamedays[-1], previous
+                )
+
+    def refresh(
+        self, affected: pl.DataFrame, complete_team_stats: pl.DataFrame
+    ) -> None:
+        """Recounts only the entries touched by changed games.
+
+        Every key of a changed game, with its old as well as its new stats, is
+        dropped and counted again from the complete team stats. This handles
+        corrections of old games, which `append` cannot.
+
+        Args:
+            affected (pl.DataFrame): Old and new versions of all inserted, updated and deleted games.
+            complete_team_stats (pl.DataFrame): Complete team stats after the changes.
+        """
+        if affected.is_empty():
+            return
+
+        for name, keys in _PARTITION_KEYS.items():
+            affected_keys: pl.DataFrame = affected.select(keys).unique()
+            for key in affected_keys.iter_rows():
+                self._partitions[name].pop(key, None)
+
+            self._append_partition(
+                name,
+                complete_team_stats.join(
+                    affected_keys, on=keys, how="semi", maintain_order="left"
+                ),
+            )
+
+        self.last_gameday = parse_last_gameday(complete_team_stats)
+
+    def _find(
+        self, name: str, key: tuple[Any, ...], gameday: GameDay
+    ) -> Optional[SimilarStatLines]:
+        """Looks up a key in a partition, ignoring an occurence on the given gameday.
+
+        Args:
+            name (str): Name of the partition.
+            key (tuple[Any, ...]): Key of the stat line in the partition.
+            gameday (GameDay): Gameday of the stat line itself.
+
+        Returns:
+            Optional[SimilarStatLines]: The similar stat lines or None if none found.
+        """
+        occurrences: Optional[_Occurrences] = self._partitions[name].get(key)
+        if occurrences is None:
+            return None
+
+        count: int = occurrences.count
+        last: Optional[tuple[int, int]] = occurrences.last
+        if last == (gameday.season, gameday.week):
+            count -= 1
+            last = occurrences.previous
+
+        if count == 0 or last is None:
+            return None
+
+        return SimilarStatLines(GameDay(*last), count)
+
+    def find_partitioned_stat_lines(
+        self, sack_stat_line: SackStatLine
+    ) -> PartitionedStatLines:
+        """Finds how often and when the same team last had the same stat line.
+
+        The stat line itself is not counted if it is part of the history.
+
+        Args:
+            sack_stat_line (SackStatLine): The stat line to look for.
+
+        Returns:
+            PartitionedStatLines: Similar stat lines of the team and the matchup.
+        """
+        stats: tuple[int, ...] = (
+            sack_stat_line.suffered,
+            sack_stat_line.yards_lost,
+            sack_stat_line.fumbles,
+            sack_stat_line.fumbles_lost,
+        )
+        gameday: GameDay = sack_stat_line.gameday
+
+        return PartitionedStatLines(
+            team=self._find("team", (sack_stat_line.team, *stats), gameday),
+            matchup=self._find(
+                "matchup",
+                (sack_stat_line.team, sack_stat_line.opponent_team, *stats),
+                gameday,
+            ),
+        )
+
+    def save(self, directory: Path) -> None:
+        """Persists the index as parquet files.
+
+        Every file is replaced atomically. The metadata is removed first and
+        written last, so an interrupted save leaves no index behind instead
+        of one mixing old and new files.
+
+        Args:
+            directory (Path): Directory of the data cache.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / "partitions.json").unlink(missing_ok=True)
+
+        for name, keys in _PARTITION_KEYS.items():
+            rows: list[dict[str, Any]] = [
+                {
+                    **dict(zip(keys, key)),
+                    "count": occurrences.count,
+                    "last_season": occurrences.last[0],
+                    "last_week": occurrences.last[1],
+                    "previous_season": (
+                        None
+                        if occurrences.previous is None
+                        else occurrences.previous[0]
+                    ),
+                    "previous_week": (
+                        None
+                        if occurrences.previous is None
+                        else occurrences.previous[1]
+                    ),
+                }
+                for key, occurrences in self._partitions[name].items()
+            ]
+            atomic_write_parquet(
+                pl.DataFrame(rows), directory / f"partitions_{name}.parquet"
+            )
+
+        meta: dict[str, Optional[dict[str, int]]] = {
+            "last_gameday": (
+                None if self.last_gameday is None else asdict(self.last_gameday)
+            )
+        }
+        atomic_write(directory / "partitions.json", json.dumps(meta, indent=4))
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional[Self]:
+        """Loads a persisted index.
+
+        Args:
+            directory (Path): Directory of the data cache.
+
+        Returns:
+            Optional[Self]: The index or None if nothing has been persisted.
+        """
+        meta_path: Path = directory / "partitions.json"
+        if not meta_path.exists():
+            return None
+
+        index = cls()
+        last_gameday: Optional[dict[str, int]] = json.loads(meta_path.read_text())[
+            "last_gameday"
+        ]
+        index.last_gameday = None if last_gameday is None else GameDay(**last_gameday)
+
+        for name, keys in _PARTITION_KEYS.items():
+            path: Path = directory / f"partitions_{name}.parquet"
+            if not path.exists():
+                return None
+
+            for row in pl.read_parquet(path).iter_rows(named=True):
+                previous: Optional[tuple[int, int]] = (
+                    None
+                    if row["previous_season"] is None
+                    else (row["previous_season"], row["previous_week"])
+                )
+                index._partitions[name][tuple(row[column] for column in keys)] = (
+                    _Occurrences(
+                        row["count"], (row["last_season"], row["last_week"]), previous
+                    )
+                )
+
+        return index
+
+
+def load_partition_index(
+    complete_team_stats: pl.DataFrame, directory: Path = BOT_CONF.cache_dir
+) -> PartitionIndex:
+    """Loads the persisted partition index and brings it up to date.
+
+    Only games from the last gameday covered by the persisted index on are
+    counted again. That gameday may have been only partly in the data when
+    the index was saved, so its keys are recounted instead of appended.
+    Without a persisted index it is built from scratch. The updated index is
+    persisted again.
+
+    Args:
+        complete_team_stats (pl.DataFrame): Complete team stats.
+        directory (Path, optional): Directory of the data cache. Defaults to BOT_CONF.cache_dir.
+
+    Returns:
+        PartitionIndex: The up to date index.
+    """
+    # Loading, updating and saving under the lock keeps overlapping runs
+    # from appending the same games twice
+    with file_lock(directory / "partitions.json"):
+        index: Optional[PartitionIndex] = PartitionIndex.load(directory)
+
+        if index is None or index.last_gameday is None:
+            index = PartitionIndex(complete_team_stats)
+        else:
+            index.refresh(
+                complete_team_stats.filter(
+                    (COL.season > index.last_gameday.season)
+                    | (
+                        (COL.season == index.last_gameday.season)
+                        & (COL.week >= index.last_gameday.week)
+                    )
+                ),
+                complete_team_stats,
+            )
+
+        index.save(directory)
+    return index
+
+
+def dataset_version(complete_team_stats: pl.DataFrame) -> tuple[int, int]:
+    """Cheap identifier of the content of the team stats.
+
+    Args:
+        complete_team_stats (pl.DataFrame): Complete team stats.
+
+    Returns:
+        tuple[int, int]: Amount of rows and the wrapping sum of all row hashes.
+    """
+    return (
+        complete_team_stats.height,
+        int(complete_team_stats.hash_rows(seed=0).sum()),
+    )
+
+
+class FingerprintIndex:
+    """Stat line fingerprint counts over a configurable set of columns.
+
+    Every fingerprint, i.e. the values of the columns, maps to its amount of
+    occurences and the row indices of the two most recent ones, so finding
+    similar stat lines is a single dict access instead of a filter over the
+    complete history. New games can be appended without rebuilding.
+    """
+
+    def __init__(
+        self,
+        complete_team_stats: pl.DataFrame,
+        columns: tuple[str, ...] = SACK_STAT_COLUMNS,
+    ) -> None:
+        """Builds the index.
+
+        Args:
+            complete_team_stats (pl.DataFrame): Complete team stats.
+            columns (tuple[str, ...], optional): Columns of the fingerprint. Defaults to SACK_STAT_COLUMNS.
+        """
+        self.columns: tuple[str, ...] = columns
+        """Columns of the fingerprint."""
+
+        self._fingerprints: dict[tuple[Any, ...], tuple[int, list[int]]] = {}
+        self._values: list[tuple[Any, ...]] = []
+        self._gamedays: list[tuple[int, int]] = []
+        self._rows: dict[tuple[int, int, str], int] = {}
+
+        self.append(complete_team_stats)
+
+    def append(self, team_stats: pl.DataFrame) -> None:
+        """Adds new games to the index.
+
+        The games have to be in chronological order and newer than any game
+        already in the index.
+
+        Args:
+            team_stats (pl.DataFrame): Team stats of the new games.
+        """
+        offset: int = len(self._values)
+        grouped: pl.DataFrame = collect(
+            team_stats.lazy()
+            .with_row_index("row", offset=offset)
+            .group_by(self.columns, maintain_order=True)
+            .agg(pl.len().alias("count"), pl.col("row").tail(2).alias("recent")),
+            "fingerprints",
+        )
+        for row in grouped.iter_rows():
+            fingerprint: tuple[Any, ...] = tuple(row[: len(self.columns)])
+            count, recent = row[-2], row[-1]
+            existing: Optional[tuple[int, list[int]]] = self._fingerprints.get(
+                fingerprint
+            )
+            if existing is not None:
+                count += existing[0]
+                recent = (existing[1] + recent)[-2:]
+            self._fingerprints[fingerprint] = (count, recent)
+
+        self._values.extend(team_stats.select(self.columns).rows())
+        self._gamedays.extend(team_stats.select(COL.season, COL.week).rows())
+        self._rows.update(
+            (key, row)
+            for row, key in enumerate(
+                team_stats.select(COL.season, COL.week, COL.team).rows(), start=offset
+            )
+        )
+
+    def find_similar_stat_lines(
+        self, sack_stat_line: SackStatLine | dict[str, Any]
+    ) -> Optional[SimilarStatLines]:
+        """Finds the amount of and the last time a completely similar stat line occured.
+
+        Same result as `sackigami.teams.find_similar_stat_lines` with the
+        columns of the index.
+
+        Args:
+            sack_stat_line (SackStatLine | dict[str, Any]): The stat line to look for. A dict has to contain the columns as well as season, week and team.
+
+        Returns:
+            Optional[SimilarStatLines]: The similar stat line or None of none found.
+        """
+        stat_line: dict[str, Any] = (
+            sack_stat_line
+            if isinstance(sack_stat_line, dict)
+            else sack_stat_line.as_dict()
+        )
+        fingerprint: tuple[Any, ...] = tuple(
+            stat_line[column] for column in self.columns
+        )
+
+        found: Optional[tuple[int, list[int]]] = self._fingerprints.get(fingerprint)
+        if found is None:
+            return None
+        count, recent = found
+
+        own: Optional[int] = self._rows.get(
+            (stat_line["season"], stat_line["week"], stat_line["team"])
+        )
+        if own is not None and self._values[own] == fingerprint:
+            count -= 1
+            recent = [row for row in recent if row != own]
+
+        if count == 0 or not recent:
+            return None
+
+        last_season, last_week = self._gamedays[max(recent)]
+        return SimilarStatLines(GameDay(last_season, last_week), count)
+
+
+class FingerprintCache:
+    """Least recently used cache of fingerprint indexes.
+
+    Indexes are keyed by their columns and the dataset version, so several
+    post types can share the indexes of one loaded history. Indexes are built
+    lazily on first use.
+    """
+
+    def __init__(self, max_size: int = BOT_CONF.index_cache_size) -> None:
+        """Creates an empty cache.
+
+        Args:
+            max_size (int, optional): Maximum amount of cached indexes. Defaults to BOT_CONF.index_cache_size.
+        """
+        self.max_size: int = max_size
+        self._indexes: OrderedDict[
+            tuple[tuple[str, ...], tuple[int, int]], FingerprintIndex
+        ] = OrderedDict()
+
+    def get(
+        self,
+        complete_team_stats: pl.DataFrame,
+        columns: tuple[str, ...] = SACK_STAT_COLUMNS,
+    ) -> FingerprintIndex:
+        """Returns the cached index, building and caching it if necessary.
+
+        Args:
+            complete_team_stats (pl.DataFrame): Complete team stats.
+            columns (tuple[str, ...], optional): Columns of the fingerprint. Defaults to SACK_STAT_COLUMNS.
+
+        Returns:
+            FingerprintIndex: The index.
+        """
+        key = (columns, dataset_version(complete_team_stats))
+
+        index: Optional[FingerprintIndex] = self._indexes.get(key)
+        if index is None:
+            index = FingerprintIndex(complete_team_stats, columns)
+            self._indexes[key] = index
+            while len(self._indexes) > self.max_size:
+                self._indexes.popitem(last=False)
+        else:
+            self._indexes.move_to_end(key)
+
+        return index
+
+    def advance(
+        self,
+        index: FingerprintIndex,
+        team_stats: pl.DataFrame,
+        complete_team_stats: pl.DataFrame,
+    ) -> None:
+        """Appends new games to an index and caches it under the version of the longer history.
+
+        Args:
+            index (FingerprintIndex): The index, cached or not.
+            team_stats (pl.DataFrame): Team stats of the new games.
+            complete_team_stats (pl.DataFrame): Complete team stats including the new games.
+        """
+        # Taken out first, the old version must not hit the changed index
+        for key, cached in list(self._indexes.items()):
+            if cached is index:
+                del self._indexes[key]
+
+        index.append(team_stats)
+        self._indexes[(index.columns, dataset_version(complete_team_stats))] = index
+        while len(self._indexes) > self.max_size:
+            self._indexes.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._indexes)
+
+
+FINGERPRINT_CACHE: FingerprintCache = FingerprintCache()
+"""Process wide fingerprint index cache."""
+
+_EXPECTED_MODELS: OrderedDict[tuple[int, int], ExpectedFrequencyModel] = OrderedDict()
+"""Expected frequency models by dataset version, least recently used first."""
+
+
+def expected_frequency_model(
+    complete_team_stats: pl.DataFrame,
+) -> ExpectedFrequencyModel:
+    """Returns the expected frequency model of a history, simulating it only once per dataset version.
+
+    Args:
+        complete_team_stats (pl.DataFrame): Complete team stats.
+
+    Returns:
+        ExpectedFrequencyModel: The model.
+    """
+    key: tuple[int, int] = dataset_version(complete_team_stats)
+
+    model: Optional[ExpectedFrequencyModel] = _EXPECTED_MODELS.get(key)
+    if model is None:
+        model = ExpectedFrequencyModel(complete_team_stats)
+        _EXPECTED_MODELS[key] = model
+        while len(_EXPECTED_MODELS) > BOT_CONF.index_cache_size:
+            _EXPECTED_MODELS.popitem(last=False)
+    else:
+        _EXPECTED_MODELS.move_to_end(key)
+
+    return model
+
+
+@dataclass
+class HistoryIndexes:
+    """All precomputed indexes of one loaded history."""
+
+    fingerprints: FingerprintIndex
+    """Exact stat line matches."""
+
+    dominance: DominanceIndex
+    """Stat lines at least as bad."""
+
+    partitions: PartitionIndex
+    """Per team and matchup history."""
+
+    expected: Optional[ExpectedFrequencyModel] = None
+    """Expected frequency of games at least as bad. Not used if None."""
+
+    leaders: Optional[Leaderboards] = None
+    """Top games of every sack stat. Not used if None."""
+
+    surprises: dict[tuple[int, int, str], Surprise] = field(default_factory=dict)
+    """Surprise of the games of the latest game day by season, week and team."""
+
+    surprise_model: Optional[SurpriseModel] = None
+    """Model of all games before the latest game day the surprises are scored with."""
+
+    @classmethod
+    def from_df(
+        cls,
+        complete_team_stats: pl.DataFrame,
+        partitions: Optional[PartitionIndex] = None,
+        dominance: Optional[DominanceIndex] = None,
+        leaders: Optional[Leaderboards] = None,
+        surprise_model: Optional[SurpriseModel] = None,
+    ) -> Self:
+        """Builds all indexes of a history.
+
+        Args:
+            complete_team_stats (pl.DataFrame): Complete team stats.
+            partitions (Optional[PartitionIndex], optional): Already loaded per team and matchup history. Built from complete_team_stats if None. Defaults to None.
+            dominance (Optional[DominanceIndex], optional): Already refreshed dominance index. Built from complete_team_stats if None. Defaults to None.
+            leaders (Optional[Leaderboards], optional): Already loaded leaderboards. Built from complete_team_stats if None. Defaults to None.
+            surprise_model (Optional[SurpriseModel], optional): Already loaded model of all games before the latest game day. Built from complete_team_stats if None. Defaults to None.
+
+        Returns:
+            Self: The indexes.
+        """
+        model: SurpriseModel = (
+            SurpriseModel() if surprise_model is None else surprise_model
+        )
+        extend_surprise_model(model, complete_team_stats)
+
+        return cls(
+            fingerprints=FINGERPRINT_CACHE.get(complete_team_stats),
+            dominance=(
+                DominanceIndex(complete_team_stats) if dominance is None else dominance
+            ),
+            partitions=(
+                PartitionIndex(complete_team_stats)
+                if partitions is None
+                else partitions
+            ),
+            expected=expected_frequency_model(complete_team_stats),
+            leaders=Leaderboards(complete_team_stats) if leaders is None else leaders,
+            surprises=surprise_index(complete_team_stats, model),
+            surprise_model=model,
+        )
+
+    def append(
+        self, team_stats: pl.DataFrame, complete_team_stats: pl.DataFrame
+    ) -> None:
+        """Advances the indexes by new games, e.g. the next game day of a catch-up.
+
+        The expected frequency model stays fit to the earlier history, a few
+        more weeks barely move the distributions of decades of games.
+
+        Args:
+            team_stats (pl.DataFrame): Team stats of the new games, newer than any game in the indexes.
+            complete_team_stats (pl.DataFrame): Complete team stats including the new games.
+        """
+        FINGERPRINT_CACHE.advance(self.fingerprints, team_stats, complete_team_stats)
+        self.dominance.refresh(team_stats.clear(), team_stats, complete_team_stats)
+        self.partitions.append(team_stats)
+        if self.leaders is not None:
+            self.leaders.append(team_stats)
+
+        if self.surprise_model is None:
+            self.surprise_model = SurpriseModel()
+        extend_surprise_model(self.surprise_model, complete_team_stats)
+        self.surprises = surprise_index(complete_team_stats, self.surprise_model)
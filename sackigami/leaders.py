@@ -0,0 +1,333 @@
+import heapq
+import json
+from bisect import bisect_right
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable, Optional, Self
+
+import polars as pl
+
+from sackigami.constants import BOT_CONF, COL, HISTORIC_TEAMS, SACK_STAT_COLUMNS
+from sackigami.locking import atomic_write, atomic_write_parquet, file_lock
+from sackigami.teams import GameDay, SackStatLine, franchise, parse_last_gameday
+
+LEADER_NAMES: dict[str, str] = {
+    "sacks_suffered": "sacks suffered",
+    "sack_yards_lost": "sack yards lost",
+    "sack_fumbles": "strip-sacks",
+    "sack_fumbles_lost": "strip-sack turnovers",
+}
+"""Names of the sack stat columns in posts."""
+
+Entry = tuple[int, int, int, str, str]
+"""Leaderboard entry of value, season, week, team and opponent."""
+
+BoardKey = tuple[str, str, Any]
+"""Leaderboard key of scope ("all", "season" or "team"), column and season or team."""
+
+SCOPES: dict[str, Callable[[Entry], Any]] = {
+    "season": lambda entry: entry[1],
+    "team": lambda entry: franchise(entry[3]),
+}
+"""Group of an entry per scope. Teams are grouped by franchise."""
+
+
+@dataclass
+class LeaderRank:
+    column: str
+    """Sack stat column of the leaderboard."""
+
+    rank: int
+    """Rank of the stat line, ties share a rank."""
+
+    first_season: int
+    """First season of the leaderboard."""
+
+
+def ordinal(number: int) -> str:
+    """English ordinal of a number, e.g. 1st, 2nd, 11th.
+
+    Args:
+        number (int): The number.
+
+    Returns:
+        str: The ordinal.
+    """
+    suffix: str = "th"
+    if not 10 <= number % 100 <= 20:
+        suffix = {1: "st", 2: "nd", 3: "rd"}.get(number % 10, "th")
+    return f"{number}{suffix}"
+
+
+class Leaderboards:
+    """All-time, per season and per franchise top-K games for every sack stat.
+
+    The boards are built with a partial sort over the history and kept as
+    bounded min-heaps, so appending a game costs O(log K) per board. Ranks
+    are looked up by binary search in a sorted copy of a board that is only
+    rebuilt after the board changed.
+    """
+
+    def __init__(
+        self,
+        complete_team_stats: pl.DataFrame,
+        k: int = BOT_CONF.leaderboard_size,
+    ) -> None:
+        """Builds the boards.
+
+        Args:
+            complete_team_stats (pl.DataFrame): Complete team stats.
+            k (int, optional): Size of every board. Defaults to BOT_CONF.leaderboard_size.
+        """
+        self.k: int = k
+        self.first_season: int = complete_team_stats.select(COL.season.min()).item()
+        """First season of the boards."""
+
+        self.last_gameday: GameDay = parse_last_gameday(complete_team_stats)
+        """Latest game day in the boards."""
+
+        self._boards: dict[BoardKey, list[Entry]] = {}
+        self._sorted: dict[BoardKey, list[int]] = {}
+
+        franchises: pl.Expr = COL.team.replace(
+            {code: current for code, (current, _) in HISTORIC_TEAMS.items()}
+        )
+        for column in SACK_STAT_COLUMNS:
+            values: pl.DataFrame = complete_team_stats.select(
+                pl.col(column).abs().alias("value"),
+                COL.season,
+                COL.week,
+                COL.team,
+                COL.opponent_team,
+            )
+            self._boards[("all", column, None)] = values.top_k(k, by="value").rows()
+            for scope, group in (("season", COL.season), ("team", franchises)):
+                top: pl.DataFrame = values.filter(
+                    pl.col("value").rank("ordinal", descending=True).over(group) <= k
+                )
+                for entry in top.iter_rows():
+                    self._boards.setdefault(
+                        (scope, column, SCOPES[scope](entry)), []
+                    ).append(entry)
+
+        for board in self._boards.values():
+            heapq.heapify(board)
+
+    def append(self, team_stats: pl.DataFrame) -> None:
+        """Adds new games to the boards.
+
+        Games already on a board are skipped, so appending the same game twice
+        does not change the boards. A game not on a board was either never
+        added or fell below its minimum, which only grows.
+
+        Args:
+            team_stats (pl.DataFrame): Team stats of the new games.
+        """
+        if team_stats.is_empty():
+            return
+
+        for game in team_stats.iter_rows(named=True):
+            for column in SACK_STAT_COLUMNS:
+                entry: Entry = (
+                    abs(game[column]),
+                    game["season"],
+                    game["week"],
+                    game["team"],
+                    game["opponent_team"],
+                )
+                for key in [("all", column, None)] + [
+                    (scope, column, group(entry)) for scope, group in SCOPES.items()
+                ]:
+                    board: list[Entry] = self._boards.setdefault(key, [])
+                    if entry in board:
+                        continue
+                    if len(board) < self.k:
+                        heapq.heappush(board, entry)
+                    elif entry > board[0]:
+                        heapq.heapreplace(board, entry)
+                    else:
+                        continue
+                    self._sorted.pop(key, None)
+
+        self.last_gameday = max(
+            self.last_gameday,
+            parse_last_gameday(team_stats),
+            key=lambda gameday: (gameday.season, gameday.week),
+        )
+
+    def save(self, directory: Path) -> None:
+        """Persists the boards.
+
+        Both files are replaced atomically. The metadata is removed first and
+        written last, so an interrupted save leaves no boards behind.
+
+        Args:
+            directory (Path): Directory of the data cache.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / "leaderboards.json").unlink(missing_ok=True)
+
+        # The group of a board follows from its entries, see SCOPES
+        atomic_write_parquet(
+            pl.DataFrame(
+                [
+                    (scope, column, *entry)
+                    for (scope, column, _), board in self._boards.items()
+                    for entry in board
+                ],
+                schema=["scope", "column", "value", "season", "week"]
+                + ["team", "opponent_team"],
+                orient="row",
+            ),
+            directory / "leaderboards.parquet",
+        )
+
+        meta: dict[str, Any] = {
+            "k": self.k,
+            "first_season": self.first_season,
+            "last_gameday": asdict(self.last_gameday),
+        }
+        atomic_write(directory / "leaderboards.json", json.dumps(meta, indent=4))
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional[Self]:
+        """Loads persisted boards.
+
+        Args:
+            directory (Path): Directory of the data cache.
+
+        Returns:
+            Optional[Self]: The boards or None if nothing has been persisted.
+        """
+        meta_path: Path = directory / "leaderboards.json"
+        path: Path = directory / "leaderboards.parquet"
+        if not meta_path.exists() or not path.exists():
+            return None
+
+        meta: dict[str, Any] = json.loads(meta_path.read_text())
+        boards: Self = cls.__new__(cls)
+        boards.k = meta["k"]
+        boards.first_season = meta["first_season"]
+        boards.last_gameday = GameDay(**meta["last_gameday"])
+        boards._boards = {}
+        boards._sorted = {}
+
+        for scope, column, *values in pl.read_parquet(path).iter_rows():
+            entry: Entry = (values[0], values[1], values[2], values[3], values[4])
+            group: Any = SCOPES[scope](entry) if scope in SCOPES else None
+            boards._boards.setdefault((scope, column, group), []).append(entry)
+
+        for board in boards._boards.values():
+            heapq.heapify(board)
+
+        return boards
+
+    def leaders(
+        self, column: str, scope: str = "all", group: Any = None
+    ) -> list[Entry]:
+        """Entries of a board, best first.
+
+        Args:
+            column (str): Sack stat column.
+            scope (str, optional): "all", "season" or "team". Defaults to "all".
+            group (Any, optional): The season or team for the respective scope. Historic team codes are mapped to their franchise. Defaults to None.
+
+        Returns:
+            list[Entry]: The entries.
+        """
+        if scope == "team":
+            group = franchise(group)
+        return sorted(self._boards.get((scope, column, group), []), reverse=True)
+
+    def rank(
+        self, column: str, value: int, scope: str = "all", group: Any = None
+    ) -> Optional[int]:
+        """Rank a value would have on a board, not counting games with the same value.
+
+        Args:
+            column (str): Sack stat column.
+            value (int): The value.
+            scope (str, optional): "all", "season" or "team". Defaults to "all".
+            group (Any, optional): The season or team for the respective scope. Historic team codes are mapped to their franchise. Defaults to None.
+
+        Returns:
+            Optional[int]: The rank or None if the value does not make the board.
+        """
+        if scope == "team":
+            group = franchise(group)
+        key: BoardKey = (scope, column, group)
+        values: Optional[list[int]] = self._sorted.get(key)
+        if values is None:
+            values = sorted(entry[0] for entry in self._boards.get(key, []))
+            self._sorted[key] = values
+
+        better: int = len(values) - bisect_right(values, abs(value))
+        if better >= self.k:
+            return None
+        if len(values) == self.k and abs(value) < values[0]:
+            return None
+        return better + 1
+
+    def best_rank(self, sack_stat_line: SackStatLine) -> Optional[LeaderRank]:
+        """Best all-time rank of a stat line over all sack stats.
+
+        Args:
+            sack_stat_line (SackStatLine): The stat line.
+
+        Returns:
+            Optional[LeaderRank]: The best rank or None if the stat line makes no board.
+        """
+        stat_line: dict[str, int | str] = sack_stat_line.as_dict()
+        best: Optional[LeaderRank] = None
+
+        for column in SACK_STAT_COLUMNS:
+            if stat_line[column] == 0:
+                continue
+            rank: Optional[int] = self.rank(column, int(stat_line[column]))
+            if rank is not None and (best is None or rank < best.rank):
+                best = LeaderRank(column, rank, self.first_season)
+
+        return best
+
+
+def load_leaderboards(
+    complete_team_stats: pl.DataFrame,
+    directory: Path = BOT_CONF.cache_dir,
+    k: int = BOT_CONF.leaderboard_size,
+) -> Leaderboards:
+    """Loads the persisted boards and brings them up to date.
+
+    Only games from the last gameday covered by the persisted boards on are
+    appended. That gameday may have been only partly in the data when the
+    boards were saved, so it is appended again, skipping the games already on
+    the boards. Without persisted boards of the same size they are built from
+    scratch. The updated boards are persisted again.
+
+    Args:
+        complete_team_stats (pl.DataFrame): Complete team stats.
+        directory (Path, optional): Directory of the data cache. Defaults to BOT_CONF.cache_dir.
+        k (int, optional): Size of every board. Defaults to BOT_CONF.leaderboard_size.
+
+    Returns:
+        Leaderboards: The up to date boards.
+    """
+    # Loading, updating and saving under the lock keeps overlapping runs
+    # from appending the same games twice
+    with file_lock(directory / "leaderboards.json"):
+        boards: Optional[Leaderboards] = Leaderboards.load(directory)
+
+        if boards is None or boards.k != k:
+            boards = Leaderboards(complete_team_stats, k)
+        else:
+            boards.append(
+                complete_team_stats.filter(
+                    (COL.season > boards.last_gameday.season)
+                    | (
+                        (COL.season == boards.last_gameday.season)
+                        & (COL.week >= boards.last_gameday.week)
+                    )
+                )
+            )
+
+        boards.save(directory)
+    return boards
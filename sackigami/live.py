@@ -0,0 +1,270 @@
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterator, Optional, Protocol, Self
+
+import polars as pl
+
+from sackigami.bot import clear_offline_ledger, offline_test, process_stat_line
+from sackigami.constants import BOT_CONF
+from sackigami.history import HistoryIndexes, PartitionIndex
+from sackigami.leaders import Leaderboards
+from sackigami.teams import GameDay, SackStatLine
+
+END_OF_GAME: str = "END GAME"
+"""Play description nflverse uses for the final play-by-play row of a game."""
+
+
+@dataclass
+class PlayEvent:
+    """A single play-by-play event with the fields relevant for sacks.
+
+    The field names follow the nflverse play-by-play data dictionary.
+    """
+
+    game_id: str
+    """Unique id of the game."""
+
+    season: int
+    """Season of the game."""
+
+    week: int
+    """Week of the game."""
+
+    home_team: str
+    """Home team of the game."""
+
+    away_team: str
+    """Away team of the game."""
+
+    posteam: Optional[str] = None
+    """Team in possession, i.e. the team suffering a sack."""
+
+    sack: bool = False
+    """Whether the play was a sack."""
+
+    yards_gained: int = 0
+    """Yards gained on the play, negative for sacks."""
+
+    fumble: bool = False
+    """Whether the play had a fumble."""
+
+    fumble_lost: bool = False
+    """Whether the fumble was lost."""
+
+    game_final: bool = False
+    """Whether the game is over after this event."""
+
+    timestamp: Optional[float] = None
+    """Seconds since epoch the event happened, used to pace replays."""
+
+    @classmethod
+    def from_dict(cls, event: dict[str, Any]) -> Self:
+        """Create PlayEvent from a play-by-play row as dict.
+
+        Args:
+            event (dict[str, Any]): Play-by-play row.
+
+        Returns:
+            Self: The PlayEvent.
+        """
+        return cls(
+            game_id=str(event["game_id"]),
+            season=int(event["season"]),
+            week=int(event["week"]),
+            home_team=str(event["home_team"]),
+            away_team=str(event["away_team"]),
+            posteam=event.get("posteam"),
+            sack=bool(event.get("sack") or False),
+            yards_gained=int(event.get("yards_gained") or 0),
+            fumble=bool(event.get("fumble") or False),
+            fumble_lost=bool(event.get("fumble_lost") or False),
+            game_final=bool(event.get("game_final"))
+            or event.get("desc") == END_OF_GAME,
+            timestamp=event.get("timestamp"),
+        )
+
+
+class PlayFeed(Protocol):
+    """Source of play-by-play events in chronological order."""
+
+    def __iter__(self) -> Iterator[PlayEvent]: ...
+
+
+class FileReplayFeed:
+    """Replays play-by-play events from a JSON Lines file.
+
+    Stands in for a live feed. Events are paced by their timestamps, sped up by
+    the given factor. Events without a timestamp are emitted immediately.
+    """
+
+    def __init__(self, path: Path, speed: float = 100.0) -> None:
+        """Creates the feed.
+
+        Args:
+            path (Path): JSON Lines file with one play-by-play event per line.
+            speed (float, optional): Replay speed relative to real time. Defaults to 100.0.
+        """
+        self.path: Path = path
+        self.speed: float = speed
+
+    def __iter__(self) -> Iterator[PlayEvent]:
+        start: Optional[float] = None
+        start_clock: float = time.monotonic()
+
+        with self.path.open() as lines:
+            for line in lines:
+                if not line.strip():
+                    continue
+
+                event: PlayEvent = PlayEvent.from_dict(json.loads(line))
+
+                if event.timestamp is not None:
+                    if start is None:
+                        start = event.timestamp
+                    delay: float = (event.timestamp - start) / self.speed - (
+                        time.monotonic() - start_clock
+                    )
+                    if delay > 0:
+                        time.sleep(delay)
+
+                yield event
+
+
+@dataclass(slots=True)
+class SackTally:
+    """Running sack stats of one team in one game."""
+
+    suffered: int = 0
+    """Amount sacks suffered."""
+
+    yards_lost: int = 0
+    """Yards lost on sacks."""
+
+    fumbles: int = 0
+    """Amount strip sacks."""
+
+    fumbles_lost: int = 0
+    """Fumbles lost on strip sacks."""
+
+
+@dataclass(slots=True)
+class GameTally:
+    """Running sack stats of both teams in one game."""
+
+    gameday: GameDay
+    """Gameday of the game."""
+
+    home_team: str
+    """Home team of the game."""
+
+    away_team: str
+    """Away team of the game."""
+
+    home: SackTally = field(default_factory=SackTally)
+    """Sacks suffered by the home team."""
+
+    away: SackTally = field(default_factory=SackTally)
+    """Sacks suffered by the away team."""
+
+    def stat_lines(self) -> list[SackStatLine]:
+        """Final stat lines of both teams.
+
+        Returns:
+            list[SackStatLine]: Stat lines of the home and the away team.
+        """
+        return [
+            SackStatLine(
+                gameday=self.gameday,
+                team=team,
+                opponent_team=opponent_team,
+                suffered=tally.suffered,
+                yards_lost=tally.yards_lost,
+                fumbles=tally.fumbles,
+                fumbles_lost=tally.fumbles_lost,
+            )
+            for team, opponent_team, tally in (
+                (self.home_team, self.away_team, self.home),
+                (self.away_team, self.home_team, self.away),
+            )
+        ]
+
+
+class LiveSackTracker:
+    """Keeps running sack tallies of all games in progress.
+
+    Only two tallies are kept per game in progress and a game is dropped as
+    soon as it is final, so memory stays constant per game.
+    """
+
+    def __init__(self) -> None:
+        self.games: dict[str, GameTally] = {}
+        """Tallies of the games in progress by game id."""
+
+    def process(self, event: PlayEvent) -> list[SackStatLine]:
+        """Adds a play-by-play event to the tallies.
+
+        Args:
+            event (PlayEvent): The event.
+
+        Returns:
+            list[SackStatLine]: The final stat lines of both teams if the game went final, else empty.
+        """
+        game: Optional[GameTally] = self.games.get(event.game_id)
+        if game is None:
+            game = GameTally(
+                GameDay(event.season, event.week), event.home_team, event.away_team
+            )
+            self.games[event.game_id] = game
+
+        if event.sack and event.posteam is not None:
+            tally: SackTally = (
+                game.home if event.posteam == game.home_team else game.away
+            )
+            tally.suffered += 1
+            tally.yards_lost += event.yards_gained
+            if event.fumble:
+                tally.fumbles += 1
+            if event.fumble_lost:
+                tally.fumbles_lost += 1
+
+        if event.game_final:
+            del self.games[event.game_id]
+            return game.stat_lines()
+
+        return []
+
+
+def track_live(
+    feed: PlayFeed,
+    complete_team_stats: pl.DataFrame,
+    partitions: Optional[PartitionIndex] = None,
+    leaders: Optional[Leaderboards] = None,
+) -> None:
+    """Consumes a play-by-play feed and posts the stat lines of every finished game.
+
+    Args:
+        feed (PlayFeed): The play-by-play feed.
+        complete_team_stats (pl.DataFrame): All stats.
+        partitions (Optional[PartitionIndex], optional): Per team and matchup history. Built from complete_team_stats if None. Defaults to None.
+        leaders (Optional[Leaderboards], optional): Leaderboards of the history. Built from complete_team_stats if None. Defaults to None.
+    """
+    tracker = LiveSackTracker()
+    indexes: HistoryIndexes = HistoryIndexes.from_df(
+        complete_team_stats, partitions, leaders=leaders
+    )
+
+    for event in feed:
+        finished: list[SackStatLine] = tracker.process(event)
+        for sack_stat_line in finished:
+            process_stat_line(sack_stat_line, indexes)
+
+        # Later games of the feed rank against the finished ones
+        if finished and indexes.leaders is not None:
+            indexes.leaders.append(
+                pl.DataFrame([sack_stat_line.as_dict() for sack_stat_line in finished])
+            )
+
+    if offline_test():
+        clear_offline_ledger()
@@ -0,0 +1,110 @@
+import io
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Optional
+
+import polars as pl
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore[assignment]
+
+
+def lock_path(path: Path) -> Path:
+    """Path of the lock file guarding a file.
+
+    Args:
+        path (Path): The guarded file.
+
+    Returns:
+        Path: The hidden lock file next to it.
+    """
+    return path.with_name(f".{path.name}.lock")
+
+
+def acquire(path: Path, shared: bool = False, blocking: bool = True) -> Optional[IO]:
+    """Takes an advisory lock on the lock file of a file.
+
+    The lock is held until the returned file is closed. Locks are advisory,
+    so only code taking them is coordinated. Without fcntl, e.g. on Windows,
+    locking is a no-op.
+
+    Args:
+        path (Path): The guarded file.
+        shared (bool, optional): Take a shared instead of an exclusive lock. Defaults to False.
+        blocking (bool, optional): Wait for the lock instead of giving up. Defaults to True.
+
+    Returns:
+        Optional[IO]: The open lock file or None if the lock is held elsewhere and blocking is False.
+    """
+    lock: Path = lock_path(path)
+    lock.parent.mkdir(parents=True, exist_ok=True)
+    handle: IO = lock.open("a")
+    if fcntl is None:
+        return handle
+
+    flags: int = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+    if not blocking:
+        flags |= fcntl.LOCK_NB
+    try:
+        fcntl.flock(handle.fileno(), flags)
+    except BlockingIOError:
+        handle.close()
+        return None
+    return handle
+
+
+@contextmanager
+def file_lock(path: Path) -> Iterator[None]:
+    """Holds the exclusive advisory lock of a file, waiting for it if needed.
+
+    Args:
+        path (Path): The guarded file.
+    """
+    handle: Optional[IO] = acquire(path)
+    try:
+        yield
+    finally:
+        if handle is not None:
+            handle.close()
+
+
+def atomic_write(path: Path, data: str | bytes) -> None:
+    """Replaces the content of a file in one step.
+
+    The data is written to a temporary file next to it which is then renamed
+    over the file, so readers see either the old or the new content but
+    never a partial write and never have to lock.
+
+    Args:
+        path (Path): The file.
+        data (str | bytes): The new content, text or binary.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(descriptor, "wb" if isinstance(data, bytes) else "w") as file:
+            file.write(data)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        Path(temporary).unlink(missing_ok=True)
+        raise
+
+
+def atomic_write_parquet(frame: pl.DataFrame, path: Path) -> None:
+    """Replaces a parquet file in one step, see `atomic_write`.
+
+    Args:
+        frame (pl.DataFrame): The data.
+        path (Path): The parquet file.
+    """
+    buffer = io.BytesIO()
+    frame.write_parquet(buffer)
+    atomic_write(path, buffer.getvalue())
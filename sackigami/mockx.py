@@ -0,0 +1,217 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+
+import polars as pl
+
+import sackigami.x as x
+from sackigami.bot import create_string
+from sackigami.constants import APICred
+from sackigami.history import HistoryIndexes
+from sackigami.server import LoadTestResult
+from sackigami.teams import SackStatLine, parse_sack_data
+
+MOCK_CRED: APICred = APICred("mock", "mock", "mock", "mock")
+"""Dummy credentials accepted by the mock X server."""
+
+
+class MockXServer(ThreadingHTTPServer):
+    """Local stand-in of the X API endpoint creating posts.
+
+    Posts are kept in memory. Requests are answered after an injected
+    latency and limited to a fixed amount per window, answering with 429 and
+    the same rate limit headers as X once the limit is hit.
+    """
+
+    daemon_threads = True
+
+    def __init__(
+        self,
+        address: tuple[str, int],
+        rate_limit: int = 300,
+        window: float = 900.0,
+        latency: tuple[float, float] = (0.0, 0.0),
+        seed: Optional[int] = None,
+    ) -> None:
+        """Creates the server.
+
+        Args:
+            address (tuple[str, int]): Host and port to bind to.
+            rate_limit (int, optional): Maximum amount of posts per window. Defaults to 300.
+            window (float, optional): Length of the rate limit window in seconds. Defaults to 900.0.
+            latency (tuple[float, float], optional): Range of the injected latency in seconds. Defaults to (0.0, 0.0).
+            seed (Optional[int], optional): Seed of the injected latency. Defaults to None.
+        """
+        super().__init__(address, MockXHandler)
+        self.rate_limit: int = rate_limit
+        self.window: float = window
+        self.latency: tuple[float, float] = latency
+
+        self.posts: list[dict[str, Any]] = []
+        """Created posts."""
+
+        self.rejected: int = 0
+        """Amount of requests answered with 429."""
+
+        self._lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._window_start: float = time.time()
+        self._window_count: int = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def delay(self) -> float:
+        with self._lock:
+            return self._random.uniform(*self.latency)
+
+    def admit(self) -> tuple[bool, int, int]:
+        """Counts a request against the rate limit.
+
+        Returns:
+            tuple[bool, int, int]: Whether the request is admitted, the remaining requests and the reset time in seconds since epoch.
+        """
+        with self._lock:
+            now: float = time.time()
+            if now >= self._window_start + self.window:
+                self._window_start = now
+                self._window_count = 0
+
+            reset: int = int(self._window_start + self.window)
+            if self._window_count >= self.rate_limit:
+                self.rejected += 1
+                return False, 0, reset
+
+            self._window_count += 1
+            return True, self.rate_limit - self._window_count, reset
+
+    def create_post(self, body: dict[str, Any]) -> dict[str, Any]:
+        with self._lock:
+            post: dict[str, Any] = {
+                "id": str(len(self.posts) + 1),
+                "text": body["text"],
+            }
+            reply: Optional[dict[str, Any]] = body.get("reply")
+            if reply is not None:
+                post["in_reply_to_tweet_id"] = reply["in_reply_to_tweet_id"]
+            self.posts.append(post)
+        return {"data": {"id": post["id"], "text": post["text"]}}
+
+
+class MockXHandler(BaseHTTPRequestHandler):
+    """Answers create post requests like the X API."""
+
+    protocol_version = "HTTP/1.1"
+    server: MockXServer
+
+    def respond(
+        self, status: int, body: dict[str, Any], headers: dict[str, str]
+    ) -> None:
+        content: bytes = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def do_POST(self) -> None:
+        body: dict[str, Any] = json.loads(
+            self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}"
+        )
+
+        if self.path.split("?")[0] != "/2/tweets":
+            self.respond(404, {"title": "Not Found"}, {})
+            return
+
+        time.sleep(self.server.delay())
+        admitted, remaining, reset = self.server.admit()
+        headers: dict[str, str] = {
+            "x-rate-limit-limit": str(self.server.rate_limit),
+            "x-rate-limit-remaining": str(remaining),
+            "x-rate-limit-reset": str(reset),
+        }
+
+        if not admitted:
+            self.respond(429, {"title": "Too Many Requests"}, headers)
+        else:
+            self.respond(201, self.server.create_post(body), headers)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def render_season(complete_team_stats: pl.DataFrame, season: int) -> list[str]:
+    """Renders a post for every team game of a season, regardless of whether it is worth posting.
+
+    Args:
+        complete_team_stats (pl.DataFrame): Complete team stats.
+        season (int): The season.
+
+    Returns:
+        list[str]: The posts.
+    """
+    indexes: HistoryIndexes = HistoryIndexes.from_df(complete_team_stats)
+    season_stats: pl.DataFrame = parse_sack_data(
+        complete_team_stats.filter(pl.col("season") == season)
+    )
+
+    posts: list[str] = []
+    for stat_line in season_stats.iter_rows(named=True):
+        line: SackStatLine = SackStatLine.from_dict(stat_line)
+        posts.append(
+            create_string(
+                line,
+                indexes.fingerprints.find_similar_stat_lines(line),
+                indexes.dominance.find_dominating_stat_lines(line),
+                indexes.partitions.find_partitioned_stat_lines(line),
+                (
+                    None
+                    if indexes.expected is None
+                    else indexes.expected.expected_frequency(line)
+                ),
+                None if indexes.leaders is None else indexes.leaders.best_rank(line),
+            )
+        )
+
+    return posts
+
+
+def replay_posts(posts: list[str], base_url: str) -> LoadTestResult:
+    """Posts through the real posting code against an X API stand-in.
+
+    Rate limited requests are waited out by the client and count towards the
+    latency of their post.
+
+    Args:
+        posts (list[str]): The posts.
+        base_url (str): Base URL of the X API stand-in.
+
+    Returns:
+        LoadTestResult: Latencies and throughput.
+    """
+    latencies: list[float] = []
+    errors: int = 0
+
+    start: float = time.perf_counter()
+    for text in posts:
+        post_start: float = time.perf_counter()
+        try:
+            x.post(text, cred=MOCK_CRED, base_url=base_url)
+        except Exception as error:
+            print(f"Post failed: {error}")
+            errors += 1
+        latencies.append((time.perf_counter() - post_start) * 1000)
+
+    return LoadTestResult(
+        requests=len(posts),
+        errors=errors,
+        seconds=time.perf_counter() - start,
+        latencies_ms=latencies,
+    )
@@ -0,0 +1,122 @@
+from pathlib import Path
+from typing import Iterable, Optional
+
+import nflreadpy as nfl
+import polars as pl
+import requests
+
+from sackigami.constants import BOT_CONF, PBP_DATA_OF_INTEREST, PBP_URL
+from sackigami.profiling import collect
+
+FIRST_PBP_SEASON: int = 1999
+"""First season with play-by-play data."""
+
+RED_ZONE: int = 20
+"""Yards to the end zone at which the red zone starts."""
+
+
+def download_pbp(
+    seasons: Optional[Iterable[int]] = None,
+    directory: Path = BOT_CONF.cache_dir / "pbp",
+) -> list[Path]:
+    """Downloads play-by-play parquet files that are not cached yet.
+
+    Files are streamed to disk in chunks without parsing them. The current
+    season is always downloaded again as it is still changing.
+
+    Args:
+        seasons (Optional[Iterable[int]], optional): Seasons to download. All available if None. Defaults to None.
+        directory (Path, optional): Directory to store the files in. Defaults to BOT_CONF.cache_dir / "pbp".
+
+    Returns:
+        list[Path]: Paths of the play-by-play files.
+    """
+    current_season: int = nfl.get_current_season()
+    if seasons is None:
+        seasons = range(FIRST_PBP_SEASON, current_season + 1)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    paths: list[Path] = []
+
+    for season in seasons:
+        path: Path = directory / f"play_by_play_{season}.parquet"
+        if not path.exists() or season == current_season:
+            print(f"Downloading play-by-play of the {season} season ...")
+            with requests.get(
+                PBP_URL.format(season=season), stream=True, timeout=60
+            ) as response:
+                response.raise_for_status()
+                partial: Path = path.with_suffix(".part")
+                with partial.open("wb") as file:
+                    for chunk in response.iter_content(chunk_size=1 << 20):
+                        file.write(chunk)
+                partial.replace(path)
+        paths.append(path)
+
+    return paths
+
+
+def scan_pbp_sack_stats(paths: list[Path]) -> pl.LazyFrame:
+    """Lazily aggregates play-by-play files into detailed sack stats per team game.
+
+    Only the columns in PBP_DATA_OF_INTEREST are read and cast to a common
+    type, as the files differ slightly between seasons. All plays with a team in
+    possession are aggregated in a single group by, so every team game is
+    kept, even without any sacks. The result has the same
+    (season, week, team) grain as the team stats.
+
+    Args:
+        paths (list[Path]): Play-by-play parquet files.
+
+    Returns:
+        pl.LazyFrame: Detailed sack stats per team and game.
+    """
+    sack: pl.Expr = pl.col("sack") == 1
+
+    return (
+        pl.concat(
+            pl.scan_parquet(path).select(
+                pl.col(column).cast(dtype)
+                for column, dtype in PBP_DATA_OF_INTEREST.items()
+            )
+            for path in paths
+        )
+        .filter(pl.col("posteam").is_not_null())
+        .group_by("season", "week", "posteam", "defteam")
+        .agg(
+            sack.sum().alias("sacks_suffered"),
+            *(
+                (sack & (pl.col("qtr") == quarter)).sum().alias(f"sacks_q{quarter}")
+                for quarter in range(1, 5)
+            ),
+            (sack & (pl.col("qtr") > 4)).sum().alias("sacks_ot"),
+            *(
+                (sack & (pl.col("down") == down)).sum().alias(f"sacks_down_{down}")
+                for down in range(1, 5)
+            ),
+            (sack & (pl.col("yardline_100") <= RED_ZONE)).sum().alias("sacks_red_zone"),
+            (sack & (pl.col("safety") == 1)).sum().alias("sack_safeties"),
+        )
+        .rename({"posteam": "team", "defteam": "opponent_team"})
+        .sort("season", "week", "team")
+    )
+
+
+def retrieve_pbp_sack_stats(
+    seasons: Optional[Iterable[int]] = None,
+    directory: Path = BOT_CONF.cache_dir / "pbp",
+) -> pl.DataFrame:
+    """Downloads play-by-play data and derives detailed sack stats per team game.
+
+    The aggregation runs on the streaming engine, so memory stays bounded
+    regardless of the amount of seasons.
+
+    Args:
+        seasons (Optional[Iterable[int]], optional): Seasons to process. All available if None. Defaults to None.
+        directory (Path, optional): Directory to store the play-by-play files in. Defaults to BOT_CONF.cache_dir / "pbp".
+
+    Returns:
+        pl.DataFrame: Detailed sack stats per team and game.
+    """
+    paths: list[Path] = download_pbp(seasons, directory)
+    return collect(scan_pbp_sack_stats(paths), "pbp_sack_stats", engine="streaming")
@@ -0,0 +1,160 @@
+import tomllib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+from sackigami.bot import (
+    Evaluation,
+    WeekContext,
+    apply_delay,
+    clear_offline_ledger,
+    evaluate_stat_line,
+    offline_test,
+    publish,
+)
+from sackigami.constants import API_CRED, BOT_CONF, STAT_THRESHOLDS, APICred
+from sackigami.teams import SackStatLine
+
+
+@dataclass(frozen=True)
+class Persona:
+    """An account with its own rules, evaluated against the shared history."""
+
+    name: str
+    """Name of the persona."""
+
+    thresholds: dict[str, int] = field(default_factory=lambda: dict(STAT_THRESHOLDS))
+    """Stat thresholds above which a game is worth posting."""
+
+    template: str = "{post}"
+    """Template of the posts, the rendered post replaces {post}."""
+
+    cred: APICred = API_CRED
+    """Credentials of the account."""
+
+    save_path: Path = Path("posted.json")
+    """Path of the ledger of posted games."""
+
+    save_path_offline: Path = Path("posted_offline.json")
+    """Path of the ledger of posted games for offline runs."""
+
+    def render(self, evaluation: Evaluation) -> str:
+        """Creates the string which is to be posted.
+
+        Args:
+            evaluation (Evaluation): The evaluated stat line.
+
+        Returns:
+            str: The string which is to be posted.
+        """
+        # The template takes up part of the post length
+        overhead: int = len(self.template.format(post=""))
+        return self.template.format(
+            post=evaluation.create_string(BOT_CONF.post_length - overhead)
+        )
+
+
+def load_personas(path: Path) -> list[Persona]:
+    """Loads persona configs from a TOML file.
+
+    Every table is a persona named after the table. All keys are optional:
+
+    ```toml
+    [deep-cuts]
+    thresholds = { sacks_suffered = 5, sack_yards_lost = -30 }
+    template = "Deep cut!\\n{post}"
+    credentials_prefix = "DEEP_CUTS_"
+    ledger = "posted_deep_cuts.json"
+    ```
+
+    Thresholds not given fall back to STAT_THRESHOLDS. The credentials are
+    read from the environment variables API_KEY etc. with the prefix.
+
+    Args:
+        path (Path): Path of the TOML file.
+
+    Returns:
+        list[Persona]: The personas.
+    """
+    config: dict[str, Any] = tomllib.loads(path.read_text())
+
+    return [
+        Persona(
+            name=name,
+            thresholds={**STAT_THRESHOLDS, **persona.get("thresholds", {})},
+            template=persona.get("template", "{post}"),
+            cred=APICred.from_env(persona.get("credentials_prefix", "")),
+            save_path=Path(persona.get("ledger", f"posted_{name}.json")),
+            save_path_offline=Path(f"posted_{name}_offline.json"),
+        )
+        for name, persona in config.items()
+    ]
+
+
+def post_persona_week(persona: Persona, context: WeekContext) -> int:
+    """Evaluates a game day with the rules of a persona and posts with its account.
+
+    Args:
+        persona (Persona): The persona.
+        context (WeekContext): The game day and the loaded history.
+
+    Returns:
+        int: Amount of posts.
+    """
+    posted: int = 0
+
+    for stat_line in context.week_sack_data.iter_rows(named=True):
+        evaluation: Optional[Evaluation] = evaluate_stat_line(
+            SackStatLine.from_dict(stat_line),
+            context.indexes,
+            persona.thresholds,
+            persona.save_path,
+            persona.save_path_offline,
+        )
+        if evaluation is None:
+            continue
+
+        if not publish(
+            persona.render(evaluation),
+            evaluation.sack_stat_line,
+            persona.save_path,
+            persona.save_path_offline,
+            persona.cred,
+        ):
+            continue
+        posted += 1
+
+        if not offline_test():
+            apply_delay()
+
+    if offline_test():
+        clear_offline_ledger(persona.save_path_offline)
+
+    return posted
+
+
+def post_personas(context: WeekContext, personas: list[Persona]) -> dict[str, int]:
+    """Posts a game day for several personas concurrently.
+
+    The history and its indexes are loaded once and shared read-only by all
+    personas. Each persona posts in its own thread, so the delays between
+    posts of different accounts overlap.
+
+    Args:
+        context (WeekContext): The game day and the loaded history.
+        personas (list[Persona]): The personas.
+
+    Returns:
+        dict[str, int]: Amount of posts per persona.
+    """
+    # Derive the shared data up front instead of racing for it in the threads
+    context.week_sack_data
+    context.indexes
+
+    with ThreadPoolExecutor(max_workers=max(len(personas), 1)) as executor:
+        posted: list[int] = list(
+            executor.map(lambda persona: post_persona_week(persona, context), personas)
+        )
+
+    return {persona.name: count for persona, count in zip(personas, posted)}
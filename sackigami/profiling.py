@@ -0,0 +1,182 @@
+import cProfile
+import io
+import pstats
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+import polars as pl
+
+HOT_SPOTS: int = 25
+"""Amount of Python functions listed in the report."""
+
+
+@dataclass
+class QueryProfile:
+    name: str
+    """Name of the query."""
+
+    plan: str
+    """Optimized query plan."""
+
+    timings: pl.DataFrame
+    """Start and end of every node of the plan in microseconds. Empty if polars timed no node."""
+
+    rows: int
+    """Amount of rows of the result."""
+
+    seconds: float
+    """Wall time of the query."""
+
+
+@dataclass
+class ProfileSession:
+    """Collects the query plans, node timings and phase timings of one command.
+
+    The Python side is profiled with cProfile for as long as the session is
+    active. cProfile only follows the calls of the main thread reliably and
+    allows a single active profiler, so worker threads, e.g. of the startup
+    phases, are covered by the phase timings only.
+    """
+
+    queries: list[QueryProfile] = field(default_factory=list)
+    """Profiled lazy queries, in order of execution."""
+
+    phases: list[tuple[str, float]] = field(default_factory=list)
+    """Name and seconds of every timed phase, in order of execution."""
+
+    profiler: cProfile.Profile = field(default_factory=cProfile.Profile)
+    """Profiler of the Python side."""
+
+    def report(self) -> str:
+        """Renders the phases, the lazy queries and the Python hot spots.
+
+        Returns:
+            str: The report.
+        """
+        lines: list[str] = ["Phases"]
+        lines.extend(f"  {name:<30} {seconds:8.3f}s" for name, seconds in self.phases)
+
+        lines.append("")
+        lines.append("Lazy queries")
+        for query in self.queries:
+            lines.append(
+                f"  {query.name:<30} {query.seconds:8.3f}s {query.rows:>10} rows"
+            )
+            for node, start, end in query.timings.sort(
+                pl.col("end") - pl.col("start"), descending=True
+            ).iter_rows():
+                lines.append(f"    {(end - start) / 1000:10.3f}ms  {node}")
+
+        stream = io.StringIO()
+        pstats.Stats(self.profiler, stream=stream).sort_stats(
+            pstats.SortKey.CUMULATIVE
+        ).print_stats(HOT_SPOTS)
+        lines.append("")
+        lines.append("Python hot spots")
+        lines.append(stream.getvalue().strip())
+
+        return "\n".join(lines)
+
+    def write(self, directory: Path) -> Path:
+        """Writes the report, the query plans and the pstats dump.
+
+        Args:
+            directory (Path): Output directory. Created if missing.
+
+        Returns:
+            Path: Path of the report.
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        self.profiler.dump_stats(directory / "python.pstats")
+
+        for number, query in enumerate(self.queries, start=1):
+            (directory / f"plan_{number:02}_{query.name}.txt").write_text(query.plan)
+
+        path: Path = directory / "report.txt"
+        path.write_text(self.report())
+        return path
+
+
+_SESSION: Optional[ProfileSession] = None
+"""Active profile session. None if not profiling."""
+
+
+def start_profiling() -> ProfileSession:
+    """Starts a profile session, profiling the Python side from now on.
+
+    Returns:
+        ProfileSession: The session.
+    """
+    global _SESSION
+    _SESSION = ProfileSession()
+    _SESSION.profiler.enable()
+    return _SESSION
+
+
+def stop_profiling(directory: Path) -> Optional[Path]:
+    """Stops the active profile session and writes its report.
+
+    Args:
+        directory (Path): Output directory of the report.
+
+    Returns:
+        Optional[Path]: Path of the report. None if no session was active.
+    """
+    global _SESSION
+    session: Optional[ProfileSession] = _SESSION
+    if session is None:
+        return None
+
+    session.profiler.disable()
+    _SESSION = None
+    return session.write(directory)
+
+
+def collect(query: pl.LazyFrame, name: str, **kwargs: Any) -> pl.DataFrame:
+    """Collects a lazy query, profiling it if a profile session is active.
+
+    Args:
+        query (pl.LazyFrame): The query.
+        name (str): Name of the query in the report.
+        **kwargs (Any): Passed on to LazyFrame.collect and LazyFrame.profile.
+
+    Returns:
+        pl.DataFrame: The result.
+    """
+    session: Optional[ProfileSession] = _SESSION
+    if session is None:
+        return query.collect(**kwargs)
+
+    start: float = time.perf_counter()
+    try:
+        result, timings = query.profile(**kwargs)
+    except pl.exceptions.ComputeError:
+        # Raised by polars if it timed no node, e.g. for trivial plans
+        result = query.collect(**kwargs)
+        timings = pl.DataFrame(
+            schema={"node": pl.String, "start": pl.UInt64, "end": pl.UInt64}
+        )
+
+    session.queries.append(
+        QueryProfile(
+            name=name,
+            plan=query.explain(**kwargs),
+            timings=timings,
+            rows=result.height,
+            seconds=time.perf_counter() - start,
+        )
+    )
+    return result
+
+
+def record_phase(name: str, seconds: float) -> None:
+    """Adds the time of a phase to the active profile session, if any.
+
+    Args:
+        name (str): Name of the phase.
+        seconds (float): Duration of the phase.
+    """
+    if _SESSION is not None:
+        _SESSION.phases.append((name, seconds))
@@ -0,0 +1,113 @@
+import polars as pl
+
+from sackigami.constants import BOT_CONF, COL
+from sackigami.teams import with_team_names
+
+
+def plural(word: str, number: pl.Expr) -> pl.Expr:
+    """Vectorized `plural_s`.
+
+    Args:
+        word (str): Word to pluralize in singular.
+        number (pl.Expr): Numbers on which to dependent the form on.
+
+    Returns:
+        pl.Expr: Singular or plural of word per row.
+    """
+    return pl.when(number == 1).then(pl.lit(word)).otherwise(pl.lit(word + "s"))
+
+
+def post_text(limit: int = BOT_CONF.post_length) -> pl.Expr:
+    """Expression rendering the same post as `create_string` with only similar stat lines.
+
+    Expects the columns of `with_team_names`, the sack stat columns and count,
+    last_season and last_week as returned by `answer_stat_lines`. A count of 0
+    renders a Sackigami!.
+
+    Args:
+        limit (int, optional): Length above which the compact first sentence is used. Defaults to BOT_CONF.post_length.
+
+    Returns:
+        pl.Expr: The post text.
+    """
+    suffered: pl.Expr = COL.sacks_suffered
+    yards: pl.Expr = COL.sack_yards_lost
+    fumbles: pl.Expr = COL.sack_fumbles
+    lost: pl.Expr = COL.sack_fumbles_lost
+    count: pl.Expr = pl.col("count")
+    turnovers: pl.Expr = pl.format(
+        ", resulting in {} {}.", lost, plural("turnover", lost)
+    )
+
+    def text(first_sentence: pl.Expr) -> pl.Expr:
+        return pl.concat_str(
+            pl.when(count == 0)
+            .then(pl.lit("Sackigami!\n\n"))
+            .otherwise(pl.lit("No Sackigami!\n\n")),
+            first_sentence,
+            pl.when((fumbles == 1) & (suffered == 1))
+            .then(pl.lit("That sack was a strip-sack"))
+            .when(fumbles == 1)
+            .then(pl.format("{} of those sacks was a strip-sacks", fumbles))
+            .otherwise(pl.format("{} of those sacks were strip-sacks", fumbles)),
+            turnovers,
+            pl.when(count == 0)
+            .then(pl.lit("\n\nThis has never happened before."))
+            .otherwise(
+                pl.format(
+                    "\n\nThis has happened {} {} before. "
+                    "Most recently in week {} of the {} season.",
+                    count,
+                    plural("time", count),
+                    pl.col("last_week"),
+                    pl.col("last_season"),
+                )
+            ),
+        )
+
+    regular: pl.Expr = text(
+        pl.format(
+            "The {} suffered {} {} in their game against the {}. "
+            "This led to a total of {} {} lost.\n",
+            pl.col("team_name"),
+            suffered,
+            plural("sack", suffered),
+            pl.col("opponent_team_name"),
+            yards.abs(),
+            plural("yard", yards),
+        )
+    )
+    compact: pl.Expr = text(
+        pl.format(
+            "The {} suffered {} {} against the {} for a total of {} {} lost.\n",
+            pl.col("team_name"),
+            suffered,
+            plural("sack", suffered),
+            pl.col("opponent_team_name"),
+            yards.abs(),
+            plural("yard", yards),
+        )
+    )
+
+    return (
+        pl.when(regular.str.len_chars() > limit)
+        .then(compact)
+        .otherwise(regular)
+        .alias("post")
+    )
+
+
+def render_posts(stat_lines: pl.LazyFrame | pl.DataFrame) -> pl.LazyFrame:
+    """Renders the posts of any amount of answered stat lines at once.
+
+    Args:
+        stat_lines (pl.LazyFrame | pl.DataFrame): Stat lines with team, opponent_team, the sack stat columns and count, last_season and last_week.
+
+    Returns:
+        pl.LazyFrame: The stat lines with the additional column post.
+    """
+    return (
+        with_team_names(stat_lines.lazy())
+        .with_columns(post_text())
+        .drop("franchise", "team_name", "opponent_franchise", "opponent_team_name")
+    )
@@ -0,0 +1,399 @@
+import heapq
+import json
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Optional, Self
+
+import polars as pl
+
+from sackigami.bot import (
+    Evaluation,
+    clear_offline_ledger,
+    evaluate_stat_line,
+    offline_test,
+    publish,
+    set_correct_path,
+)
+from sackigami.constants import BOT_CONF, SCHEDULER_CONF, SchedulerConfig
+from sackigami.history import HistoryIndexes, PartitionIndex
+from sackigami.locking import atomic_write, file_lock
+from sackigami.teams import SackStatLine, parse_sack_data
+
+
+@dataclass
+class PostCandidate:
+    """A rendered post waiting to be released."""
+
+    score: float
+    """Priority of the post, higher is released first."""
+
+    sack_stat_line: SackStatLine
+    """Stat line the post was created for."""
+
+    text: str
+    """The string which is to be posted."""
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "score": self.score,
+            "sack_stat_line": self.sack_stat_line.as_dict(),
+            "text": self.text,
+        }
+
+    @classmethod
+    def from_dict(cls, candidate: dict[str, Any]) -> Self:
+        """Create PostCandidate from dict.
+
+        Args:
+            candidate (dict[str, Any]): Post candidate as dict.
+
+        Returns:
+            Self: The PostCandidate.
+        """
+        return cls(
+            score=float(candidate["score"]),
+            sack_stat_line=SackStatLine.from_dict(candidate["sack_stat_line"]),
+            text=str(candidate["text"]),
+        )
+
+
+def score_evaluation(evaluation: Evaluation, today: Optional[date] = None) -> float:
+    """Scores how interesting a stat line worth posting is.
+
+    A Sackigami! always outranks everything else. Other stat lines score
+    higher the rarer they are, the longer ago they last happened and the fewer
+    games were at least as bad.
+
+    Args:
+        evaluation (Evaluation): The evaluated stat line.
+        today (Optional[date], optional): Date to measure the time since the last occurence from. Today if None. Defaults to None.
+
+    Returns:
+        float: The score.
+    """
+    today = date.today() if today is None else today
+
+    if evaluation.similar is None:
+        score: float = 1000.0
+    else:
+        years_since: int = today.year - evaluation.similar.last_gameday.season
+        score = 100.0 / evaluation.similar.count + min(years_since, 50)
+
+    if evaluation.dominating is None:
+        score += 100.0
+    else:
+        score += 10.0 / evaluation.dominating.count
+
+    return score
+
+
+class PostQueue:
+    """Priority queue of posts released under a per hour and per day budget.
+
+    Posts are released highest score first, at most one per interval, which
+    spreads the daily budget evenly across the posting window. Whatever is
+    left once the window closes or the daily budget is used up is kept for
+    the next window or dropped, depending on the overflow policy.
+    """
+
+    def __init__(self, config: SchedulerConfig = SCHEDULER_CONF) -> None:
+        """Creates an empty queue.
+
+        Args:
+            config (SchedulerConfig, optional): Budget and window of the queue. Defaults to SCHEDULER_CONF.
+        """
+        self.config: SchedulerConfig = config
+        self.released: list[datetime] = []
+        """Times posts were released, newest last."""
+
+        self._heap: list[tuple[float, int, PostCandidate]] = []
+        self._counter: int = 0
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, candidate: PostCandidate) -> bool:
+        """Adds a candidate unless a post for the same stat line is already queued.
+
+        Args:
+            candidate (PostCandidate): The candidate.
+
+        Returns:
+            bool: True if the candidate was added.
+        """
+        line: SackStatLine = candidate.sack_stat_line
+        key = (line.gameday.season, line.gameday.week, line.team)
+        for _, _, queued in self._heap:
+            queued_line: SackStatLine = queued.sack_stat_line
+            if (
+                queued_line.gameday.season,
+                queued_line.gameday.week,
+                queued_line.team,
+            ) == key:
+                return False
+
+        heapq.heappush(self._heap, (-candidate.score, self._counter, candidate))
+        self._counter += 1
+        return True
+
+    def pop(self) -> PostCandidate:
+        """Removes and returns the highest ranked candidate regardless of budget.
+
+        Returns:
+            PostCandidate: The candidate.
+        """
+        return heapq.heappop(self._heap)[2]
+
+    def _window(self, day: date) -> tuple[datetime, datetime]:
+        return (
+            datetime.combine(day, self.config.window_start),
+            datetime.combine(day, self.config.window_end),
+        )
+
+    def _interval(self) -> timedelta:
+        start, end = self._window(date.today())
+        return max(
+            (end - start) / self.config.posts_per_day,
+            timedelta(hours=1) / self.config.posts_per_hour,
+        )
+
+    def _released_on(self, day: date) -> int:
+        return sum(1 for released in self.released if released.date() == day)
+
+    def _apply_overflow(self, now: datetime) -> None:
+        """Drops all queued candidates if the policy says so and today is over."""
+        if self.config.overflow != "drop" or not self._heap:
+            return
+
+        _, end = self._window(now.date())
+        if now >= end or self._released_on(now.date()) >= self.config.posts_per_day:
+            print(f"Dropping {len(self._heap)} queued posts over budget ...")
+            self._heap.clear()
+
+    def next_release(self, now: datetime) -> Optional[datetime]:
+        """Earliest time the next candidate can be released.
+
+        Args:
+            now (datetime): Current time.
+
+        Returns:
+            Optional[datetime]: The time or None if the queue is empty.
+        """
+        if not self._heap:
+            return None
+
+        candidate: datetime = now
+        if self.released:
+            candidate = max(candidate, self.released[-1] + self._interval())
+
+        while True:
+            start, end = self._window(candidate.date())
+            candidate = max(candidate, start)
+            if (
+                candidate >= end
+                or self._released_on(candidate.date()) >= self.config.posts_per_day
+            ):
+                candidate = self._window(candidate.date() + timedelta(days=1))[0]
+                continue
+
+            last_hour: list[datetime] = sorted(
+                released
+                for released in self.released
+                if released > candidate - timedelta(hours=1)
+            )
+            if len(last_hour) >= self.config.posts_per_hour:
+                candidate = last_hour[-self.config.posts_per_hour] + timedelta(hours=1)
+                continue
+
+            return candidate
+
+    def release(self, now: datetime) -> Optional[PostCandidate]:
+        """Releases the highest ranked candidate if the budget allows it now.
+
+        Args:
+            now (datetime): Current time.
+
+        Returns:
+            Optional[PostCandidate]: The released candidate or None if nothing can be released now.
+        """
+        self._apply_overflow(now)
+
+        next_release: Optional[datetime] = self.next_release(now)
+        if next_release is None or next_release > now:
+            return None
+
+        self.released.append(now)
+        self.released = [
+            released for released in self.released if released > now - timedelta(days=1)
+        ]
+        return self.pop()
+
+    def save(self, path: Path) -> None:
+        """Persists the queue as JSON.
+
+        Args:
+            path (Path): Path of the queue file.
+        """
+        atomic_write(
+            path,
+            json.dumps(
+                {
+                    "candidates": [
+                        candidate.as_dict() for _, _, candidate in sorted(self._heap)
+                    ],
+                    "released": [released.isoformat() for released in self.released],
+                },
+                indent=4,
+            ),
+        )
+
+    @classmethod
+    def load(cls, path: Path, config: SchedulerConfig = SCHEDULER_CONF) -> Self:
+        """Loads a persisted queue. Returns an empty queue if nothing has been persisted.
+
+        Args:
+            path (Path): Path of the queue file.
+            config (SchedulerConfig, optional): Budget and window of the queue. Defaults to SCHEDULER_CONF.
+
+        Returns:
+            Self: The queue.
+        """
+        queue = cls(config)
+        if not path.exists():
+            return queue
+
+        persisted: dict[str, Any] = json.loads(path.read_text())
+        for candidate in persisted["candidates"]:
+            queue.push(PostCandidate.from_dict(candidate))
+        queue.released = [
+            datetime.fromisoformat(released) for released in persisted["released"]
+        ]
+        return queue
+
+
+def collect_candidates(
+    week: pl.DataFrame,
+    complete_team_stats: pl.DataFrame,
+    partitions: Optional[PartitionIndex] = None,
+    indexes: Optional[HistoryIndexes] = None,
+) -> list[PostCandidate]:
+    """Evaluates all stat lines of a game day and renders those worth posting.
+
+    Args:
+        week (pl.DataFrame): Game stats of the week.
+        complete_team_stats (pl.DataFrame): All stats.
+        partitions (Optional[PartitionIndex], optional): Per team and matchup history. Built from complete_team_stats if None. Defaults to None.
+        indexes (Optional[HistoryIndexes], optional): Already built indexes of the history, e.g. of a WeekContext. Built from complete_team_stats and partitions if None. Defaults to None.
+
+    Returns:
+        list[PostCandidate]: The scored candidates.
+    """
+    if indexes is None:
+        indexes = HistoryIndexes.from_df(complete_team_stats, partitions)
+    candidates: list[PostCandidate] = []
+
+    for stat_line in parse_sack_data(week).iter_rows(named=True):
+        evaluation: Optional[Evaluation] = evaluate_stat_line(
+            SackStatLine.from_dict(stat_line), indexes
+        )
+        if evaluation is not None:
+            candidates.append(
+                PostCandidate(
+                    score_evaluation(evaluation),
+                    evaluation.sack_stat_line,
+                    evaluation.create_string(),
+                )
+            )
+
+    return candidates
+
+
+def run_queue(
+    path: Path,
+    config: SchedulerConfig = SCHEDULER_CONF,
+    now: Callable[[], datetime] = datetime.now,
+    sleep: Callable[[float], None] = time.sleep,
+    wait: bool = True,
+) -> None:
+    """Releases and posts the persisted queue.
+
+    Every release loads, changes and saves the queue under its lock, so a
+    restart continues where it stopped and overlapping runs share the queue
+    and its budget. Offline test runs release the whole queue at once.
+
+    Args:
+        path (Path): Path of the queue file.
+        config (SchedulerConfig, optional): Budget and window of the queue. Defaults to SCHEDULER_CONF.
+        now (Callable[[], datetime], optional): Clock. Defaults to datetime.now.
+        sleep (Callable[[float], None], optional): Sleep function. Defaults to time.sleep.
+        wait (bool, optional): Sleep until the next release until the queue is empty. Otherwise stop after the posts due now, e.g. for a cron job. Defaults to True.
+    """
+    while True:
+        with file_lock(path):
+            queue: PostQueue = PostQueue.load(path, config)
+            if not len(queue):
+                break
+
+            if offline_test():
+                candidate: Optional[PostCandidate] = queue.pop()
+            else:
+                candidate = queue.release(now())
+
+            if candidate is not None:
+                print("--------------")
+                publish(candidate.text, candidate.sack_stat_line)
+                queue.save(path)
+                continue
+
+            queue.save(path)
+            next_release: Optional[datetime] = queue.next_release(now())
+
+        if next_release is None:
+            break
+        if not wait:
+            print(f"Next post at {next_release}")
+            break
+        print(f"Next post at {next_release} ...")
+        sleep(max((next_release - now()).total_seconds(), 0))
+
+
+def schedule_week(
+    week: pl.DataFrame,
+    complete_team_stats: pl.DataFrame,
+    partitions: Optional[PartitionIndex] = None,
+    path: Optional[Path] = SCHEDULER_CONF.queue_path,
+    fallback: Path = SCHEDULER_CONF.queue_path_offline,
+    indexes: Optional[HistoryIndexes] = None,
+) -> None:
+    """Queues all posts of a game day by priority.
+
+    The queue is released under the budget by `run_queue`, e.g. from the
+    `release` command, so several game days can be queued without waiting.
+    Offline test runs release the queue right away.
+
+    Args:
+        week (pl.DataFrame): Game stats of the week.
+        complete_team_stats (pl.DataFrame): All stats.
+        partitions (Optional[PartitionIndex], optional): Per team and matchup history. Built from complete_team_stats if None. Defaults to None.
+        path (Optional[Path], optional): Path of the queue file. Defaults to SCHEDULER_CONF.queue_path.
+        fallback (Path, optional): Path of the queue file when offline testing. Defaults to SCHEDULER_CONF.queue_path_offline.
+        indexes (Optional[HistoryIndexes], optional): Already built indexes of the history, e.g. of a WeekContext. Built from complete_team_stats and partitions if None. Defaults to None.
+    """
+    path = set_correct_path(path, fallback)
+    candidates: list[PostCandidate] = collect_candidates(
+        week, complete_team_stats, partitions, indexes
+    )
+
+    with file_lock(path):
+        queue: PostQueue = PostQueue.load(path)
+        for candidate in candidates:
+            queue.push(candidate)
+        queue.save(path)
+    print(f"{len(queue)} posts queued")
+
+    if offline_test():
+        run_queue(path)
+        clear_offline_ledger()
+        path.unlink(missing_ok=True)
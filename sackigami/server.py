@@ -0,0 +1,387 @@
+import http.client
+import itertools
+import json
+import statistics
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import polars as pl
+
+from sackigami.constants import COL, SACK_STAT_COLUMNS
+from sackigami.history import (
+    DominatingStatLines,
+    HistoryIndexes,
+    PartitionedStatLines,
+    PartitionIndex,
+)
+from sackigami.teams import SackStatLine, SimilarStatLines, parse_sack_data
+
+DEFAULT_LIMIT: int = 10
+"""Default maximum amount of matching games in a response."""
+
+
+def parse_stat_line(params: dict[str, str]) -> dict[str, Any]:
+    """Parses a stat line from query parameters.
+
+    The sack stats are required. Season, week and team are optional and only
+    used to leave the stat line itself out of the results.
+
+    Args:
+        params (dict[str, str]): Query parameters.
+
+    Raises:
+        KeyError: If a sack stat is missing.
+        ValueError: If a number could not be parsed.
+
+    Returns:
+        dict[str, Any]: The stat line.
+    """
+    return {
+        **{column: int(params[column]) for column in SACK_STAT_COLUMNS},
+        "season": int(params.get("season", 0)),
+        "week": int(params.get("week", 0)),
+        "team": params.get("team", ""),
+        "opponent_team": params.get("opponent_team", ""),
+    }
+
+
+def similar_as_dict(
+    similar: Optional[SimilarStatLines | DominatingStatLines],
+) -> dict[str, Any]:
+    """Converts found stat lines into a JSON compatible dict.
+
+    Args:
+        similar (Optional[SimilarStatLines | DominatingStatLines]): The found stat lines or None if none found.
+
+    Returns:
+        dict[str, Any]: Count and last gameday.
+    """
+    if similar is None:
+        return {"count": 0, "last_gameday": None}
+    return {
+        "count": similar.count,
+        "last_gameday": {
+            "season": similar.last_gameday.season,
+            "week": similar.last_gameday.week,
+        },
+    }
+
+
+class QueryService:
+    """Answers stat line queries from indexes precomputed on startup."""
+
+    def __init__(
+        self,
+        complete_team_stats: pl.DataFrame,
+        partitions: Optional[PartitionIndex] = None,
+    ) -> None:
+        """Builds all indexes.
+
+        Args:
+            complete_team_stats (pl.DataFrame): Complete team stats.
+            partitions (Optional[PartitionIndex], optional): Already loaded per team and matchup history. Built from complete_team_stats if None. Defaults to None.
+        """
+        self.indexes: HistoryIndexes = HistoryIndexes.from_df(
+            complete_team_stats, partitions
+        )
+        self._games: list[dict[str, Any]] = parse_sack_data(
+            complete_team_stats
+        ).to_dicts()
+        self._ordinals: list[int] = [
+            season * 100 + week
+            for season, week in complete_team_stats.select(COL.season, COL.week).rows()
+        ]
+        self._matches: dict[tuple[int, ...], list[int]] = {
+            tuple(row[:-1]): row[-1]
+            for row in complete_team_stats.with_row_index("row")
+            .group_by(SACK_STAT_COLUMNS)
+            .agg(pl.col("row").sort())
+            .iter_rows()
+        }
+
+    def _matching_rows(self, stat_line: dict[str, Any]) -> list[int]:
+        rows: list[int] = self._matches.get(
+            tuple(stat_line[column] for column in SACK_STAT_COLUMNS), []
+        )
+        return [
+            row
+            for row in rows
+            if (
+                self._games[row]["season"],
+                self._games[row]["week"],
+                self._games[row]["team"],
+            )
+            != (stat_line["season"], stat_line["week"], stat_line["team"])
+        ]
+
+    def similar(self, params: dict[str, str]) -> dict[str, Any]:
+        """How often and when a stat line happened, with the most recent matching games.
+
+        Args:
+            params (dict[str, str]): Query parameters with the stat line and an optional limit.
+
+        Returns:
+            dict[str, Any]: Count, last gameday and games.
+        """
+        stat_line: dict[str, Any] = parse_stat_line(params)
+        limit: int = int(params.get("limit", DEFAULT_LIMIT))
+        rows: list[int] = self._matching_rows(stat_line)
+        return {
+            **similar_as_dict(
+                self.indexes.fingerprints.find_similar_stat_lines(stat_line)
+            ),
+            "games": (
+                [self._games[row] for row in reversed(rows[-limit:])] if limit else []
+            ),
+        }
+
+    def dominating(self, params: dict[str, str]) -> dict[str, Any]:
+        """How often and when a game at least as bad happened.
+
+        Args:
+            params (dict[str, str]): Query parameters with the stat line.
+
+        Returns:
+            dict[str, Any]: Count and last gameday.
+        """
+        sack_stat_line = SackStatLine.from_dict(parse_stat_line(params))
+        return similar_as_dict(
+            self.indexes.dominance.find_dominating_stat_lines(sack_stat_line)
+        )
+
+    def team(self, params: dict[str, str]) -> dict[str, Any]:
+        """How often and when a team, and optionally a matchup, had a stat line.
+
+        Args:
+            params (dict[str, str]): Query parameters with the stat line and the team.
+
+        Returns:
+            dict[str, Any]: Count and last gameday of the team and the matchup.
+        """
+        if "team" not in params:
+            raise KeyError("team")
+        sack_stat_line = SackStatLine.from_dict(parse_stat_line(params))
+        partitioned: PartitionedStatLines = (
+            self.indexes.partitions.find_partitioned_stat_lines(sack_stat_line)
+        )
+        return {
+            "team": similar_as_dict(partitioned.team),
+            "matchup": (
+                similar_as_dict(partitioned.matchup)
+                if "opponent_team" in params
+                else None
+            ),
+        }
+
+    def as_of(self, params: dict[str, str]) -> dict[str, Any]:
+        """How often and when a stat line happened before a given gameday.
+
+        Args:
+            params (dict[str, str]): Query parameters with the stat line, season and week.
+
+        Returns:
+            dict[str, Any]: Count and last gameday before the gameday.
+        """
+        stat_line: dict[str, Any] = parse_stat_line(params)
+        if "season" not in params or "week" not in params:
+            raise KeyError("season and week")
+
+        rows: list[int] = self._matches.get(
+            tuple(stat_line[column] for column in SACK_STAT_COLUMNS), []
+        )
+        count: int = bisect_left(
+            rows,
+            stat_line["season"] * 100 + stat_line["week"],
+            key=self._ordinals.__getitem__,
+        )
+        if count == 0:
+            return similar_as_dict(None)
+
+        last: dict[str, Any] = self._games[rows[count - 1]]
+        return {
+            "count": count,
+            "last_gameday": {"season": last["season"], "week": last["week"]},
+        }
+
+    def near(self, params: dict[str, str]) -> dict[str, Any]:
+        """How often a stat line within a tolerance in every sack stat happened.
+
+        Counts come from the dominance index by inclusion-exclusion over the
+        corners of the tolerance box, so no game has to be scanned.
+
+        Args:
+            params (dict[str, str]): Query parameters with the stat line and an optional tolerance.
+
+        Returns:
+            dict[str, Any]: Count.
+        """
+        stat_line: dict[str, Any] = parse_stat_line(params)
+        tolerance: int = int(params.get("tolerance", 1))
+        values: list[int] = [abs(stat_line[column]) for column in SACK_STAT_COLUMNS]
+        lower: list[int] = [max(value - tolerance, 0) for value in values]
+        upper: list[int] = [value + tolerance + 1 for value in values]
+
+        count: int = 0
+        for corner in itertools.product((False, True), repeat=len(values)):
+            bounds: tuple[int, ...] = tuple(
+                up if use_upper else low
+                for low, up, use_upper in zip(lower, upper, corner)
+            )
+            sign: int = -1 if sum(corner) % 2 else 1
+            count += sign * self.indexes.dominance.count_at_least(bounds)
+
+        return {"count": count, "tolerance": tolerance}
+
+
+ROUTES: dict[str, Callable[[QueryService, dict[str, str]], dict[str, Any]]] = {
+    "/similar": QueryService.similar,
+    "/dominating": QueryService.dominating,
+    "/team": QueryService.team,
+    "/asof": QueryService.as_of,
+    "/near": QueryService.near,
+}
+"""Query endpoints by path."""
+
+
+class QueryServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the query service."""
+
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], service: QueryService) -> None:
+        super().__init__(address, QueryHandler)
+        self.service: QueryService = service
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    """Answers GET requests to the query endpoints with JSON."""
+
+    protocol_version = "HTTP/1.1"
+    server: QueryServer
+
+    def do_GET(self) -> None:
+        url = urlsplit(self.path)
+        route = ROUTES.get(url.path)
+
+        if route is None:
+            status, body = 404, {"error": f"Unknown endpoint {url.path}"}
+        else:
+            try:
+                status, body = 200, route(
+                    self.server.service, dict(parse_qsl(url.query))
+                )
+            except KeyError as error:
+                status, body = 400, {"error": f"Missing parameter {error}"}
+            except ValueError as error:
+                status, body = 400, {"error": str(error)}
+
+        content: bytes = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def serve(service: QueryService, host: str = "127.0.0.1", port: int = 8080) -> None:
+    """Serves the query service until interrupted.
+
+    Args:
+        service (QueryService): The query service.
+        host (str, optional): Host to bind to. Defaults to "127.0.0.1".
+        port (int, optional): Port to bind to. Defaults to 8080.
+    """
+    with QueryServer((host, port), service) as server:
+        print(f"Serving on http://{host}:{server.server_address[1]}/")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+@dataclass
+class LoadTestResult:
+    requests: int
+    """Amount of requests sent."""
+
+    errors: int
+    """Amount of requests not answered with status 200."""
+
+    seconds: float
+    """Wall time of the whole test."""
+
+    latencies_ms: list[float]
+    """Latency of every request in milliseconds."""
+
+    def quantile(self, q: float) -> float:
+        """Latency quantile in milliseconds.
+
+        Args:
+            q (float): Quantile between 0 and 1.
+
+        Returns:
+            float: The latency.
+        """
+        latencies: list[float] = sorted(self.latencies_ms)
+        return latencies[min(int(q * len(latencies)), len(latencies) - 1)]
+
+    def report(self) -> str:
+        return (
+            f"{self.requests} requests ({self.errors} errors) in {self.seconds:.2f}s, "
+            f"{self.requests / self.seconds:.0f} requests/s\n"
+            f"p50 {self.quantile(0.5):.3f}ms, p90 {self.quantile(0.9):.3f}ms, "
+            f"p99 {self.quantile(0.99):.3f}ms, mean {statistics.fmean(self.latencies_ms):.3f}ms"
+        )
+
+
+def load_test(url: str, clients: int = 8, requests: int = 1000) -> LoadTestResult:
+    """Sends requests from concurrent clients with persistent connections.
+
+    Args:
+        url (str): URL to request, including the query.
+        clients (int, optional): Amount of concurrent clients. Defaults to 8.
+        requests (int, optional): Amount of requests per client. Defaults to 1000.
+
+    Returns:
+        LoadTestResult: Latencies and throughput.
+    """
+    parts = urlsplit(url)
+    path: str = parts.path + (f"?{parts.query}" if parts.query else "")
+    latencies: list[list[float]] = [[] for _ in range(clients)]
+    errors: list[int] = [0 for _ in range(clients)]
+
+    def client(number: int) -> None:
+        connection = http.client.HTTPConnection(parts.hostname, parts.port)
+        for _ in range(requests):
+            start: float = time.perf_counter()
+            connection.request("GET", path)
+            response = connection.getresponse()
+            response.read()
+            latencies[number].append((time.perf_counter() - start) * 1000)
+            if response.status != 200:
+                errors[number] += 1
+        connection.close()
+
+    threads: list[threading.Thread] = [
+        threading.Thread(target=client, args=(number,)) for number in range(clients)
+    ]
+    start: float = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return LoadTestResult(
+        requests=clients * requests,
+        errors=sum(errors),
+        seconds=time.perf_counter() - start,
+        latencies_ms=[latency for client in latencies for latency in client],
+    )
@@ -0,0 +1,157 @@
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import polars as pl
+
+import sackigami.x as x
+from sackigami.bot import WeekContext, load_game_from_json, offline_test
+from sackigami.gamedays import load_schedule
+from sackigami.history import load_partition_index
+from sackigami.leaders import load_leaderboards
+from sackigami.surprise import load_surprise_model
+from sackigami.profiling import record_phase
+from sackigami.teams import retrieve_complete_team_stats, retrieve_weekly_stats
+
+
+@dataclass
+class PhaseTiming:
+    name: str
+    """Name of the phase."""
+
+    start: float
+    """Seconds since the start of the startup the phase began."""
+
+    end: float
+    """Seconds since the start of the startup the phase ended."""
+
+
+def run_phases(
+    phases: dict[str, Callable[[], Any]], origin: float
+) -> tuple[dict[str, Any], list[PhaseTiming]]:
+    """Runs independent phases concurrently and times them.
+
+    Args:
+        phases (dict[str, Callable[[], Any]]): The phases by name.
+        origin (float): Start of the startup as returned by time.perf_counter.
+
+    Returns:
+        tuple[dict[str, Any], list[PhaseTiming]]: The results and timings by phase, in order of the phases.
+    """
+    timings: dict[str, PhaseTiming] = {}
+
+    def timed(name: str, phase: Callable[[], Any]) -> Any:
+        start: float = time.perf_counter() - origin
+        try:
+            return phase()
+        finally:
+            timings[name] = PhaseTiming(name, start, time.perf_counter() - origin)
+
+    with ThreadPoolExecutor(max_workers=max(len(phases), 1)) as executor:
+        futures: dict[str, Future[Any]] = {
+            name: executor.submit(timed, name, phase) for name, phase in phases.items()
+        }
+        results: dict[str, Any] = {
+            name: future.result() for name, future in futures.items()
+        }
+
+    return results, [timings[name] for name in phases]
+
+
+@dataclass
+class Startup:
+    """Everything a run needs before the first post."""
+
+    context: WeekContext
+    """The latest game day and the loaded history."""
+
+    schedule: Optional[pl.DataFrame]
+    """The schedule of the current season. None if not loaded."""
+
+    timings: list[PhaseTiming]
+    """Timings of the startup phases."""
+
+    def report(self) -> str:
+        """Renders the phase timings as a timeline.
+
+        Returns:
+            str: One line per phase and the total.
+        """
+        total: float = max((timing.end for timing in self.timings), default=0.0)
+        width: int = 40
+        lines: list[str] = []
+
+        for timing in self.timings:
+            first: int = round(timing.start / total * width) if total else 0
+            last: int = max(round(timing.end / total * width), first + 1)
+            lines.append(
+                f"{timing.name:<10} {timing.start:6.2f}s - {timing.end:6.2f}s "
+                f"|{" " * first}{"#" * (last - first)}{" " * (width - last)}|"
+            )
+
+        busy: float = sum(timing.end - timing.start for timing in self.timings)
+        lines.append(f"Ready after {total:.2f}s, {busy:.2f}s of work")
+        return "\n".join(lines)
+
+
+def load_startup(with_partitions: bool = True, with_schedule: bool = True) -> Startup:
+    """Loads the history, the posted games, the schedule and the X client concurrently.
+
+    The phases depending on the history start as soon as it arrived, while
+    the others may still be running.
+
+    Args:
+        with_partitions (bool, optional): Also load the per team history, the leaderboards and the surprise model from the data cache. Defaults to True.
+        with_schedule (bool, optional): Also load the schedule. Defaults to True.
+
+    Returns:
+        Startup: The loaded data and the phase timings.
+    """
+    origin: float = time.perf_counter()
+
+    independent: dict[str, Callable[[], Any]] = {
+        # Parsed once here, later lookups hit the cache of the save file
+        "ledger": load_game_from_json,
+    }
+    if with_schedule:
+        independent["schedule"] = load_schedule
+    if not offline_test():
+        independent["client"] = x.connect_to_client
+
+    def history() -> tuple[dict[str, Any], list[PhaseTiming]]:
+        start: float = time.perf_counter() - origin
+        complete_stats: pl.DataFrame = retrieve_complete_team_stats()
+        fetched = PhaseTiming("history", start, time.perf_counter() - origin)
+
+        dependent: dict[str, Callable[[], Any]] = {
+            "week": lambda: retrieve_weekly_stats(complete_stats)
+        }
+        if with_partitions:
+            dependent["partitions"] = lambda: load_partition_index(complete_stats)
+            dependent["leaders"] = lambda: load_leaderboards(complete_stats)
+            dependent["surprise"] = lambda: load_surprise_model(complete_stats)
+
+        results, timings = run_phases(dependent, origin)
+        return results | {"history": complete_stats}, [fetched] + timings
+
+    print("Loading game data, posted games, schedule and client ...")
+    results, timings = run_phases(independent | {"history": history}, origin)
+    history_results, history_timings = results["history"]
+
+    # The history phase itself is covered by its own timings
+    startup_timings: list[PhaseTiming] = timings[:-1] + history_timings
+    for timing in startup_timings:
+        record_phase(f"startup: {timing.name}", timing.end - timing.start)
+
+    return Startup(
+        context=WeekContext(
+            history_results["history"],
+            history_results["week"],
+            history_results.get("partitions"),
+            history_results.get("leaders"),
+            history_results.get("surprise"),
+        ),
+        schedule=results.get("schedule"),
+        timings=startup_timings,
+    )
@@ -0,0 +1,362 @@
+import json
+import math
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Optional, Self
+
+import polars as pl
+
+from sackigami.constants import BOT_CONF, COL
+from sackigami.locking import atomic_write, file_lock
+from sackigami.teams import GameDay, parse_last_gameday
+
+FEATURES: tuple[str, ...] = ("offense_rate", "defense_rate")
+"""Regressors of the surprise model besides the intercept."""
+
+
+@dataclass
+class Surprise:
+    expected: float
+    """Expected sacks suffered against the opponent."""
+
+    z_score: float
+    """Standard deviations the sacks suffered are above the expected ones."""
+
+
+def sack_features(
+    complete_team_stats: pl.DataFrame,
+    window: int = BOT_CONF.surprise_window,
+    min_games: int = BOT_CONF.surprise_min_games,
+) -> pl.DataFrame:
+    """Rolling sack rates of the team and the opponent before every game.
+
+    The offense rate is the average amount of sacks the team suffered, the
+    defense rate the average amount of sacks the opponent got, both over
+    their prior games only. The complete team stats are expected in
+    chronological order.
+
+    Args:
+        complete_team_stats (pl.DataFrame): Complete team stats.
+        window (int, optional): Amount of prior games to average over. Defaults to BOT_CONF.surprise_window.
+        min_games (int, optional): Amount of prior games needed for a rate, else it is null. Defaults to BOT_CONF.surprise_min_games.
+
+    Returns:
+        pl.DataFrame: Gameday, team, opponent, sacks suffered and both rates per game.
+    """
+
+    def prior_rate(group: str) -> pl.Expr:
+        return (
+            COL.sacks_suffered.shift(1)
+            .rolling_mean(window, min_samples=min_games)
+            .over(group)
+        )
+
+    return complete_team_stats.select(
+        COL.season,
+        COL.week,
+        COL.team,
+        COL.opponent_team,
+        COL.sacks_suffered,
+        prior_rate("team").alias("offense_rate"),
+        # The sacks suffered against an opponent are the sacks it got
+        prior_rate("opponent_team").alias("defense_rate"),
+    )
+
+
+def _solve(matrix: list[list[float]], vector: list[float]) -> list[float]:
+    """Solves a small linear system by Gaussian elimination with partial pivoting."""
+    size: int = len(vector)
+    rows: list[list[float]] = [matrix[i][:] + [vector[i]] for i in range(size)]
+
+    for column in range(size):
+        pivot: int = max(range(column, size), key=lambda row: abs(rows[row][column]))
+        if abs(rows[pivot][column]) < 1e-12:
+            raise ValueError("Singular system, the features are collinear")
+        rows[column], rows[pivot] = rows[pivot], rows[column]
+
+        for row in range(column + 1, size):
+            factor: float = rows[row][column] / rows[column][column]
+            for entry in range(column, size + 1):
+                rows[row][entry] -= factor * rows[column][entry]
+
+    solution: list[float] = [0.0] * size
+    for row in reversed(range(size)):
+        known: float = sum(rows[row][j] * solution[j] for j in range(row + 1, size))
+        solution[row] = (rows[row][size] - known) / rows[row][row]
+    return solution
+
+
+class SurpriseModel:
+    """Linear least squares model of the sacks suffered in a game.
+
+    The sacks suffered are regressed on an intercept, the offense rate and
+    the defense rate of `sack_features`. Only the sums of the normal
+    equations are kept, so games are added week by week in one vectorized
+    aggregation each and refitting solves a 3x3 system.
+    """
+
+    def __init__(self) -> None:
+        """Creates a model without any games."""
+        size: int = len(FEATURES) + 1
+        self.games: int = 0
+        """Amount of games the model is fit to."""
+
+        self._xtx: list[list[float]] = [[0.0] * size for _ in range(size)]
+        self._xty: list[float] = [0.0] * size
+        self._yty: float = 0.0
+        self._fit: Optional[tuple[list[float], float]] = None
+
+        self.last_gameday: Optional[GameDay] = None
+        """Latest game day of the added games. Only tracked by `extend_surprise_model`."""
+
+    def add(self, features: pl.DataFrame) -> None:
+        """Adds games to the model. Games without both rates are skipped.
+
+        Args:
+            features (pl.DataFrame): Games as returned by `sack_features`.
+        """
+        regressors: list[pl.Expr] = [pl.col("intercept")] + [
+            pl.col(feature) for feature in FEATURES
+        ]
+        target: pl.Expr = COL.sacks_suffered.cast(pl.Float64)
+        size: int = len(regressors)
+
+        sums: tuple[float, ...] = (
+            features.drop_nulls(list(FEATURES))
+            .with_columns(pl.lit(1.0).alias("intercept"))
+            .select(
+                pl.len().alias("games"),
+                *(
+                    (regressors[i] * regressors[j]).sum().alias(f"xtx_{i}_{j}")
+                    for i in range(size)
+                    for j in range(i, size)
+                ),
+                *(
+                    (regressors[i] * target).sum().alias(f"xty_{i}")
+                    for i in range(size)
+                ),
+                (target * target).sum().alias("yty"),
+            )
+            .row(0)
+        )
+
+        self.games += int(sums[0])
+        position: int = 1
+        for i in range(size):
+            for j in range(i, size):
+                self._xtx[i][j] += sums[position]
+                self._xtx[j][i] = self._xtx[i][j]
+                position += 1
+        for i in range(size):
+            self._xty[i] += sums[position]
+            position += 1
+        self._yty += sums[position]
+        self._fit = None
+
+    def fit(self) -> tuple[list[float], float]:
+        """Solves the normal equations of all added games.
+
+        Raises:
+            ValueError: If there are not more games than coefficients or the features are collinear.
+
+        Returns:
+            tuple[list[float], float]: The coefficients of intercept, offense rate and defense rate and the standard deviation of the residuals.
+        """
+        if self._fit is not None:
+            return self._fit
+
+        size: int = len(self._xty)
+        if self.games <= size:
+            raise ValueError(f"Need more than {size} games to fit, got {self.games}")
+
+        beta: list[float] = _solve(self._xtx, self._xty)
+        # Residual sum of squares from the sums: y'y - 2 b'X'y + b'X'X b
+        residuals: float = (
+            self._yty
+            - 2 * sum(b * xty for b, xty in zip(beta, self._xty))
+            + sum(
+                beta[i] * self._xtx[i][j] * beta[j]
+                for i in range(size)
+                for j in range(size)
+            )
+        )
+        sigma: float = math.sqrt(max(residuals, 0.0) / (self.games - size))
+
+        self._fit = (beta, sigma)
+        return self._fit
+
+    def save(self, path: Path) -> None:
+        """Persists the sums of the normal equations.
+
+        Args:
+            path (Path): Path of the state file.
+        """
+        state: dict[str, Any] = {
+            "games": self.games,
+            "xtx": self._xtx,
+            "xty": self._xty,
+            "yty": self._yty,
+            "last_gameday": (
+                None if self.last_gameday is None else asdict(self.last_gameday)
+            ),
+        }
+        atomic_write(path, json.dumps(state, indent=4))
+
+    @classmethod
+    def load(cls, path: Path) -> Optional[Self]:
+        """Loads persisted sums of the normal equations.
+
+        Args:
+            path (Path): Path of the state file.
+
+        Returns:
+            Optional[Self]: The model or None if nothing has been persisted.
+        """
+        if not path.exists():
+            return None
+
+        state: dict[str, Any] = json.loads(path.read_text())
+        model = cls()
+        if len(state["xty"]) != len(model._xty):
+            return None
+
+        model.games = state["games"]
+        model._xtx = state["xtx"]
+        model._xty = state["xty"]
+        model._yty = state["yty"]
+        model.last_gameday = (
+            None if state["last_gameday"] is None else GameDay(**state["last_gameday"])
+        )
+        return model
+
+    def score(self, features: pl.DataFrame) -> pl.DataFrame:
+        """Scores games in a single vectorized pass.
+
+        Args:
+            features (pl.DataFrame): Games as returned by `sack_features`.
+
+        Returns:
+            pl.DataFrame: The games with expected_sacks and surprise, both null if a rate is missing.
+        """
+        beta, sigma = self.fit()
+        expected: pl.Expr = pl.lit(beta[0]) + pl.sum_horizontal(
+            pl.col(feature) * coefficient
+            for feature, coefficient in zip(FEATURES, beta[1:])
+        )
+        valid: pl.Expr = pl.all_horizontal(
+            pl.col(feature).is_not_null() for feature in FEATURES
+        )
+
+        return features.with_columns(
+            pl.when(valid).then(expected).alias("expected_sacks")
+        ).with_columns(
+            (
+                (COL.sacks_suffered - pl.col("expected_sacks"))
+                / (sigma if sigma > 0 else math.nan)
+            ).alias("surprise")
+        )
+
+
+def _between(after: Optional[GameDay], before: GameDay) -> pl.Expr:
+    """Filter of the games after one game day, if given, and before another."""
+    earlier: pl.Expr = (COL.season < before.season) | (
+        (COL.season == before.season) & (COL.week < before.week)
+    )
+    if after is None:
+        return earlier
+    return earlier & (
+        (COL.season > after.season)
+        | ((COL.season == after.season) & (COL.week > after.week))
+    )
+
+
+def extend_surprise_model(
+    model: SurpriseModel, complete_team_stats: pl.DataFrame
+) -> None:
+    """Adds the games before the latest game day a model is missing.
+
+    Only the weeks after the last game day covered by the model are added,
+    the rolling rates of earlier games do not change with new games.
+
+    Args:
+        model (SurpriseModel): The model.
+        complete_team_stats (pl.DataFrame): Complete team stats.
+    """
+    new: pl.DataFrame = sack_features(complete_team_stats).filter(
+        _between(model.last_gameday, parse_last_gameday(complete_team_stats))
+    )
+    model.add(new)
+    if not new.is_empty():
+        model.last_gameday = parse_last_gameday(new)
+
+
+def load_surprise_model(
+    complete_team_stats: pl.DataFrame, directory: Path = BOT_CONF.cache_dir
+) -> SurpriseModel:
+    """Loads the persisted model and adds the games it is missing.
+
+    The model covers all games before the latest game day. Only the weeks
+    after the last game day covered by the persisted sums are added, see
+    `extend_surprise_model`. Without persisted sums, or with sums reaching
+    the latest game day, the model is built from scratch. The updated sums
+    are persisted again.
+
+    Args:
+        complete_team_stats (pl.DataFrame): Complete team stats.
+        directory (Path, optional): Directory of the data cache. Defaults to BOT_CONF.cache_dir.
+
+    Returns:
+        SurpriseModel: The model of all games before the latest game day.
+    """
+    latest: GameDay = parse_last_gameday(complete_team_stats)
+    path: Path = directory / "surprise.json"
+
+    # Loading, updating and saving under the lock keeps overlapping runs
+    # from adding the same weeks twice
+    with file_lock(path):
+        model: Optional[SurpriseModel] = SurpriseModel.load(path)
+        if (
+            model is None
+            or model.last_gameday is None
+            or (model.last_gameday.season, model.last_gameday.week)
+            >= (latest.season, latest.week)
+        ):
+            model = SurpriseModel()
+
+        extend_surprise_model(model, complete_team_stats)
+        model.save(path)
+    return model
+
+
+def surprise_index(
+    complete_team_stats: pl.DataFrame, model: Optional[SurpriseModel] = None
+) -> dict[tuple[int, int, str], Surprise]:
+    """Scores the latest game day with a model fit to all earlier games.
+
+    Args:
+        complete_team_stats (pl.DataFrame): Complete team stats.
+        model (Optional[SurpriseModel], optional): Model of all games before the latest game day, e.g. as returned by `load_surprise_model`. Built from complete_team_stats if None. Defaults to None.
+
+    Returns:
+        dict[tuple[int, int, str], Surprise]: Surprise by season, week and team of the latest game day. Empty if the model can not be fit.
+    """
+    features: pl.DataFrame = sack_features(complete_team_stats)
+    season, week = features.select(COL.season.last(), COL.week.last()).row(0)
+    latest: pl.Expr = (COL.season == season) & (COL.week == week)
+
+    if model is None:
+        model = SurpriseModel()
+        model.add(features.filter(~latest))
+    try:
+        scored: pl.DataFrame = model.score(features.filter(latest))
+    except ValueError:
+        return {}
+
+    return {
+        (row["season"], row["week"], row["team"]): Surprise(
+            row["expected_sacks"], row["surprise"]
+        )
+        for row in scored.drop_nulls(["expected_sacks", "surprise"])
+        .drop_nans(["surprise"])
+        .iter_rows(named=True)
+    }
@@ -1,13 +1,97 @@
+import io
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from dataclasses import dataclass
-from typing import Any, Optional, Self
+from pathlib import Path
+from typing import Any, Iterable, Optional, Self
 
 import nflreadpy as nfl
 import polars as pl
+import requests
+from tqdm import tqdm
 
 from sackigami.constants import (
+    BOT_CONF,
     COL,
     DATA_OF_INTEREST,
+    HISTORIC_TEAMS,
+    NFLVERSE_URL,
+    SACK_STAT_COLUMNS,
+    TEAM_STATS_PATH,
+    TEAMS,
 )
+from sackigami.profiling import collect
+
+FIRST_SEASON: int = 1999
+"""First season with team stats."""
+
+TEAM_DIMENSION: pl.DataFrame = pl.DataFrame(
+    [(code, code, name) for code, name in TEAMS.items()]
+    + [(code, current, name) for code, (current, name) in HISTORIC_TEAMS.items()],
+    schema={"team": pl.String, "franchise": pl.String, "team_name": pl.String},
+    orient="row",
+)
+"""Every current and historic team code with its franchise and long name."""
+
+
+def team_name(team: str) -> str:
+    """Long name of a current or historic team code.
+
+    Args:
+        team (str): Short team code.
+
+    Returns:
+        str: The long name or the code itself if it is unknown.
+    """
+    if team in TEAMS:
+        return TEAMS[team]
+    if team in HISTORIC_TEAMS:
+        return HISTORIC_TEAMS[team][1]
+    return team
+
+
+def franchise(team: str) -> str:
+    """Current team code of the franchise of a team code.
+
+    Args:
+        team (str): Short team code.
+
+    Returns:
+        str: The current code of the franchise.
+    """
+    return HISTORIC_TEAMS[team][0] if team in HISTORIC_TEAMS else team
+
+
+def with_team_names(stat_lines: pl.LazyFrame) -> pl.LazyFrame:
+    """Joins franchise and long name of the team and the opponent to stat lines.
+
+    Adds the columns franchise, team_name, opponent_franchise and
+    opponent_team_name. Unknown codes keep the code as name and franchise.
+
+    Args:
+        stat_lines (pl.LazyFrame): Stat lines with team and opponent_team.
+
+    Returns:
+        pl.LazyFrame: The stat lines with the team dimension joined.
+    """
+    dimension: pl.LazyFrame = TEAM_DIMENSION.lazy()
+    opponents: pl.LazyFrame = dimension.rename(
+        {
+            "team": "opponent_team",
+            "franchise": "opponent_franchise",
+            "team_name": "opponent_team_name",
+        }
+    )
+    return (
+        stat_lines.join(dimension, on="team", how="left", maintain_order="left")
+        .join(opponents, on="opponent_team", how="left", maintain_order="left")
+        .with_columns(
+            pl.coalesce(prefix + column, prefix + "team")
+            for prefix in ("", "opponent_")
+            for column in ("franchise", "team_name")
+        )
+    )
 
 
 @dataclass
@@ -115,13 +199,142 @@ class SackStatLine:
         )
 
 
-def retrieve_complete_team_stats() -> Any | pl.DataFrame:
-    """Download complete teams stats of all available seasons.
+def fetch_season_team_stats(
+    season: int,
+    base_url: str = NFLVERSE_URL,
+    retries: int = BOT_CONF.download_retries,
+) -> pl.DataFrame:
+    """Download and parse the weekly team stats of a single season.
+
+    Args:
+        season (int): The season.
+        base_url (str, optional): Base URL of the data releases. Defaults to NFLVERSE_URL.
+        retries (int, optional): Attempts before giving up. Defaults to BOT_CONF.download_retries.
+
+    Raises:
+        ConnectionError: If all attempts failed.
+
+    Returns:
+        pl.DataFrame: Team stats of the season.
+    """
+    url: str = base_url + TEAM_STATS_PATH.format(season=season)
+
+    for attempt in range(retries):
+        try:
+            response: requests.Response = requests.get(url, timeout=60)
+            response.raise_for_status()
+            return pl.read_parquet(io.BytesIO(response.content))
+        except requests.RequestException as error:
+            if attempt + 1 == retries:
+                raise ConnectionError(f"Failed to download {url}: {error}") from error
+            time.sleep(0.5 * 2**attempt)
+
+    raise ConnectionError(f"Failed to download {url}")
+
+
+def download_team_stats(
+    seasons: Iterable[int],
+    directory: Path,
+    base_url: str = NFLVERSE_URL,
+    workers: int = BOT_CONF.download_workers,
+    retries: int = BOT_CONF.download_retries,
+) -> dict[int, pl.DataFrame]:
+    """Download several seasons concurrently into the data cache.
+
+    Args:
+        seasons (Iterable[int]): Seasons to download.
+        directory (Path): Directory to store the parquet file of every season in.
+        base_url (str, optional): Base URL of the data releases. Defaults to NFLVERSE_URL.
+        workers (int, optional): Maximum amount of concurrent downloads. Defaults to BOT_CONF.download_workers.
+        retries (int, optional): Attempts per season before giving up. Defaults to BOT_CONF.download_retries.
+
+    Returns:
+        dict[int, pl.DataFrame]: Team stats by season.
+    """
+    seasons = list(seasons)
+    directory.mkdir(parents=True, exist_ok=True)
+    downloaded: dict[int, pl.DataFrame] = {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(fetch_season_team_stats, season, base_url, retries): season
+            for season in seasons
+        }
+        for future in tqdm(
+            as_completed(futures), total=len(futures), desc="Downloading seasons"
+        ):
+            season: int = futures[future]
+            downloaded[season] = future.result()
+            downloaded[season].write_parquet(
+                directory / f"stats_team_week_{season}.parquet"
+            )
+
+    return downloaded
+
+
+def retrieve_complete_team_stats(
+    directory: Path = BOT_CONF.cache_dir / "team_stats",
+    base_url: str = NFLVERSE_URL,
+    current_season: Optional[int] = None,
+) -> pl.DataFrame:
+    """Retrieve complete teams stats of all available seasons.
+
+    Past seasons are read from the data cache. Seasons missing from the cache
+    are downloaded concurrently first. The current season, which is still
+    changing, is downloaded on every call. If that download fails, the
+    cached current season is used instead with a warning.
+
+    Args:
+        directory (Path, optional): Directory of the cached seasons. Defaults to BOT_CONF.cache_dir / "team_stats".
+        base_url (str, optional): Base URL of the data releases. Defaults to NFLVERSE_URL.
+        current_season (Optional[int], optional): The current season. Determined by nflreadpy if None. Defaults to None.
+
+    Raises:
+        ConnectionError: If a season missing from the cache could not be downloaded.
 
     Returns:
         pl.DataFrame: Complete team stats.
     """
-    return nfl.load_team_stats(seasons=True, summary_level="week")
+    if current_season is None:
+        current_season = nfl.get_current_season()
+
+    seasons: list[int] = list(range(FIRST_SEASON, current_season + 1))
+    paths: list[Path] = [
+        directory / f"stats_team_week_{season}.parquet" for season in seasons
+    ]
+
+    downloaded: dict[int, pl.DataFrame] = download_team_stats(
+        [
+            season
+            for season, path in zip(seasons, paths)
+            if not path.exists() and season != current_season
+        ],
+        directory,
+        base_url,
+    )
+
+    try:
+        downloaded |= download_team_stats([current_season], directory, base_url)
+    except ConnectionError as error:
+        if not paths[-1].exists():
+            raise
+        warnings.warn(f"{error}, using the cached {current_season} season instead")
+
+    return collect(
+        pl.concat(
+            [
+                (
+                    downloaded[season].lazy()
+                    if season in downloaded
+                    else pl.scan_parquet(path)
+                )
+                for season, path in zip(seasons, paths)
+            ],
+            how="diagonal_relaxed",
+            rechunk=False,
+        ),
+        "team_stats",
+    )
 
 
 def parse_last_gameday(complete_team_stats: pl.DataFrame) -> GameDay:
@@ -155,9 +368,12 @@ def retrieve_weekly_stats(
         parse_last_gameday(complete_team_stats) if gameday is None else gameday
     )
 
-    return complete_team_stats.filter(
-        (COL.season == gameday_conditional.season)
-        & (COL.week == gameday_conditional.week)
+    return collect(
+        complete_team_stats.lazy().filter(
+            (COL.season == gameday_conditional.season)
+            & (COL.week == gameday_conditional.week)
+        ),
+        "week",
     )
 
 
@@ -174,30 +390,33 @@ def parse_sack_data(weekly_team_stats: pl.DataFrame) -> pl.DataFrame:
 
 
 def find_similar_stat_lines(
-    complete_team_stats: pl.DataFrame, sack_stat_line: SackStatLine
+    complete_team_stats: pl.DataFrame,
+    sack_stat_line: SackStatLine | dict[str, Any],
+    columns: tuple[str, ...] = SACK_STAT_COLUMNS,
 ) -> Optional[SimilarStatLines]:
     """Finds the amount of and the last time a completely similar stat line occured.
 
     Args:
         complete_team_stats (pl.DataFrame): Complete team stats.
-        sack_stat_line (SackStatLine): The stat line to look for.
+        sack_stat_line (SackStatLine | dict[str, Any]): The stat line to look for. A dict has to contain the columns as well as season, week and team.
+        columns (tuple[str, ...], optional): Columns which have to be equal. Defaults to SACK_STAT_COLUMNS.
 
     Returns:
         Optional[SimilarStatLines]: The similar stat line or None of none found.
     """
+    stat_line: dict[str, Any] = (
+        sack_stat_line if isinstance(sack_stat_line, dict) else sack_stat_line.as_dict()
+    )
 
     similar_lines: pl.DataFrame = complete_team_stats.filter(
-        (COL.sacks_suffered == sack_stat_line.suffered)
-        & (COL.sack_yards_lost == sack_stat_line.yards_lost)
-        & (COL.sack_fumbles == sack_stat_line.fumbles)
-        & (COL.sack_fumbles_lost == sack_stat_line.fumbles_lost)
+        *(pl.col(column) == stat_line[column] for column in columns)
     )
 
     similar_lines = similar_lines.filter(
         ~(
-            (COL.team == sack_stat_line.team)
-            & (COL.season == sack_stat_line.gameday.season)
-            & (COL.week == sack_stat_line.gameday.week)
+            (COL.team == stat_line["team"])
+            & (COL.season == stat_line["season"])
+            & (COL.week == stat_line["week"])
         )
     )
 
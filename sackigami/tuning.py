@@ -0,0 +1,174 @@
+from functools import reduce
+from typing import Optional
+
+import polars as pl
+
+from sackigami.constants import BOT_CONF, COL, SACK_STAT_COLUMNS, STAT_THRESHOLDS
+
+TUNING_GRID: dict[str, list[int]] = {
+    "sacks_suffered": [5, 6, 7],
+    "sack_yards_lost": [-30, -35, -40, -45],
+    "sack_fumbles": [2, 3],
+    "sack_fumbles_lost": [1, 2],
+    "count_cutoff": [2, 4, 6],
+    "years_cutoff": [10, 15, 20],
+}
+"""Default candidate values of the stat thresholds and the similar stat line cutoffs."""
+
+PARAMETERS: tuple[str, ...] = tuple(TUNING_GRID)
+"""Parameters of a candidate configuration."""
+
+
+def current_configuration() -> dict[str, int]:
+    """The configuration the bot currently runs with.
+
+    Returns:
+        dict[str, int]: Value per parameter.
+    """
+    return STAT_THRESHOLDS | {
+        "count_cutoff": BOT_CONF.similar_count_cutoff,
+        "years_cutoff": BOT_CONF.similar_years_cutoff,
+    }
+
+
+def candidate_grid(grid: dict[str, list[int]] = TUNING_GRID) -> pl.DataFrame:
+    """Every combination of the candidate values.
+
+    Args:
+        grid (dict[str, list[int]], optional): Candidate values per parameter. Defaults to TUNING_GRID.
+
+    Returns:
+        pl.DataFrame: One row per candidate with its index in the column candidate.
+    """
+    axes: list[pl.DataFrame] = [
+        pl.DataFrame({name: sorted(set(grid[name]))}, schema={name: pl.Int64})
+        for name in PARAMETERS
+    ]
+    return reduce(
+        lambda left, right: left.join(right, how="cross"), axes
+    ).with_row_index("candidate")
+
+
+def posting_features(complete_team_stats: pl.DataFrame) -> pl.LazyFrame:
+    """Everything `worth_posting` looks at for every game of the history.
+
+    The complete team stats are expected in chronological order, so the
+    similar stat lines of a game are the earlier games with its fingerprint.
+
+    Args:
+        complete_team_stats (pl.DataFrame): Complete team stats.
+
+    Returns:
+        pl.LazyFrame: Gameday, absolute sack stats, amount of similar stat lines and season of the last one per game.
+    """
+    return complete_team_stats.lazy().select(
+        COL.season,
+        COL.week,
+        *(pl.col(column).abs() for column in SACK_STAT_COLUMNS),
+        pl.int_range(pl.len()).over(SACK_STAT_COLUMNS).alias("similar"),
+        COL.season.shift(1).over(SACK_STAT_COLUMNS).alias("last_similar_season"),
+    )
+
+
+def evaluate_grid(
+    complete_team_stats: pl.DataFrame,
+    candidates: pl.DataFrame,
+    since: Optional[int] = None,
+) -> pl.DataFrame:
+    """Replays all candidates against the history in a single broadcast query.
+
+    Every game is paired with every candidate and the rules of
+    `worth_posting` are evaluated as column expressions, so the grid costs
+    one pass over games times candidates instead of one replay per candidate.
+    Games already posted and the expected frequency are not considered.
+
+    Args:
+        complete_team_stats (pl.DataFrame): Complete team stats.
+        candidates (pl.DataFrame): Candidates as returned by `candidate_grid`.
+        since (Optional[int], optional): First season to replay. All seasons if None, earlier seasons still count as similar stat lines. Defaults to None.
+
+    Returns:
+        pl.DataFrame: Per candidate its parameters, the mean, standard deviation, median, 90th percentile and maximum of the posts per week, the share of weeks without posts and the share of Sackigamis among the posts.
+    """
+    games: pl.LazyFrame = posting_features(complete_team_stats)
+    if since is not None:
+        games = games.filter(COL.season >= since)
+
+    sackigami: pl.Expr = pl.col("similar") == 0
+    worth: pl.Expr = (
+        sackigami
+        | (pl.col("similar") <= pl.col("count_cutoff"))
+        | (pl.col("last_similar_season") <= COL.season - pl.col("years_cutoff"))
+        | pl.any_horizontal(
+            pl.col(column) >= pl.col(f"{column}_threshold").abs()
+            for column in SACK_STAT_COLUMNS
+        )
+    )
+
+    weekly: pl.LazyFrame = (
+        games.join(candidates.lazy(), how="cross", suffix="_threshold")
+        .group_by("candidate", COL.season, COL.week)
+        .agg(
+            worth.sum().alias("posts"),
+            (worth & sackigami).sum().alias("sackigamis"),
+        )
+    )
+
+    posts: pl.Expr = pl.col("posts")
+    return (
+        weekly.group_by("candidate")
+        .agg(
+            posts.mean().alias("posts_per_week"),
+            posts.std().alias("std"),
+            posts.median().alias("median"),
+            posts.quantile(0.9).alias("p90"),
+            posts.max().alias("max"),
+            (posts == 0).mean().alias("empty_weeks"),
+            (pl.col("sackigamis").sum() / posts.sum()).alias("sackigami_share"),
+        )
+        .join(candidates.lazy(), on="candidate")
+        .sort("candidate")
+        .collect()
+    )
+
+
+def pareto_front(results: pl.DataFrame, target: float) -> pl.DataFrame:
+    """Candidates no other candidate beats on all objectives.
+
+    The objectives are the distance of the posts per week to the target and
+    the standard deviation of the posts per week, both lower is better, and
+    the share of Sackigamis, higher is better.
+
+    Args:
+        results (pl.DataFrame): Results as returned by `evaluate_grid`.
+        target (float): Targeted posts per week.
+
+    Returns:
+        pl.DataFrame: The Pareto-optimal candidates, closest to the target first.
+    """
+    scored: pl.DataFrame = results.with_columns(
+        (pl.col("posts_per_week") - target).abs().alias("distance")
+    )
+    objectives: pl.DataFrame = scored.select(
+        "candidate", "distance", "std", "sackigami_share"
+    )
+
+    dominated: pl.DataFrame = (
+        objectives.join(objectives, how="cross", suffix="_other")
+        .filter(
+            (pl.col("distance_other") <= pl.col("distance"))
+            & (pl.col("std_other") <= pl.col("std"))
+            & (pl.col("sackigami_share_other") >= pl.col("sackigami_share"))
+            & (
+                (pl.col("distance_other") < pl.col("distance"))
+                | (pl.col("std_other") < pl.col("std"))
+                | (pl.col("sackigami_share_other") > pl.col("sackigami_share"))
+            )
+        )
+        .select("candidate")
+        .unique()
+    )
+
+    return scored.join(dominated, on="candidate", how="anti").sort(
+        "distance", "std", pl.col("sackigami_share"), descending=[False, False, True]
+    )
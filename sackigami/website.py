@@ -0,0 +1,315 @@
+import hashlib
+import html
+import json
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+import polars as pl
+
+from sackigami.constants import BOT_CONF, SACK_STAT_COLUMNS
+from sackigami.leaders import LEADER_NAMES, Leaderboards
+from sackigami.teams import team_name, with_team_names
+
+SITE_VERSION: int = 1
+"""Version of the page layout. Bumping it rebuilds every page."""
+
+GAME_COLUMNS: tuple[str, ...] = (
+    "season",
+    "week",
+    "team",
+    "opponent_team",
+) + SACK_STAT_COLUMNS
+"""Columns of a game in the tables of the site."""
+
+
+@dataclass(frozen=True)
+class Page:
+    path: str
+    """Path of the page relative to the site without suffix."""
+
+    title: str
+    """Title of the page."""
+
+    columns: tuple[str, ...]
+    """Columns of the table."""
+
+    rows: list[tuple[Any, ...]] = field(hash=False)
+    """Rows of the table."""
+
+    links: tuple[tuple[str, str], ...] = ()
+    """Paths and titles of linked pages."""
+
+    def digest(self) -> str:
+        """Content hash of everything the page is rendered from.
+
+        Returns:
+            str: The hex digest.
+        """
+        content: str = json.dumps(
+            [SITE_VERSION, self.title, self.columns, self.rows, self.links],
+            default=str,
+        )
+        return hashlib.sha256(content.encode()).hexdigest()
+
+    def render(self) -> str:
+        """Renders the page as HTML.
+
+        Returns:
+            str: The HTML document.
+        """
+        depth: str = "../" * self.path.count("/")
+        title: str = html.escape(self.title)
+        lines: list[str] = [
+            "<!DOCTYPE html>",
+            f'<html><head><meta charset="utf-8"><title>{title}</title></head><body>',
+            f'<p><a href="{depth}index.html">Sackigami!</a></p>',
+            f"<h1>{title}</h1>",
+        ]
+
+        if self.links:
+            lines.append("<ul>")
+            lines.extend(
+                f'<li><a href="{depth}{html.escape(path)}.html">{html.escape(name)}</a></li>'
+                for path, name in self.links
+            )
+            lines.append("</ul>")
+
+        if self.columns:
+            lines.append("<table>")
+            lines.append(
+                "<tr>"
+                + "".join(f"<th>{html.escape(column)}</th>" for column in self.columns)
+                + "</tr>"
+            )
+            lines.extend(
+                "<tr>"
+                + "".join(f"<td>{html.escape(str(value))}</td>" for value in row)
+                + "</tr>"
+                for row in self.rows
+            )
+            lines.append("</table>")
+
+        lines.append("</body></html>")
+        return "\n".join(lines)
+
+    def as_json(self) -> str:
+        """The data of the page as JSON.
+
+        Returns:
+            str: List of the rows as objects.
+        """
+        return json.dumps(
+            [dict(zip(self.columns, row)) for row in self.rows], default=str
+        )
+
+
+def write_page(directory: Path, page: Page) -> None:
+    """Writes the HTML and JSON file of a page.
+
+    Args:
+        directory (Path): Directory of the site.
+        page (Page): The page.
+    """
+    path: Path = directory / page.path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.with_suffix(".html").write_text(page.render())
+    path.with_suffix(".json").write_text(page.as_json())
+
+
+def combination_path(stat_line: dict[str, Any]) -> str:
+    """Path of the page of a stat line combination.
+
+    Args:
+        stat_line (dict[str, Any]): A stat line with the sack stat columns.
+
+    Returns:
+        str: The path.
+    """
+    return "combinations/" + "-".join(
+        str(abs(stat_line[column])) for column in SACK_STAT_COLUMNS
+    )
+
+
+def site_pages(
+    complete_team_stats: pl.DataFrame,
+    posted: list[dict[str, int | str]],
+    leaderboard_size: int = 50,
+) -> list[Page]:
+    """Derives every page of the site from the history and the posted games.
+
+    Args:
+        complete_team_stats (pl.DataFrame): Complete team stats.
+        posted (list[dict[str, int | str]]): Games in the save file.
+        leaderboard_size (int, optional): Amount of games per leaderboard. Defaults to 50.
+
+    Returns:
+        list[Page]: The pages, the index last.
+    """
+    posted_keys: set[tuple[Any, ...]] = {
+        (game["season"], game["week"], game["team"]) for game in posted
+    }
+    games: pl.DataFrame = (
+        with_team_names(complete_team_stats.lazy().select(GAME_COLUMNS))
+        .with_columns(
+            (pl.int_range(pl.len()).over(SACK_STAT_COLUMNS) == 0).alias("sackigami"),
+            pl.len().over(SACK_STAT_COLUMNS).alias("occurrences"),
+        )
+        .collect()
+    )
+    pages: list[Page] = []
+
+    teams: list[tuple[str, str]] = []
+    for (franchise,), team_games in sorted(
+        games.partition_by("franchise", as_dict=True).items()
+    ):
+        teams.append((f"teams/{franchise}", team_name(franchise)))
+        pages.append(
+            Page(
+                f"teams/{franchise}",
+                f"Sack history of the {team_name(franchise)}",
+                GAME_COLUMNS,
+                team_games.select(GAME_COLUMNS).rows(),
+            )
+        )
+
+    boards = Leaderboards(complete_team_stats, leaderboard_size)
+    leaders: list[tuple[str, str]] = []
+    for column, name in LEADER_NAMES.items():
+        leaders.append((f"leaders/{column}", f"Most {name}"))
+        pages.append(
+            Page(
+                f"leaders/{column}",
+                f"Most {name} in a game",
+                ("rank", name, "season", "week", "team", "opponent_team"),
+                [
+                    (rank, *entry)
+                    for rank, entry in enumerate(boards.leaders(column), 1)
+                ],
+            )
+        )
+
+    archive: pl.DataFrame = games.filter(pl.col("sackigami")).select(GAME_COLUMNS)
+    pages.append(
+        Page(
+            "sackigamis",
+            "Sackigami! archive",
+            GAME_COLUMNS + ("posted",),
+            [
+                (*row, "yes" if tuple(row[:3]) in posted_keys else "")
+                for row in archive.rows()
+            ],
+        )
+    )
+
+    combinations: list[tuple[str, str]] = []
+    for key, combination_games in games.partition_by(
+        SACK_STAT_COLUMNS, as_dict=True
+    ).items():
+        path: str = combination_path(dict(zip(SACK_STAT_COLUMNS, key)))
+        title: str = (
+            f"{key[0]} sacks, {abs(key[1])} yards, {key[2]} strip-sacks, {key[3]} lost"
+        )
+        combinations.append((path, f"{title} ({combination_games.height}x)"))
+        pages.append(
+            Page(
+                path, title, GAME_COLUMNS, combination_games.select(GAME_COLUMNS).rows()
+            )
+        )
+    combinations.sort()
+    pages.append(
+        Page("combinations", "Every stat line combination", (), [], tuple(combinations))
+    )
+
+    pages.append(
+        Page(
+            "index",
+            "Sackigami!",
+            (),
+            [],
+            (
+                ("sackigamis", "Sackigami! archive"),
+                ("combinations", "Every stat line combination"),
+                *leaders,
+                *teams,
+            ),
+        )
+    )
+    return pages
+
+
+@dataclass
+class SiteBuild:
+    written: int
+    """Amount of pages (re)generated."""
+
+    unchanged: int
+    """Amount of pages skipped since their content hash did not change."""
+
+    removed: int
+    """Amount of pages of an earlier build that no longer exist."""
+
+
+def build_site(
+    pages: list[Page],
+    directory: Path = BOT_CONF.site_dir,
+    workers: Optional[int] = None,
+) -> SiteBuild:
+    """Writes the pages whose content hash changed since the last build.
+
+    The hashes of the last build are kept in manifest.json of the site. The
+    changed pages are rendered in parallel on a process pool.
+
+    Args:
+        pages (list[Page]): Every page of the site.
+        directory (Path, optional): Directory of the site. Defaults to BOT_CONF.site_dir.
+        workers (Optional[int], optional): Amount of processes. One per core if None, in process if 1. Defaults to None.
+
+    Returns:
+        SiteBuild: Amount of written, unchanged and removed pages.
+    """
+    manifest_path: Path = directory / "manifest.json"
+    previous: dict[str, str] = (
+        json.loads(manifest_path.read_text()) if manifest_path.exists() else {}
+    )
+    digests: dict[str, str] = {page.path: page.digest() for page in pages}
+
+    changed: list[Page] = [
+        page
+        for page in pages
+        if previous.get(page.path) != digests[page.path]
+        or not (directory / page.path).with_suffix(".html").exists()
+    ]
+
+    if workers == 1:
+        for page in changed:
+            write_page(directory, page)
+    else:
+        # polars is multithreaded, forking it may deadlock
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            list(
+                executor.map(
+                    write_page,
+                    [directory] * len(changed),
+                    changed,
+                    chunksize=max(len(changed) // 64, 1),
+                )
+            )
+
+    removed: list[str] = [path for path in previous if path not in digests]
+    for path in removed:
+        for suffix in (".html", ".json"):
+            (directory / path).with_suffix(suffix).unlink(missing_ok=True)
+
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(json.dumps(digests, indent=1, sort_keys=True))
+
+    return SiteBuild(
+        written=len(changed),
+        unchanged=len(pages) - len(changed),
+        removed=len(removed),
+    )
@@ -1,32 +1,106 @@
+from functools import lru_cache
+from typing import Any, Optional
+
 import requests
 import tweepy
 
-from sackigami.constants import API_CRED
+from sackigami.constants import API_CRED, BOT_CONF, X_API_URL, APICred
+
+
+class BaseURLSession(requests.Session):
+    """Session sending requests for the X API to another base URL.
+
+    tweepy always requests the real X API, so the base URL is swapped on the
+    way out.
+    """
+
+    def __init__(self, base_url: str) -> None:
+        super().__init__()
+        self.base_url: str = base_url.rstrip("/")
+
+    def request(self, method: str | bytes, url: str | bytes, *args: Any, **kwargs: Any) -> requests.Response:  # type: ignore[override]
+        if isinstance(url, str) and url.startswith(X_API_URL):
+            url = self.base_url + url.removeprefix(X_API_URL)
+        return super().request(method, url, *args, **kwargs)
 
 
-def connect_to_client() -> tweepy.Client:
+@lru_cache(maxsize=8)
+def connect_to_client(
+    cred: APICred = API_CRED, base_url: str = BOT_CONF.api_base_url
+) -> tweepy.Client:
     """Connect to the tweepy/X client.
 
+    The client waits out rate limits instead of failing. Clients are reused
+    per account and base URL, so their session is only set up once.
+
+    Args:
+        cred (APICred, optional): Credentials of the account. Defaults to API_CRED.
+        base_url (str, optional): Base URL of the X API. Defaults to BOT_CONF.api_base_url.
+
     Returns:
         tweepy.Client: The connected client.
     """
-    return tweepy.Client(
-        consumer_key=API_CRED.api_key,
-        consumer_secret=API_CRED.api_secret,
-        access_token=API_CRED.access_token,
-        access_token_secret=API_CRED.access_secret,
+    client = tweepy.Client(
+        consumer_key=cred.api_key,
+        consumer_secret=cred.api_secret,
+        access_token=cred.access_token,
+        access_token_secret=cred.access_secret,
+        wait_on_rate_limit=True,
     )
+    if base_url.rstrip("/") != X_API_URL:
+        client.session = BaseURLSession(base_url)
+    return client
 
 
-def post(text: str) -> requests.Response:
+def post(
+    text: str,
+    in_reply_to: Optional[int | str] = None,
+    cred: APICred = API_CRED,
+    base_url: str = BOT_CONF.api_base_url,
+) -> requests.Response:
     """Post a post on X.
 
     Args:
         text (str): Text to post.
+        in_reply_to (Optional[int | str], optional): Id of the post to reply to. A standalone post if None. Defaults to None.
+        cred (APICred, optional): Credentials of the account. Defaults to API_CRED.
+        base_url (str, optional): Base URL of the X API. Defaults to BOT_CONF.api_base_url.
 
     Returns:
         requests.Response: Response by the client.
     """
-    client: tweepy.Client = connect_to_client()
-    response: requests.Response = client.create_tweet(text=text)
+    client: tweepy.Client = connect_to_client(cred, base_url)
+    response: requests.Response = client.create_tweet(
+        text=text, in_reply_to_tweet_id=in_reply_to
+    )
     return response
+
+
+def post_thread(
+    texts: list[str],
+    cred: APICred = API_CRED,
+    base_url: str = BOT_CONF.api_base_url,
+    ids: Optional[list[str]] = None,
+) -> list[str]:
+    """Post several posts as a reply chain on X.
+
+    Args:
+        texts (list[str]): Texts to post, in order.
+        cred (APICred, optional): Credentials of the account. Defaults to API_CRED.
+        base_url (str, optional): Base URL of the X API. Defaults to BOT_CONF.api_base_url.
+        ids (Optional[list[str]], optional): List the id of every post is appended to as soon as it succeeded, so a caller knows how far a failed thread got. A new list if None. Defaults to None.
+
+    Returns:
+        list[str]: Ids of the posts.
+    """
+    client: tweepy.Client = connect_to_client(cred, base_url)
+    if ids is None:
+        ids = []
+
+    for text in texts:
+        response = client.create_tweet(
+            text=text, in_reply_to_tweet_id=ids[-1] if ids else None
+        )
+        ids.append(response.data["id"])
+
+    return ids
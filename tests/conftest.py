@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def run_in_tmp_path(tmp_path, monkeypatch):
+    # The default save, lock and cache paths are relative, keep them out of the checkout
+    monkeypatch.chdir(tmp_path)
+    # Run locks taken in the directory of an earlier test do not cover this one
+    monkeypatch.setattr("sackigami.bot._RUNS", {})
@@ -0,0 +1,51 @@
+import polars as pl
+import pytest
+from batch import answer_stat_lines, scan_stat_lines, write_results
+from teams import SackStatLine, find_similar_stat_lines
+from test_history import random_stats
+from test_teams import complete_stats
+
+
+@pytest.fixture
+def stat_lines() -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "sacks_suffered": [7, 2, 11],
+            "sack_yards_lost": [-45, -12, -99],
+            "sack_fumbles": [3, 1, 0],
+            "sack_fumbles_lost": [2, 0, 0],
+        }
+    )
+
+
+@pytest.mark.parametrize("suffix", [".csv", ".parquet", ".jsonl"])
+def test_round_trip(stat_lines, complete_stats, tmp_path, suffix):
+    input_path = tmp_path / f"lines{suffix}"
+    output_path = tmp_path / f"results{suffix}"
+    write_results(stat_lines.lazy(), input_path)
+
+    write_results(
+        answer_stat_lines(scan_stat_lines(input_path), complete_stats), output_path
+    )
+
+    results = scan_stat_lines(output_path).collect()
+    assert results["count"].to_list()[0] == 4
+    assert results["count"].to_list()[2] == 0
+    assert results["last_season"].to_list()[0] == 2025
+    assert results["last_season"].to_list()[2] is None
+
+
+def test_matches_find_similar_stat_lines(random_stats):
+    lines = random_stats.tail(50)
+
+    results = answer_stat_lines(lines.lazy(), random_stats).collect()
+
+    for line, result in zip(lines.iter_rows(named=True), results.iter_rows(named=True)):
+        # find_similar_stat_lines leaves the line itself out
+        similar = find_similar_stat_lines(random_stats, SackStatLine.from_dict(line))
+        assert result["count"] == (0 if similar is None else similar.count) + 1
+
+
+def test_unsupported_file_type(tmp_path):
+    with pytest.raises(ValueError):
+        scan_stat_lines(tmp_path / "lines.xlsx")
@@ -1,18 +1,29 @@
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 import polars as pl
 import pytest
 from bot import (
+    Evaluation,
+    WeekContext,
+    catch_up,
     create_string,
     has_been_posted,
     load_game_from_json,
     loop_over_week,
     no_sack_average,
     post,
+    post_evaluation,
+    post_no_sacks,
+    post_week,
+    post_weeks,
     save_game_to_json,
     set_correct_path,
 )
+from expected import ExpectedFrequency
+from history import DominatingStatLines, PartitionedStatLines
+from leaders import LeaderRank
+from surprise import Surprise
 from teams import GameDay, SackStatLine, SimilarStatLines, retrieve_weekly_stats
 from test_teams import complete_stats, complete_stats_no_repeats
 
@@ -61,6 +72,18 @@ class TestSaveGameToJsonAndLoadGameFromJson:
         assert save_path.exists()
         assert [game.as_dict(), game.as_dict()] == load_game_from_json(None, save_path)
 
+    def test_load_after_change(self, game, tmp_path):
+        save_path = tmp_path / "games.json"
+        save_game_to_json(game, None, save_path)
+        loaded = load_game_from_json(None, save_path)
+        loaded.append({})
+
+        assert load_game_from_json(None, save_path) == [game.as_dict()]
+
+        save_path.write_text("[]")
+
+        assert load_game_from_json(None, save_path) == []
+
 
 class TestCreateString:
     def test_no_sackigami(self, game, similar_not_none):
@@ -113,6 +136,150 @@ class TestCreateString:
 
         assert created == expected
 
+    def test_dominating(self, game):
+        dominating = DominatingStatLines(GameDay(2011, 3), 2)
+
+        created: str = create_string(game, None, dominating, limit=1000)
+
+        assert created.endswith(
+            "A game at least this bad has happened 2 times before. "
+            "Most recently in week 3 of the 2011 season."
+        )
+
+    def test_partitioned(self, game, similar_not_none):
+        partitioned = PartitionedStatLines(
+            team=SimilarStatLines(GameDay(2011, 3), 2),
+            matchup=SimilarStatLines(GameDay(2011, 3), 1),
+        )
+
+        created: str = create_string(
+            game, similar_not_none, partitioned=partitioned, limit=1000
+        )
+
+        assert created.endswith(
+            "The Washington Commanders did this 2 times before. "
+            "Most recently in week 3 of the 2011 season.\n"
+            "1 of those was against the Baltimore Ravens."
+        )
+
+    def test_partitioned_first_for_team(self, game, similar_not_none):
+        partitioned = PartitionedStatLines(team=None, matchup=None)
+
+        created: str = create_string(
+            game, similar_not_none, partitioned=partitioned, limit=1000
+        )
+
+        assert created.endswith("This is a first for the Washington Commanders.")
+
+    def test_expected(self, game, similar_not_none):
+        rare = create_string(
+            game, similar_not_none, expected=ExpectedFrequency(40.2, False), limit=1000
+        )
+        never = create_string(
+            game, None, expected=ExpectedFrequency(367.6, True), limit=1000
+        )
+        common = create_string(
+            game, similar_not_none, expected=ExpectedFrequency(0.25, False), limit=1000
+        )
+
+        assert "expected about once every 40 seasons" in rare
+        assert "expected less than once every 368 seasons" in never
+        assert "expected about 4 times per season" in common
+
+    def test_leader(self, game, similar_not_none):
+        most = create_string(
+            game,
+            similar_not_none,
+            leader=LeaderRank("sack_yards_lost", 1, 1999),
+            limit=1000,
+        )
+        seventh = create_string(
+            game,
+            similar_not_none,
+            leader=LeaderRank("sacks_suffered", 7, 1999),
+            limit=1000,
+        )
+
+        assert most.endswith("This is the most sack yards lost in a game since 1999.")
+        assert seventh.endswith(
+            "This is the 7th-most sacks suffered in a game since 1999."
+        )
+
+    def test_surprise(self, game, similar_not_none):
+        created = create_string(
+            game, similar_not_none, surprise=Surprise(1.5, 3.04), limit=1000
+        )
+
+        assert created.endswith(
+            "Against the Baltimore Ravens only 1.5 sacks were expected, "
+            "this is 3.0 standard deviations more."
+        )
+
+
+class TestPostLength:
+    @pytest.fixture
+    def worst_case(self) -> SackStatLine:
+        return SackStatLine.from_dict(
+            {
+                "season": 2025,
+                "week": 18,
+                "team": "WAS",
+                "opponent_team": "SF",
+                "sacks_suffered": 12,
+                "sack_yards_lost": -105,
+                "sack_fumbles": 3,
+                "sack_fumbles_lost": 2,
+            }
+        )
+
+    def test_fits_post_length(self, worst_case):
+        created: str = create_string(
+            worst_case,
+            SimilarStatLines(GameDay(2013, 17), 12),
+            DominatingStatLines(GameDay(2013, 17), 145),
+            PartitionedStatLines(
+                team=SimilarStatLines(GameDay(2011, 13), 10),
+                matchup=SimilarStatLines(GameDay(2011, 13), 2),
+            ),
+            ExpectedFrequency(0.25, False),
+            LeaderRank("sack_yards_lost", 10, 1999),
+            Surprise(1.5, 3.04),
+        )
+
+        assert len(created) <= 280
+        assert (
+            "The Washington Commanders suffered 12 sacks against the San Francisco 49ers for a total of 105 yards lost."
+            in created
+        )
+        assert created.endswith(
+            "This has happened 12 times before. Most recently in week 17 of the 2013 season."
+        )
+
+    def test_priority(self, worst_case):
+        core: str = create_string(worst_case, None)
+        dominating: str = (
+            "A game at least this bad has happened 145 times before. "
+            "Most recently in week 17 of the 2013 season."
+        )
+        extras: dict[str, Any] = {
+            "dominating": DominatingStatLines(GameDay(2013, 17), 145),
+            "expected": ExpectedFrequency(367.6, True),
+            "leader": LeaderRank("sacks_suffered", 1, 1999),
+        }
+
+        created: str = create_string(
+            worst_case, None, **extras, limit=len(core) + 1 + len(dominating)
+        )
+        skipped: str = create_string(
+            worst_case, None, **extras, limit=len(core) + 1 + 55
+        )
+
+        assert created == core + "\n" + dominating
+        # Later sentences still fill up the space a longer one left
+        assert (
+            skipped == core + "\nThis is the most sacks suffered in a game since 1999."
+        )
+
 
 class TestHasBeenPosted:
     def test_has_not_been_posted(self, game, tmp_path):
@@ -127,6 +294,36 @@ class TestHasBeenPosted:
         assert has_been_posted(game, None, save_path)
 
 
+class TestPostEvaluation:
+    def test_all_sentences_posted(self, capsys, game, similar_not_none, tmp_path):
+        evaluation = Evaluation(
+            sack_stat_line=game,
+            similar=similar_not_none,
+            dominating=None,
+            partitioned=PartitionedStatLines(team=None, matchup=None),
+            expected=ExpectedFrequency(40.2, False),
+            leader=LeaderRank("sack_yards_lost", 1, 1999),
+            surprise=Surprise(1.5, 3.04),
+        )
+
+        post_evaluation(evaluation, None, tmp_path / "games.json", limit=1000)
+        out: str = capsys.readouterr().out
+
+        assert "expected about once every 40 seasons" in out
+        assert "This is the most sack yards lost in a game since 1999." in out
+        assert "only 1.5 sacks were expected" in out
+
+    def test_week_posts_leader(self, capsys, complete_stats_no_repeats):
+        post_week(
+            WeekContext(
+                complete_stats_no_repeats,
+                retrieve_weekly_stats(complete_stats_no_repeats),
+            )
+        )
+
+        assert "in a game since 1999." in capsys.readouterr().out
+
+
 # TODO: Add test for no sackigami
 class TestLoopOverWeek:
     def test_sackigami(self, capsys, complete_stats_no_repeats):
@@ -139,6 +336,91 @@ class TestLoopOverWeek:
         assert "No Sackigami!" not in captured.out
 
 
+def test_week_context_shared(capsys, complete_stats_no_repeats):
+    context = WeekContext(
+        complete_stats_no_repeats, retrieve_weekly_stats(complete_stats_no_repeats)
+    )
+
+    post_week(context)
+    indexes = context.indexes
+    post_no_sacks(context)
+
+    captured: pytest.capture.CapturedResults = capsys.readouterr()
+
+    assert context.indexes is indexes
+    assert "Sackigami!" in captured.out
+    assert "did not surrender a sack this week" in captured.out
+
+
+class TestCatchUp:
+    def test_history_up_to_gameday(self, complete_stats_no_repeats):
+        context = WeekContext(
+            complete_stats_no_repeats, retrieve_weekly_stats(complete_stats_no_repeats)
+        )
+        gamedays = [
+            GameDay(*row)
+            for row in complete_stats_no_repeats.select("season", "week")
+            .unique(maintain_order=True)
+            .tail(3)
+            .rows()
+        ]
+
+        contexts = catch_up(context, gamedays)
+
+        assert len(contexts) == 3
+        assert contexts[-1].complete_team_stats.equals(complete_stats_no_repeats)
+        for gameday, caught_up in zip(gamedays, contexts):
+            last = caught_up.complete_team_stats.select("season", "week").row(-1)
+            assert last == (gameday.season, gameday.week)
+            assert caught_up.week.select("season", "week").unique().rows() == [last]
+
+    def test_indexes_advanced(self, complete_stats_no_repeats):
+        context = WeekContext(
+            complete_stats_no_repeats, retrieve_weekly_stats(complete_stats_no_repeats)
+        )
+        gamedays = [
+            GameDay(*row)
+            for row in complete_stats_no_repeats.select("season", "week")
+            .unique(maintain_order=True)
+            .tail(3)
+            .rows()
+        ]
+
+        contexts = catch_up(context, gamedays)
+        indexes = contexts[0].indexes
+
+        assert contexts[1].indexes is indexes
+        assert contexts[2].indexes is indexes
+        # Used again, an earlier game day gets indexes of its own history
+        assert contexts[0].indexes is not indexes
+        for stat_line in complete_stats_no_repeats.iter_rows(named=True):
+            sack_stat_line = SackStatLine.from_dict(stat_line)
+            assert indexes.partitions.find_partitioned_stat_lines(
+                sack_stat_line
+            ) == context.indexes.partitions.find_partitioned_stat_lines(sack_stat_line)
+            assert indexes.fingerprints.find_similar_stat_lines(
+                sack_stat_line
+            ) == context.indexes.fingerprints.find_similar_stat_lines(sack_stat_line)
+
+    def test_posts_in_order(self, capsys, complete_stats_no_repeats):
+        context = WeekContext(
+            complete_stats_no_repeats, retrieve_weekly_stats(complete_stats_no_repeats)
+        )
+        gamedays = [
+            GameDay(*row)
+            for row in complete_stats_no_repeats.select("season", "week")
+            .unique(maintain_order=True)
+            .tail(2)
+            .rows()
+        ]
+
+        post_weeks(catch_up(context, gamedays))
+        out: str = capsys.readouterr().out
+
+        # Week 13 is decided against the history up to itself and posted first
+        assert out.index("suffered 8 sacks") < out.index("suffered 6 sacks")
+
+
 def test_no_sack_average():
     length: int = 17
     seasons: list[int] = [2025 for _ in range(length * 2)]
@@ -0,0 +1,149 @@
+from dataclasses import asdict
+
+import polars as pl
+from changes import (
+    detect_changes,
+    diff_snapshots,
+    post_changes,
+    refresh_dominance_index,
+    snapshot,
+    store_snapshot,
+)
+from history import DominanceIndex, PartitionIndex
+from teams import SackStatLine
+from test_history import random_stats
+from test_teams import complete_stats, complete_stats_no_repeats
+
+
+def correct(complete_team_stats: pl.DataFrame, row: int, **stats) -> pl.DataFrame:
+    return complete_team_stats.with_columns(
+        pl.when(pl.int_range(pl.len()) == row)
+        .then(pl.lit(value))
+        .otherwise(pl.col(column))
+        .alias(column)
+        for column, value in stats.items()
+    )
+
+
+class TestDiffSnapshots:
+    def test_inserted_updated_deleted(self, random_stats):
+        previous = snapshot(random_stats.head(-2))
+        current = snapshot(correct(random_stats, 5, sack_yards_lost=-61)).slice(1)
+
+        changes = diff_snapshots(previous, current)
+
+        assert changes.inserted.to_dicts() == random_stats.tail(2).to_dicts()
+        assert changes.updated.to_dicts() == current.slice(4, 1).to_dicts()
+        assert changes.previous.to_dicts() == random_stats.slice(5, 1).to_dicts()
+        assert changes.deleted.to_dicts() == random_stats.head(1).to_dicts()
+
+    def test_no_changes(self, random_stats):
+        assert diff_snapshots(snapshot(random_stats), snapshot(random_stats)).is_empty()
+
+
+def test_detect_changes(complete_stats, tmp_path):
+    first = detect_changes(complete_stats, tmp_path)
+
+    assert first.inserted.height == 2
+    assert first.updated.is_empty()
+    # Nothing is stored until the changes are posted
+    assert detect_changes(complete_stats, tmp_path).inserted.height == 2
+
+    store_snapshot(complete_stats, DominanceIndex(complete_stats), tmp_path)
+    second = detect_changes(correct(complete_stats, 0, sack_fumbles=4), tmp_path)
+
+    assert second.inserted.is_empty()
+    assert second.updated.row(0, named=True)["sack_fumbles"] == 4
+
+
+def test_refresh_matches_full_build(random_stats):
+    corrected = correct(random_stats, 10, sacks_suffered=8, sack_yards_lost=-60)
+    index = PartitionIndex(random_stats)
+
+    index.refresh(
+        diff_snapshots(snapshot(random_stats), snapshot(corrected)).affected(),
+        corrected,
+    )
+
+    expected = PartitionIndex(corrected)
+    for stat_line in corrected.iter_rows(named=True):
+        line = SackStatLine.from_dict(stat_line)
+        assert index.find_partitioned_stat_lines(
+            line
+        ) == expected.find_partitioned_stat_lines(line)
+
+
+def assert_same_dominance(index, expected, complete_team_stats):
+    def fields(dominating):
+        if dominating is None:
+            return None
+        return dominating.count, asdict(dominating.last_gameday)
+
+    for stat_line in complete_team_stats.iter_rows(named=True):
+        line = SackStatLine.from_dict(stat_line)
+        assert fields(index.find_dominating_stat_lines(line)) == fields(
+            expected.find_dominating_stat_lines(line)
+        )
+
+
+class TestRefreshDominanceIndex:
+    def test_matches_full_build(self, random_stats, tmp_path, monkeypatch):
+        previous = random_stats.head(-10)
+        store_snapshot(previous, DominanceIndex(previous), tmp_path)
+        # Stats of another game, so the grid keeps its axes
+        other = random_stats.row(20, named=True)
+        corrected = correct(
+            random_stats,
+            10,
+            sacks_suffered=other["sacks_suffered"],
+            sack_yards_lost=other["sack_yards_lost"],
+        ).head(-2)
+        changes = detect_changes(corrected, tmp_path)
+        expected = DominanceIndex(corrected)
+
+        def no_rebuild(*args):
+            raise AssertionError("Rebuilt instead of refreshed")
+
+        index = DominanceIndex.load(tmp_path)
+        monkeypatch.setattr(DominanceIndex, "_build", no_rebuild)
+        index.refresh(changes.removed(), changes.added(), corrected)
+
+        assert changes.updated.height == 1 and changes.inserted.height == 8
+        assert index.version == expected.version
+        assert_same_dominance(index, expected, corrected)
+
+    def test_deleted_games(self, random_stats, tmp_path):
+        store_snapshot(random_stats, DominanceIndex(random_stats), tmp_path)
+        shortened = random_stats.slice(3)
+
+        index = refresh_dominance_index(
+            shortened, detect_changes(shortened, tmp_path), tmp_path
+        )
+
+        assert_same_dominance(index, DominanceIndex(shortened), shortened)
+
+    def test_stale_index_rebuilt(self, random_stats, tmp_path):
+        previous = random_stats.head(-10)
+        store_snapshot(previous, DominanceIndex(previous), tmp_path)
+        # An interrupted refresh stored the index but not the snapshot
+        DominanceIndex(random_stats).save(tmp_path)
+
+        index = refresh_dominance_index(
+            random_stats, detect_changes(random_stats, tmp_path), tmp_path
+        )
+
+        assert_same_dominance(index, DominanceIndex(random_stats), random_stats)
+
+
+def test_post_changes_flags_corrections(capsys, complete_stats_no_repeats):
+    corrected = correct(
+        complete_stats_no_repeats, 3, sacks_suffered=11, sack_yards_lost=-99
+    )
+    changes = diff_snapshots(snapshot(complete_stats_no_repeats), snapshot(corrected))
+
+    flagged = post_changes(changes, corrected)
+
+    captured = capsys.readouterr()
+    assert len(flagged) == 1
+    assert "Flagged correction" in captured.out
+    assert "newly qualifies" in captured.out
@@ -0,0 +1,90 @@
+import digest
+import pytest
+from bot import WeekContext, load_game_from_json
+from digest import create_digest, pack_posts, post_digest
+from teams import retrieve_weekly_stats
+from test_teams import complete_stats_no_repeats
+
+
+class TestPackPosts:
+    def test_fits_limit(self):
+        entries = [f"{i}" * length for i, length in enumerate([90, 50, 120, 40, 80])]
+
+        posts = pack_posts("Header", entries, limit=140)
+
+        assert all(len(post) <= 140 for post in posts)
+        assert len(posts) == 3
+        assert posts[0].startswith("Header\n")
+        lines = [line for post in posts for line in post.split("\n")]
+        assert sorted(lines[1:]) == sorted(entries)
+
+    def test_single_post(self):
+        assert pack_posts("Header", ["a", "b"]) == ["Header\na\nb"]
+
+    def test_entry_too_long(self):
+        with pytest.raises(ValueError):
+            pack_posts("Header", ["a" * 300])
+
+
+def test_create_digest(complete_stats_no_repeats):
+    context = WeekContext(
+        complete_stats_no_repeats, retrieve_weekly_stats(complete_stats_no_repeats)
+    )
+
+    posts, evaluations = create_digest(context)
+
+    assert len(posts) == 1
+    assert posts[0].startswith("Sackigami! digest for week 16 of the 2025 season")
+    assert len(evaluations) == 2
+    assert "Sackigami!" in posts[0].split("\n")[1]
+
+
+def test_post_digest(capsys, complete_stats_no_repeats):
+    post_digest(
+        WeekContext(
+            complete_stats_no_repeats,
+            retrieve_weekly_stats(complete_stats_no_repeats),
+        )
+    )
+
+    captured: pytest.capture.CapturedResults = capsys.readouterr()
+
+    assert "Sackigami! digest" in captured.out
+
+
+def test_create_digest_reserved(tmp_path, complete_stats_no_repeats):
+    path = tmp_path / "posted.json"
+    context = WeekContext(
+        complete_stats_no_repeats, retrieve_weekly_stats(complete_stats_no_repeats)
+    )
+
+    _, evaluations = create_digest(context, reserve=path)
+    assert len(evaluations) == 2
+    assert len(load_game_from_json(None, path)) == 2
+
+    _, evaluations = create_digest(context, reserve=path)
+    assert evaluations == []
+
+
+def test_post_digest_failed_thread_released(
+    tmp_path, monkeypatch, complete_stats_no_repeats
+):
+    path = tmp_path / "posted.json"
+
+    def fail(texts, ids=None, **kwargs):
+        assert len(load_game_from_json(None, path)) == 2
+        raise ConnectionError("Rate limited")
+
+    monkeypatch.setattr(digest, "set_correct_path", lambda *args: path)
+    monkeypatch.setattr(digest, "offline_test", lambda: False)
+    monkeypatch.setattr(digest.x, "post_thread", fail)
+
+    with pytest.raises(ConnectionError):
+        post_digest(
+            WeekContext(
+                complete_stats_no_repeats,
+                retrieve_weekly_stats(complete_stats_no_repeats),
+            )
+        )
+
+    assert load_game_from_json(None, path) == []
@@ -0,0 +1,72 @@
+import polars as pl
+import pytest
+from expected import ExpectedFrequencyModel
+from test_history import random_stats
+
+
+def brute_force_rate(simulated: pl.DataFrame, stat_line: dict) -> float:
+    return (
+        simulated.filter(
+            pl.col("sacks_suffered") >= stat_line["sacks_suffered"],
+            pl.col("sack_yards_lost") >= abs(stat_line["sack_yards_lost"]),
+            pl.col("sack_fumbles") >= stat_line["sack_fumbles"],
+            pl.col("sack_fumbles_lost") >= stat_line["sack_fumbles_lost"],
+        ).height
+        / simulated.height
+    )
+
+
+class TestExpectedFrequencyModel:
+    def test_reproducible(self, random_stats):
+        first = ExpectedFrequencyModel(random_stats, samples=5000, seed=1)
+        second = ExpectedFrequencyModel(random_stats, samples=5000, seed=1)
+
+        assert first._simulated.equals(second._simulated)
+
+    def test_matches_history(self, random_stats):
+        model = ExpectedFrequencyModel(random_stats, samples=20000)
+        simulated = model._simulated
+
+        assert (
+            abs(
+                simulated["sacks_suffered"].mean()
+                - random_stats["sacks_suffered"].mean()
+            )
+            < 0.1
+        )
+        assert (simulated["sack_fumbles_lost"] <= simulated["sack_fumbles"]).all()
+        assert (simulated["sack_fumbles"] <= simulated["sacks_suffered"]).all()
+
+    def test_expected_frequency(self, random_stats):
+        model = ExpectedFrequencyModel(random_stats, samples=20000)
+        stat_line = random_stats.row(0, named=True)
+
+        expected = model.expected_frequency(stat_line)
+
+        rate = brute_force_rate(model._simulated, stat_line)
+        assert not expected.lower_bound
+        assert expected.seasons == pytest.approx(1 / (rate * model.games_per_season))
+
+    def test_never_simulated(self, random_stats):
+        model = ExpectedFrequencyModel(random_stats, samples=1000)
+
+        expected = model.expected_frequency(
+            {
+                "sacks_suffered": 20,
+                "sack_yards_lost": -200,
+                "sack_fumbles": 5,
+                "sack_fumbles_lost": 5,
+            }
+        )
+
+        assert expected.lower_bound
+        assert expected.seasons == 1000 / model.games_per_season
+
+    def test_expected_frequencies(self, random_stats):
+        model = ExpectedFrequencyModel(random_stats, samples=5000)
+        week = random_stats.tail(10)
+
+        assert model.expected_frequencies(week) == [
+            model.expected_frequency(stat_line)
+            for stat_line in week.iter_rows(named=True)
+        ]
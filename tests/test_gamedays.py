@@ -0,0 +1,124 @@
+from datetime import datetime
+
+import polars as pl
+import pytest
+from gamedays import (
+    KICKOFF_TIMEZONE,
+    last_completed_gameday,
+    last_covered_gameday,
+    new_completed_gameday,
+    next_useful_run,
+    pending_gamedays,
+    save_last_run,
+)
+from teams import GameDay
+
+
+@pytest.fixture
+def schedule() -> pl.DataFrame:
+    return pl.DataFrame(
+        {
+            "season": [2025] * 5,
+            "week": [1, 1, 2, 2, 3],
+            "gameday": [
+                "2025-09-04",
+                "2025-09-07",
+                "2025-09-14",
+                "2025-09-15",
+                "2025-09-21",
+            ],
+            "gametime": ["20:20", "13:00", "13:00", "20:15", "13:00"],
+            "home_score": [24, 17, 20, None, None],
+            "away_score": [20, 10, 3, None, None],
+        }
+    )
+
+
+def test_last_completed_gameday(schedule):
+    gameday = last_completed_gameday(schedule)
+
+    assert (gameday.season, gameday.week) == (2025, 1)
+
+
+def test_no_completed_gameday(schedule):
+    assert last_completed_gameday(schedule.filter(pl.col("week") > 1)) is None
+
+
+def test_next_useful_run(schedule):
+    assert next_useful_run(schedule) == datetime(
+        2025, 9, 16, 0, 15, tzinfo=KICKOFF_TIMEZONE
+    )
+
+
+def test_next_useful_run_season_over(schedule):
+    assert next_useful_run(schedule.filter(pl.col("week") == 1)) is None
+
+
+def test_new_completed_gameday(schedule, tmp_path):
+    path = tmp_path / "last_run.json"
+
+    gameday = new_completed_gameday(schedule, path)
+    assert (gameday.season, gameday.week) == (2025, 1)
+
+    save_last_run(GameDay(2025, 1), path)
+
+    assert new_completed_gameday(schedule, path) is None
+
+
+class TestPendingGamedays:
+    @pytest.fixture
+    def complete_stats(self) -> pl.DataFrame:
+        return pl.DataFrame(
+            {
+                "season": [2024, 2024, 2025, 2025, 2025, 2025],
+                "week": [17, 18, 1, 1, 2, 3],
+                "team": ["T0", "T0", "T0", "T1", "T0", "T0"],
+            }
+        )
+
+    def test_after_last_run(self, complete_stats):
+        pending = pending_gamedays(complete_stats, GameDay(2024, 17))
+
+        assert [(gameday.season, gameday.week) for gameday in pending] == [
+            (2024, 18),
+            (2025, 1),
+            (2025, 2),
+            (2025, 3),
+        ]
+
+    def test_up_to_date(self, complete_stats):
+        assert pending_gamedays(complete_stats, GameDay(2025, 3)) == []
+
+    def test_first_run(self, complete_stats):
+        pending = pending_gamedays(complete_stats, None)
+
+        assert [(gameday.season, gameday.week) for gameday in pending] == [(2025, 3)]
+
+
+class TestLastCoveredGameday:
+    @pytest.fixture
+    def complete_stats(self) -> pl.DataFrame:
+        return pl.DataFrame(
+            {
+                "season": [2024] + [2025] * 6,
+                "week": [18, 1, 1, 1, 1, 2, 2],
+                "team": ["T0", "T0", "T1", "T2", "T3", "T0", "T1"],
+            }
+        )
+
+    def test_covered(self, schedule, complete_stats):
+        gamedays = [GameDay(2024, 18), GameDay(2025, 1)]
+
+        assert last_covered_gameday(complete_stats, schedule, gamedays) == (
+            GameDay(2025, 1)
+        )
+
+    def test_late_game_missing(self, schedule, complete_stats):
+        # The schedule has week 2 final, but only one of its games is in the data
+        schedule = schedule.with_columns(pl.col("home_score").fill_null(0))
+        gamedays = [GameDay(2025, 1), GameDay(2025, 2)]
+
+        assert last_covered_gameday(complete_stats, schedule, gamedays) == (
+            GameDay(2025, 1)
+        )
+        assert last_covered_gameday(complete_stats, schedule, gamedays[1:]) is None
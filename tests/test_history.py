@@ -0,0 +1,285 @@
+import random
+
+import polars as pl
+import pytest
+from history import (
+    DominanceIndex,
+    FingerprintCache,
+    FingerprintIndex,
+    HistoryIndexes,
+    PartitionIndex,
+    load_partition_index,
+)
+from teams import SackStatLine, find_similar_stat_lines
+from test_teams import complete_stats
+
+
+def brute_force_dominating(
+    complete_team_stats: pl.DataFrame, sack_stat_line: SackStatLine
+) -> list[dict]:
+    return complete_team_stats.filter(
+        (pl.col("sacks_suffered") >= sack_stat_line.suffered)
+        & (pl.col("sack_yards_lost").abs() >= abs(sack_stat_line.yards_lost))
+        & (pl.col("sack_fumbles") >= sack_stat_line.fumbles)
+        & (pl.col("sack_fumbles_lost") >= sack_stat_line.fumbles_lost)
+        & ~(
+            (pl.col("team") == sack_stat_line.team)
+            & (pl.col("season") == sack_stat_line.gameday.season)
+            & (pl.col("week") == sack_stat_line.gameday.week)
+        )
+    ).to_dicts()
+
+
+@pytest.fixture
+def random_stats() -> pl.DataFrame:
+    rng = random.Random(26)
+    length: int = 300
+    return pl.DataFrame(
+        {
+            "season": [2000 + i // 30 for i in range(length)],
+            "week": [1 + (i // 2) % 15 for i in range(length)],
+            "team": [f"T{i % 2}" for i in range(length)],
+            "opponent_team": [f"T{(i + 1) % 2}" for i in range(length)],
+            "sacks_suffered": [rng.randint(0, 8) for _ in range(length)],
+            "sack_yards_lost": [-rng.randint(0, 60) for _ in range(length)],
+            "sack_fumbles": [rng.randint(0, 3) for _ in range(length)],
+            "sack_fumbles_lost": [rng.randint(0, 2) for _ in range(length)],
+        }
+    )
+
+
+class TestDominanceIndex:
+    def test_existing_dominating_stat_lines(self, complete_stats):
+        sack_stat_line = SackStatLine.from_dict(complete_stats.row(-1, named=True))
+
+        dominating = DominanceIndex(complete_stats).find_dominating_stat_lines(
+            sack_stat_line
+        )
+
+        assert dominating is not None
+        assert dominating.count == 3
+        assert dominating.last_gameday.season == 2025
+        assert dominating.last_gameday.week == 16
+
+    def test_no_dominating_stat_lines(self, complete_stats):
+        sack_stat_line = SackStatLine.from_dict(
+            {
+                "season": 2025,
+                "week": 17,
+                "team": "WAS",
+                "opponent_team": "BAL",
+                "sacks_suffered": 7,
+                "sack_yards_lost": -46,
+                "sack_fumbles": 0,
+                "sack_fumbles_lost": 0,
+            }
+        )
+
+        dominance = DominanceIndex(complete_stats)
+
+        assert dominance.find_dominating_stat_lines(sack_stat_line) is None
+
+    def test_matches_brute_force(self, random_stats):
+        complete_team_stats = random_stats
+        dominance = DominanceIndex(complete_team_stats)
+
+        for stat_line in complete_team_stats.sample(50, seed=26).iter_rows(named=True):
+            sack_stat_line = SackStatLine.from_dict(stat_line)
+            expected = brute_force_dominating(complete_team_stats, sack_stat_line)
+
+            dominating = dominance.find_dominating_stat_lines(sack_stat_line)
+
+            if not expected:
+                assert dominating is None
+            else:
+                assert dominating is not None
+                assert dominating.count == len(expected)
+                assert dominating.last_gameday.season == expected[-1]["season"]
+                assert dominating.last_gameday.week == expected[-1]["week"]
+
+
+class TestPartitionIndex:
+    def test_team_and_matchup(self, complete_stats):
+        # Week 13 opponent is random, make sure it is not the same matchup
+        complete_stats = complete_stats.with_columns(
+            pl.when(pl.col("week") == 13)
+            .then(pl.lit("CAR"))
+            .otherwise(pl.col("opponent_team"))
+            .alias("opponent_team")
+        )
+        sack_stat_line = SackStatLine.from_dict(complete_stats.row(-1, named=True))
+
+        partitioned = PartitionIndex(complete_stats).find_partitioned_stat_lines(
+            sack_stat_line
+        )
+
+        assert partitioned.team is not None
+        assert partitioned.team.count == 2
+        assert partitioned.team.last_gameday.season == 2025
+        assert partitioned.team.last_gameday.week == 13
+        assert partitioned.matchup is not None
+        assert partitioned.matchup.count == 1
+        assert partitioned.matchup.last_gameday.season == 1999
+        assert partitioned.matchup.last_gameday.week == 5
+
+    def test_first_for_team(self, complete_stats):
+        sack_stat_line = SackStatLine.from_dict(complete_stats.row(-2, named=True))
+
+        partitioned = PartitionIndex(complete_stats).find_partitioned_stat_lines(
+            sack_stat_line
+        )
+
+        assert partitioned.team is None
+        assert partitioned.matchup is None
+
+    def test_append_matches_full_build(self, complete_stats):
+        incremental = PartitionIndex(complete_stats.head(4))
+        incremental.append(complete_stats.tail(3))
+        complete = PartitionIndex(complete_stats)
+
+        for stat_line in complete_stats.iter_rows(named=True):
+            sack_stat_line = SackStatLine.from_dict(stat_line)
+            assert incremental.find_partitioned_stat_lines(
+                sack_stat_line
+            ) == complete.find_partitioned_stat_lines(sack_stat_line)
+
+    def test_save_and_load(self, complete_stats, tmp_path):
+        PartitionIndex(complete_stats.head(5)).save(tmp_path)
+
+        index = load_partition_index(complete_stats, tmp_path)
+        loaded = PartitionIndex.load(tmp_path)
+        complete = PartitionIndex(complete_stats)
+
+        assert loaded is not None
+        assert loaded.last_gameday == complete.last_gameday
+        for stat_line in complete_stats.iter_rows(named=True):
+            sack_stat_line = SackStatLine.from_dict(stat_line)
+            expected = complete.find_partitioned_stat_lines(sack_stat_line)
+            assert index.find_partitioned_stat_lines(sack_stat_line) == expected
+            assert loaded.find_partitioned_stat_lines(sack_stat_line) == expected
+
+    def test_load_partly_saved_gameday(self, complete_stats, tmp_path):
+        # Only one of the games of the last gameday was in the data
+        PartitionIndex(complete_stats.head(-1)).save(tmp_path)
+
+        index = load_partition_index(complete_stats, tmp_path)
+        complete = PartitionIndex(complete_stats)
+
+        for stat_line in complete_stats.iter_rows(named=True):
+            sack_stat_line = SackStatLine.from_dict(stat_line)
+            assert index.find_partitioned_stat_lines(
+                sack_stat_line
+            ) == complete.find_partitioned_stat_lines(sack_stat_line)
+
+    def test_load_nothing_persisted(self, tmp_path):
+        assert PartitionIndex.load(tmp_path) is None
+
+
+class TestFingerprintIndex:
+    def test_existing_similar_stat_lines(self, complete_stats):
+        sack_stat_line = SackStatLine.from_dict(complete_stats.row(-1, named=True))
+
+        sim = FingerprintIndex(complete_stats).find_similar_stat_lines(sack_stat_line)
+
+        assert sim is not None
+        assert sim.count == 3
+        assert sim.last_gameday.season == 2025
+        assert sim.last_gameday.week == 16
+
+    @pytest.mark.parametrize(
+        "columns",
+        [
+            ("sacks_suffered", "sack_yards_lost", "sack_fumbles", "sack_fumbles_lost"),
+            ("sacks_suffered",),
+            ("sacks_suffered", "sack_fumbles"),
+        ],
+    )
+    def test_matches_filter(self, random_stats, columns):
+        index = FingerprintIndex(random_stats, columns)
+
+        for stat_line in random_stats.sample(50, seed=30).iter_rows(named=True):
+            expected = find_similar_stat_lines(random_stats, stat_line, columns)
+
+            sim = index.find_similar_stat_lines(stat_line)
+
+            if expected is None:
+                assert sim is None
+            else:
+                assert sim is not None
+                assert sim.count == expected.count
+                assert sim.last_gameday.season == expected.last_gameday.season
+                assert sim.last_gameday.week == expected.last_gameday.week
+
+    def test_append_matches_build(self, random_stats):
+        index = FingerprintIndex(random_stats.head(150))
+        index.append(random_stats.tail(150))
+        rebuilt = FingerprintIndex(random_stats)
+
+        for stat_line in random_stats.iter_rows(named=True):
+            assert index.find_similar_stat_lines(
+                stat_line
+            ) == rebuilt.find_similar_stat_lines(stat_line)
+
+
+class TestFingerprintCache:
+    def test_reuses_index(self, complete_stats):
+        cache = FingerprintCache(max_size=2)
+
+        first = cache.get(complete_stats)
+
+        assert cache.get(complete_stats.clone()) is first
+        assert len(cache) == 1
+
+    def test_evicts_least_recently_used(self, complete_stats):
+        cache = FingerprintCache(max_size=2)
+
+        sacks = cache.get(complete_stats, ("sacks_suffered",))
+        cache.get(complete_stats, ("sack_fumbles",))
+        cache.get(complete_stats, ("sacks_suffered",))
+        cache.get(complete_stats, ("sack_yards_lost",))
+
+        assert len(cache) == 2
+        assert cache.get(complete_stats, ("sacks_suffered",)) is sacks
+        assert len(cache) == 2
+
+    def test_new_dataset_version(self, complete_stats):
+        cache = FingerprintCache()
+
+        first = cache.get(complete_stats)
+
+        assert cache.get(complete_stats.head(5)) is not first
+
+    def test_advance(self, complete_stats):
+        cache = FingerprintCache()
+        index = cache.get(complete_stats.head(5))
+
+        cache.advance(index, complete_stats.tail(2), complete_stats)
+
+        assert cache.get(complete_stats) is index
+        assert cache.get(complete_stats.head(5)) is not index
+
+
+def test_history_indexes_append_matches_from_df(random_stats):
+    # The first 280 games end with week 5 of 2009
+    indexes = HistoryIndexes.from_df(random_stats.head(280))
+    indexes.append(random_stats.slice(280), random_stats)
+    rebuilt = HistoryIndexes.from_df(random_stats)
+
+    for stat_line in random_stats.iter_rows(named=True):
+        sack_stat_line = SackStatLine.from_dict(stat_line)
+        assert indexes.fingerprints.find_similar_stat_lines(
+            sack_stat_line
+        ) == rebuilt.fingerprints.find_similar_stat_lines(sack_stat_line)
+        assert indexes.dominance.find_dominating_stat_lines(
+            sack_stat_line
+        ) == rebuilt.dominance.find_dominating_stat_lines(sack_stat_line)
+        assert indexes.partitions.find_partitioned_stat_lines(
+            sack_stat_line
+        ) == rebuilt.partitions.find_partitioned_stat_lines(sack_stat_line)
+        assert indexes.leaders.best_rank(sack_stat_line) == (
+            rebuilt.leaders.best_rank(sack_stat_line)
+        )
+
+    assert indexes.surprises.keys() == rebuilt.surprises.keys()
+    for key, surprise in rebuilt.surprises.items():
+        assert indexes.surprises[key].z_score == pytest.approx(surprise.z_score)
@@ -0,0 +1,151 @@
+import polars as pl
+import pytest
+from leaders import Leaderboards, load_leaderboards, ordinal
+from teams import SackStatLine
+from test_history import random_stats
+
+COLUMNS: list[str] = [
+    "sacks_suffered",
+    "sack_yards_lost",
+    "sack_fumbles",
+    "sack_fumbles_lost",
+]
+
+
+def brute_force_values(stats: pl.DataFrame, column: str, k: int) -> list[int]:
+    return sorted((abs(value) for value in stats.get_column(column)), reverse=True)[:k]
+
+
+def stat_line(**stats: int) -> SackStatLine:
+    return SackStatLine.from_dict(
+        {
+            "season": 2030,
+            "week": 1,
+            "team": "T0",
+            "opponent_team": "T1",
+        }
+        | {column: 0 for column in COLUMNS}
+        | stats
+    )
+
+
+@pytest.mark.parametrize(
+    "number, expected",
+    [(1, "1st"), (2, "2nd"), (3, "3rd"), (4, "4th"), (11, "11th"), (12, "12th")]
+    + [(13, "13th"), (21, "21st"), (22, "22nd"), (101, "101st"), (111, "111th")],
+)
+def test_ordinal(number, expected):
+    assert ordinal(number) == expected
+
+
+class TestLeaderboards:
+    def test_matches_sort(self, random_stats):
+        boards = Leaderboards(random_stats, k=10)
+
+        for column in COLUMNS:
+            assert [entry[0] for entry in boards.leaders(column)] == (
+                brute_force_values(random_stats, column, 10)
+            )
+
+            season_stats = random_stats.filter(pl.col("season") == 2003)
+            assert [entry[0] for entry in boards.leaders(column, "season", 2003)] == (
+                brute_force_values(season_stats, column, 10)
+            )
+
+            team_stats = random_stats.filter(pl.col("team") == "T1")
+            assert [entry[0] for entry in boards.leaders(column, "team", "T1")] == (
+                brute_force_values(team_stats, column, 10)
+            )
+
+    def test_append_matches_build(self, random_stats):
+        boards = Leaderboards(random_stats.head(150), k=10)
+        boards.append(random_stats.tail(150))
+        rebuilt = Leaderboards(random_stats, k=10)
+
+        for column in COLUMNS:
+            for scope, group in [("all", None), ("season", 2008), ("team", "T0")]:
+                assert [entry[0] for entry in boards.leaders(column, scope, group)] == [
+                    entry[0] for entry in rebuilt.leaders(column, scope, group)
+                ]
+
+    def test_save_and_load(self, random_stats, tmp_path):
+        load_leaderboards(random_stats.head(150), tmp_path, k=10)
+
+        boards = load_leaderboards(random_stats, tmp_path, k=10)
+        loaded = Leaderboards.load(tmp_path)
+        rebuilt = Leaderboards(random_stats, k=10)
+
+        assert loaded is not None
+        assert loaded.last_gameday == rebuilt.last_gameday
+        assert loaded.first_season == rebuilt.first_season
+        for column in COLUMNS:
+            for scope, group in [("all", None), ("season", 2008), ("team", "T0")]:
+                expected = [entry[0] for entry in rebuilt.leaders(column, scope, group)]
+                assert [
+                    entry[0] for entry in boards.leaders(column, scope, group)
+                ] == expected
+                assert [
+                    entry[0] for entry in loaded.leaders(column, scope, group)
+                ] == expected
+
+    def test_load_partly_saved_gameday(self, random_stats, tmp_path):
+        # The worst game of all comes late on the last saved gameday
+        stats = random_stats.with_columns(
+            pl.when(pl.int_range(pl.len()) == pl.len() - 1)
+            .then(-900)
+            .otherwise(pl.col("sack_yards_lost"))
+            .alias("sack_yards_lost")
+        )
+        load_leaderboards(stats.head(-1), tmp_path, k=10)
+
+        boards = load_leaderboards(stats, tmp_path, k=10)
+        rebuilt = Leaderboards(stats, k=10)
+
+        assert boards.leaders("sack_yards_lost")[0][0] == 900
+        for column in COLUMNS:
+            for scope, group in [("all", None), ("season", 2009), ("team", "T0")]:
+                assert [entry[0] for entry in boards.leaders(column, scope, group)] == [
+                    entry[0] for entry in rebuilt.leaders(column, scope, group)
+                ]
+
+    def test_load_nothing_persisted(self, tmp_path):
+        assert Leaderboards.load(tmp_path) is None
+
+    def test_franchise(self, random_stats):
+        relocated = random_stats.with_columns(
+            pl.when(pl.col("season") < 2005)
+            .then(pl.lit("OAK"))
+            .otherwise(pl.lit("LV"))
+            .alias("team")
+        )
+        boards = Leaderboards(relocated, k=10)
+
+        assert boards.leaders("sacks_suffered", "team", "OAK") == boards.leaders(
+            "sacks_suffered", "team", "LV"
+        )
+        assert [
+            entry[0] for entry in boards.leaders("sacks_suffered", "team", "LV")
+        ] == (brute_force_values(relocated, "sacks_suffered", 10))
+
+    def test_rank(self, random_stats):
+        boards = Leaderboards(random_stats, k=10)
+        values = brute_force_values(random_stats, "sack_yards_lost", 10)
+
+        assert boards.rank("sack_yards_lost", values[0] + 1) == 1
+        assert boards.rank("sack_yards_lost", -values[0]) == 1
+        assert boards.rank("sack_yards_lost", values[-1]) == (
+            sum(value > values[-1] for value in values) + 1
+        )
+        assert boards.rank("sack_yards_lost", values[-1] - 1) is None
+
+    def test_best_rank(self, random_stats):
+        boards = Leaderboards(random_stats, k=10)
+        line = stat_line(sack_yards_lost=-100)
+
+        best = boards.best_rank(line)
+
+        assert best is not None
+        assert best.column == "sack_yards_lost"
+        assert best.rank == 1
+        assert best.first_season == 2000
+        assert boards.best_rank(stat_line()) is None
@@ -0,0 +1,90 @@
+import json
+
+import polars as pl
+import pytest
+from live import FileReplayFeed, LiveSackTracker, PlayEvent, track_live
+from test_teams import complete_stats_no_repeats
+
+
+@pytest.fixture
+def events() -> list[dict]:
+    game: dict = {
+        "game_id": "2025_17_WAS_BAL",
+        "season": 2025,
+        "week": 17,
+        "home_team": "BAL",
+        "away_team": "WAS",
+    }
+    return [
+        {**game, "posteam": "WAS", "sack": 1, "yards_gained": -8, "timestamp": 0.0},
+        {**game, "posteam": "WAS", "sack": 0, "yards_gained": 12, "timestamp": 1.0},
+        {
+            **game,
+            "posteam": "WAS",
+            "sack": 1,
+            "yards_gained": -11,
+            "fumble": 1,
+            "fumble_lost": 1,
+            "timestamp": 2.0,
+        },
+        {**game, "posteam": "BAL", "sack": 1, "yards_gained": -3, "timestamp": 3.0},
+        {**game, "posteam": None, "desc": "END GAME", "timestamp": 4.0},
+    ]
+
+
+class TestLiveSackTracker:
+    def test_emits_lines_when_final(self, events):
+        tracker = LiveSackTracker()
+
+        emitted = [tracker.process(PlayEvent.from_dict(event)) for event in events]
+
+        assert all(not lines for lines in emitted[:-1])
+        assert [line.as_dict() for line in emitted[-1]] == [
+            {
+                "season": 2025,
+                "week": 17,
+                "team": "BAL",
+                "opponent_team": "WAS",
+                "sacks_suffered": 1,
+                "sack_yards_lost": -3,
+                "sack_fumbles": 0,
+                "sack_fumbles_lost": 0,
+            },
+            {
+                "season": 2025,
+                "week": 17,
+                "team": "WAS",
+                "opponent_team": "BAL",
+                "sacks_suffered": 2,
+                "sack_yards_lost": -19,
+                "sack_fumbles": 1,
+                "sack_fumbles_lost": 1,
+            },
+        ]
+        assert not tracker.games
+
+
+class TestFileReplayFeed:
+    def test_replay(self, events, tmp_path):
+        path = tmp_path / "pbp.jsonl"
+        path.write_text("\n".join(json.dumps(event) for event in events))
+
+        replayed = list(FileReplayFeed(path, speed=1000.0))
+
+        assert [event.game_final for event in replayed] == [
+            False,
+            False,
+            False,
+            False,
+            True,
+        ]
+
+
+def test_track_live(events, capsys, complete_stats_no_repeats):
+    track_live(
+        [PlayEvent.from_dict(event) for event in events], complete_stats_no_repeats
+    )
+
+    captured: pytest.capture.CapturedResults = capsys.readouterr()
+
+    assert "The Washington Commanders suffered 2 sacks" in captured.out
@@ -0,0 +1,139 @@
+import multiprocessing
+from pathlib import Path
+
+import bot
+import polars as pl
+import pytest
+from bot import (
+    append_game,
+    clear_offline_ledger,
+    load_game_from_json,
+    publish,
+    release_games,
+    reserve_games,
+    runs_path,
+    save_game_to_json,
+)
+from locking import acquire, atomic_write, atomic_write_parquet, file_lock
+from teams import SackStatLine
+
+
+def stat_line(week: int) -> SackStatLine:
+    return SackStatLine.from_dict(
+        {
+            "season": 2025,
+            "week": week,
+            "team": "WAS",
+            "opponent_team": "BAL",
+            "sacks_suffered": 3,
+            "sack_yards_lost": -20,
+            "sack_fumbles": 0,
+            "sack_fumbles_lost": 0,
+        }
+    )
+
+
+def save_weeks(path: Path, weeks: range) -> None:
+    for week in weeks:
+        save_game_to_json(stat_line(week), None, path)
+
+
+def test_atomic_write(tmp_path):
+    path = tmp_path / "file.json"
+    atomic_write(path, "old")
+    atomic_write(path, "new")
+
+    assert path.read_text() == "new"
+    assert [file.name for file in tmp_path.iterdir()] == ["file.json"]
+
+
+def test_atomic_write_parquet(tmp_path):
+    path = tmp_path / "file.parquet"
+    atomic_write(path, b"not parquet")
+    atomic_write_parquet(pl.DataFrame({"week": [1, 2]}), path)
+
+    assert pl.read_parquet(path)["week"].to_list() == [1, 2]
+    assert [file.name for file in tmp_path.iterdir()] == ["file.parquet"]
+
+
+def test_exclusive_lock(tmp_path):
+    path = tmp_path / "file.json"
+
+    with file_lock(path):
+        assert acquire(path, blocking=False) is None
+
+    handle = acquire(path, blocking=False)
+    assert handle is not None
+    handle.close()
+
+
+def test_concurrent_saves(tmp_path):
+    path = tmp_path / "posted.json"
+    context = multiprocessing.get_context("spawn")
+    processes = [
+        context.Process(target=save_weeks, args=(path, range(start, start + 10)))
+        for start in range(0, 40, 10)
+    ]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+
+    weeks = sorted(game["week"] for game in load_game_from_json(None, path))
+    assert weeks == list(range(40))
+
+
+def test_publish_skips_posted(tmp_path, capsys):
+    path = tmp_path / "posted.json"
+    assert publish("first", stat_line(1), None, path)
+    assert not publish("second", stat_line(1), None, path)
+
+    assert len(load_game_from_json(None, path)) == 1
+    assert "already posted by another run" in capsys.readouterr().out
+
+
+def test_reserve_and_release(tmp_path):
+    path = tmp_path / "posted.json"
+    save_game_to_json(stat_line(1), None, path)
+
+    reserved = reserve_games([stat_line(1), stat_line(2), stat_line(3)], path)
+    assert reserved == [stat_line(2), stat_line(3)]
+    assert reserve_games([stat_line(2)], path) == []
+
+    release_games([stat_line(3)], path)
+    assert [game["week"] for game in load_game_from_json(None, path)] == [1, 2]
+
+
+def test_publish_failed_post_released(tmp_path, monkeypatch):
+    path = tmp_path / "posted.json"
+
+    def fail(*args, **kwargs):
+        # The lock is free while posting
+        lock = acquire(path, blocking=False)
+        assert lock is not None
+        lock.close()
+        raise ConnectionError("Rate limited")
+
+    monkeypatch.setattr(bot, "offline_test", lambda: False)
+    monkeypatch.setattr(bot.x, "post", fail)
+
+    with pytest.raises(ConnectionError):
+        publish("first", stat_line(1), None, path)
+
+    assert load_game_from_json(None, path) == []
+
+
+def test_clear_waits_for_other_runs(tmp_path):
+    path = tmp_path / "posted_offline.json"
+    with file_lock(path):
+        append_game(stat_line(1), path)
+    other_run = acquire(runs_path(path), shared=True)
+
+    clear_offline_ledger(path)
+
+    assert path.exists()
+
+    other_run.close()
+    clear_offline_ledger(path)
+
+    assert not path.exists()
@@ -0,0 +1,45 @@
+import threading
+
+import pytest
+import x
+from mockx import MOCK_CRED, MockXServer, render_season, replay_posts
+from test_teams import complete_stats
+
+
+@pytest.fixture
+def mock_server():
+    server = MockXServer(("127.0.0.1", 0), rate_limit=3, window=1.0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_post_and_reply(mock_server):
+    response = x.post("First", cred=MOCK_CRED, base_url=mock_server.base_url)
+    x.post(
+        "Second",
+        in_reply_to=response.data["id"],
+        cred=MOCK_CRED,
+        base_url=mock_server.base_url,
+    )
+
+    assert mock_server.posts == [
+        {"id": "1", "text": "First"},
+        {"id": "2", "text": "Second", "in_reply_to_tweet_id": "1"},
+    ]
+
+
+def test_replay_waits_out_rate_limit(mock_server, complete_stats):
+    posts = render_season(complete_stats, 2025)
+
+    result = replay_posts(posts, mock_server.base_url)
+
+    assert len(posts) == 3
+    assert result.errors == 0
+    assert [post["text"] for post in mock_server.posts] == posts
+
+    more = replay_posts(posts[:1], mock_server.base_url)
+
+    assert more.errors == 0
+    assert mock_server.rejected >= 1
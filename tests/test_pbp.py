@@ -0,0 +1,62 @@
+import polars as pl
+from pbp import scan_pbp_sack_stats
+
+
+def test_scan_pbp_sack_stats(tmp_path):
+    plays = pl.DataFrame(
+        {
+            "season": [2025, 2025, 2025, 2025, 2025, 2025],
+            "week": [17, 17, 17, 17, 17, 17],
+            "posteam": ["WAS", "WAS", "WAS", "BAL", "BAL", None],
+            "defteam": ["BAL", "BAL", "BAL", "WAS", "WAS", None],
+            "qtr": [1, 4, 5, 2, 3, 5],
+            "down": [3, 1, 3, 2, 2, None],
+            "yardline_100": [45, 12, 3, 60, 70, None],
+            "sack": [1.0, 1.0, 1.0, 0.0, 0.0, None],
+            "safety": [0.0, 0.0, 1.0, 0.0, 0.0, None],
+            "desc": ["sack", "sack", "sack", "pass", "run", "END GAME"],
+        }
+    )
+    path = tmp_path / "play_by_play_2025.parquet"
+    plays.write_parquet(path)
+
+    sack_stats = scan_pbp_sack_stats([path]).collect(engine="streaming")
+
+    assert sack_stats.to_dicts() == [
+        {
+            "season": 2025,
+            "week": 17,
+            "team": "BAL",
+            "opponent_team": "WAS",
+            "sacks_suffered": 0,
+            "sacks_q1": 0,
+            "sacks_q2": 0,
+            "sacks_q3": 0,
+            "sacks_q4": 0,
+            "sacks_ot": 0,
+            "sacks_down_1": 0,
+            "sacks_down_2": 0,
+            "sacks_down_3": 0,
+            "sacks_down_4": 0,
+            "sacks_red_zone": 0,
+            "sack_safeties": 0,
+        },
+        {
+            "season": 2025,
+            "week": 17,
+            "team": "WAS",
+            "opponent_team": "BAL",
+            "sacks_suffered": 3,
+            "sacks_q1": 1,
+            "sacks_q2": 0,
+            "sacks_q3": 0,
+            "sacks_q4": 1,
+            "sacks_ot": 1,
+            "sacks_down_1": 1,
+            "sacks_down_2": 0,
+            "sacks_down_3": 2,
+            "sacks_down_4": 0,
+            "sacks_red_zone": 2,
+            "sack_safeties": 1,
+        },
+    ]
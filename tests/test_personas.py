@@ -0,0 +1,68 @@
+import pytest
+from bot import WeekContext
+import personas
+from personas import Persona, load_personas, post_personas
+from teams import retrieve_weekly_stats
+from test_teams import complete_stats
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEEP_API_KEY", "deep-key")
+    path = tmp_path / "personas.toml"
+    path.write_text("""
+[main]
+
+[deep]
+thresholds = { sacks_suffered = 2 }
+template = "Deep cut!\\n{post}"
+credentials_prefix = "DEEP_"
+ledger = "posted_deep.json"
+""")
+    return path
+
+
+def test_load_personas(config):
+    main, deep = load_personas(config)
+
+    assert main.name == "main"
+    assert main.thresholds["sacks_suffered"] == 6
+    assert deep.thresholds["sacks_suffered"] == 2
+    assert deep.thresholds["sack_fumbles"] == 2
+    assert deep.cred.api_key == "deep-key"
+    assert str(deep.save_path) == "posted_deep.json"
+    assert "deep-key" not in repr(deep)
+
+
+def test_post_personas(capsys, complete_stats, tmp_path):
+    context = WeekContext(complete_stats, retrieve_weekly_stats(complete_stats))
+    personas = [
+        Persona("main", save_path_offline=tmp_path / "main.json"),
+        Persona(
+            "deep",
+            thresholds={
+                "sacks_suffered": 0,
+                "sack_yards_lost": 0,
+                "sack_fumbles": 0,
+                "sack_fumbles_lost": 0,
+            },
+            template="Deep cut!\n{post}",
+            save_path_offline=tmp_path / "deep.json",
+        ),
+    ]
+
+    posted = post_personas(context, personas)
+
+    captured: pytest.capture.CapturedResults = capsys.readouterr()
+    assert posted == {"main": 2, "deep": 2}
+    assert captured.out.count("Deep cut!") == 2
+    assert not (tmp_path / "deep.json").exists()
+
+
+def test_post_personas_skips_posted(complete_stats, tmp_path, monkeypatch):
+    context = WeekContext(complete_stats, retrieve_weekly_stats(complete_stats))
+    persona = Persona("main", save_path_offline=tmp_path / "main.json")
+    # Another run posts every game between the evaluation and the post
+    monkeypatch.setattr(personas, "publish", lambda *args: False)
+
+    assert post_personas(context, [persona]) == {"main": 0}
@@ -0,0 +1,47 @@
+import polars as pl
+import profiling
+import pytest
+from profiling import collect, record_phase, start_profiling, stop_profiling
+from test_history import random_stats
+
+
+@pytest.fixture
+def query(random_stats) -> pl.LazyFrame:
+    return (
+        random_stats.lazy()
+        .filter(pl.col("sacks_suffered") > 2)
+        .group_by("team")
+        .agg(pl.len())
+        .sort("team")
+    )
+
+
+def test_collect_without_session(query):
+    assert profiling._SESSION is None
+    assert collect(query, "query").equals(query.collect())
+
+
+def test_session(query, tmp_path):
+    session = start_profiling()
+    try:
+        result = collect(query, "teams")
+        record_phase("phase", 1.5)
+    finally:
+        report = stop_profiling(tmp_path)
+
+    assert profiling._SESSION is None
+    assert result.equals(query.collect())
+    assert [profile.name for profile in session.queries] == ["teams"]
+    assert session.queries[0].rows == result.height
+    assert session.phases == [("phase", 1.5)]
+
+    assert report == tmp_path / "report.txt"
+    text = report.read_text()
+    assert "teams" in text
+    assert "Python hot spots" in text
+    assert (tmp_path / "python.pstats").exists()
+    assert "FILTER" in (tmp_path / "plan_01_teams.txt").read_text()
+
+
+def test_stop_without_session(tmp_path):
+    assert stop_profiling(tmp_path) is None
@@ -0,0 +1,38 @@
+import polars as pl
+from batch import answer_stat_lines
+from bot import create_string
+from render import render_posts
+from teams import GameDay, SackStatLine, SimilarStatLines
+from test_history import random_stats
+
+
+def test_matches_create_string(random_stats):
+    codes = ["OAK", "LV", "SD", "STL", "WAS", "XYZ"]
+    lines = random_stats.with_columns(
+        pl.Series("team", [codes[i % 6] for i in range(random_stats.height)]),
+        pl.Series("opponent_team", [codes[i % 5] for i in range(random_stats.height)]),
+    )
+
+    rendered = render_posts(answer_stat_lines(lines.lazy(), random_stats)).collect()
+
+    assert rendered.height == lines.height
+    for line in rendered.iter_rows(named=True):
+        similar = (
+            None
+            if line["count"] == 0
+            else SimilarStatLines(
+                GameDay(line["last_season"], line["last_week"]), line["count"]
+            )
+        )
+        assert line["post"] == create_string(SackStatLine.from_dict(line), similar)
+
+
+def test_historic_team_names(random_stats):
+    lines = random_stats.head(1).with_columns(
+        team=pl.lit("OAK"), opponent_team=pl.lit("SD")
+    )
+
+    post = render_posts(answer_stat_lines(lines.lazy(), random_stats)).collect()
+
+    assert "The Oakland Raiders suffered" in post.item(0, "post")
+    assert "against the San Diego Chargers." in post.item(0, "post")
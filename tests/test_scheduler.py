@@ -0,0 +1,192 @@
+from dataclasses import replace
+from datetime import date, datetime, time
+
+import pytest
+import scheduler
+from bot import Evaluation, clear_offline_ledger
+from constants import SCHEDULER_CONF
+from history import DominatingStatLines, PartitionedStatLines
+from scheduler import (
+    PostCandidate,
+    PostQueue,
+    collect_candidates,
+    run_queue,
+    schedule_week,
+    score_evaluation,
+)
+from teams import GameDay, SackStatLine, SimilarStatLines, retrieve_weekly_stats
+from test_teams import complete_stats_no_repeats
+
+
+def candidate(team: str, score: float) -> PostCandidate:
+    return PostCandidate(
+        score,
+        SackStatLine(GameDay(2025, 16), team, "BAL", 7, -45, 3, 2),
+        f"{team} post",
+    )
+
+
+@pytest.fixture
+def config():
+    return replace(
+        SCHEDULER_CONF,
+        posts_per_hour=2,
+        posts_per_day=4,
+        window_start=time(10),
+        window_end=time(14),
+        overflow="spill",
+    )
+
+
+class TestScoreEvaluation:
+    def test_sackigami_ranks_first(self):
+        line = SackStatLine(GameDay(2025, 16), "WAS", "BAL", 7, -45, 3, 2)
+        partitioned = PartitionedStatLines(None, None)
+        sackigami = Evaluation(
+            line, None, DominatingStatLines(GameDay(2020, 1), 1), partitioned
+        )
+        rare = Evaluation(
+            line, SimilarStatLines(GameDay(1999, 1), 1), None, partitioned
+        )
+        common = Evaluation(
+            line,
+            SimilarStatLines(GameDay(2024, 1), 4),
+            DominatingStatLines(GameDay(2024, 1), 20),
+            partitioned,
+        )
+
+        today = date(2025, 12, 28)
+
+        assert (
+            score_evaluation(sackigami, today)
+            > score_evaluation(rare, today)
+            > score_evaluation(common, today)
+        )
+
+
+class TestPostQueue:
+    def test_releases_by_score(self, config):
+        queue = PostQueue(config)
+        queue.push(candidate("WAS", 1.0))
+        queue.push(candidate("BUF", 3.0))
+        queue.push(candidate("CAR", 2.0))
+
+        released = [queue.pop().sack_stat_line.team for _ in range(3)]
+
+        assert released == ["BUF", "CAR", "WAS"]
+
+    def test_no_duplicates(self, config):
+        queue = PostQueue(config)
+
+        assert queue.push(candidate("WAS", 1.0))
+        assert not queue.push(candidate("WAS", 5.0))
+        assert len(queue) == 1
+
+    def test_budget_spreads_over_window(self, config):
+        queue = PostQueue(config)
+        for i, team in enumerate(["WAS", "BUF", "CAR", "BAL", "DAL", "NYG"]):
+            queue.push(candidate(team, float(i)))
+
+        now = datetime(2025, 12, 28, 9, 0)
+        assert queue.release(now) is None
+        assert queue.next_release(now) == datetime(2025, 12, 28, 10, 0)
+
+        released: list[datetime] = []
+        while len(queue):
+            now = queue.next_release(now)
+            assert queue.release(now) is not None
+            released.append(now)
+
+        # One hour apart (4 hour window, 4 posts per day), spilling over to the next day
+        assert released == [
+            datetime(2025, 12, 28, 10, 0),
+            datetime(2025, 12, 28, 11, 0),
+            datetime(2025, 12, 28, 12, 0),
+            datetime(2025, 12, 28, 13, 0),
+            datetime(2025, 12, 29, 10, 0),
+            datetime(2025, 12, 29, 11, 0),
+        ]
+
+    def test_drop_overflow(self, config):
+        queue = PostQueue(replace(config, overflow="drop", posts_per_day=1))
+        queue.push(candidate("WAS", 1.0))
+        queue.push(candidate("BUF", 2.0))
+
+        released = queue.release(datetime(2025, 12, 28, 10, 0))
+
+        assert released is not None
+        assert released.sack_stat_line.team == "BUF"
+        assert queue.release(datetime(2025, 12, 28, 11, 0)) is None
+        assert len(queue) == 0
+
+    def test_save_and_load(self, config, tmp_path):
+        path = tmp_path / "queue.json"
+        queue = PostQueue(config)
+        queue.push(candidate("WAS", 1.0))
+        queue.push(candidate("BUF", 2.0))
+        queue.release(datetime(2025, 12, 28, 10, 0))
+        queue.save(path)
+
+        loaded = PostQueue.load(path, config)
+
+        assert len(loaded) == 1
+        assert loaded.released == [datetime(2025, 12, 28, 10, 0)]
+        assert loaded.pop().text == "WAS post"
+
+
+def test_run_queue(config, tmp_path, capsys):
+    path = tmp_path / "queue.json"
+    queue = PostQueue(config)
+    queue.push(candidate("WAS", 1.0))
+    queue.push(candidate("BUF", 2.0))
+    queue.save(path)
+
+    run_queue(path, config)
+    out: str = capsys.readouterr().out
+    clear_offline_ledger()
+
+    assert out.index("BUF post") < out.index("WAS post")
+    assert len(PostQueue.load(path, config)) == 0
+
+
+def test_run_queue_no_wait(config, tmp_path, monkeypatch):
+    path = tmp_path / "queue.json"
+    queue = PostQueue(config)
+    queue.push(candidate("WAS", 1.0))
+    queue.push(candidate("BUF", 2.0))
+    queue.save(path)
+    posted: list[str] = []
+
+    def fail(seconds):
+        raise AssertionError("Must not wait")
+
+    monkeypatch.setattr(scheduler, "offline_test", lambda: False)
+    monkeypatch.setattr(scheduler, "publish", lambda text, line: posted.append(text))
+
+    run_queue(path, config, lambda: datetime(2025, 12, 28, 10, 0), fail, wait=False)
+
+    assert posted == ["BUF post"]
+    assert len(PostQueue.load(path, config)) == 1
+
+
+def test_collect_candidates(complete_stats_no_repeats):
+    last_week = retrieve_weekly_stats(complete_stats_no_repeats)
+
+    candidates = collect_candidates(last_week, complete_stats_no_repeats)
+
+    assert {candidate.sack_stat_line.team for candidate in candidates} == {
+        "BUF",
+        "WAS",
+    }
+    assert all(candidate.text.startswith("Sackigami!") for candidate in candidates)
+
+
+def test_schedule_week(capsys, complete_stats_no_repeats, tmp_path):
+    last_week = retrieve_weekly_stats(complete_stats_no_repeats)
+
+    schedule_week(last_week, complete_stats_no_repeats, None, None, tmp_path / "q.json")
+
+    captured: pytest.capture.CapturedResults = capsys.readouterr()
+
+    assert "2 posts queued" in captured.out
+    assert captured.out.count("Sackigami!") == 2
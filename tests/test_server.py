@@ -0,0 +1,99 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+from server import QueryServer, QueryService, load_test
+from test_history import random_stats
+from test_teams import complete_stats
+
+STAT_LINE: dict[str, str] = {
+    "sacks_suffered": "7",
+    "sack_yards_lost": "-45",
+    "sack_fumbles": "3",
+    "sack_fumbles_lost": "2",
+}
+
+
+@pytest.fixture
+def service(complete_stats) -> QueryService:
+    return QueryService(complete_stats)
+
+
+class TestQueryService:
+    def test_similar(self, service):
+        result = service.similar({**STAT_LINE, "limit": "2"})
+
+        assert result["count"] == 4
+        assert result["last_gameday"] == {"season": 2025, "week": 16}
+        assert [game["team"] for game in result["games"]] == ["WAS", "BUF"]
+
+    def test_similar_excludes_itself(self, service):
+        result = service.similar(
+            {**STAT_LINE, "season": "2025", "week": "16", "team": "WAS"}
+        )
+
+        assert result["count"] == 3
+        assert len(result["games"]) == 3
+
+    def test_dominating(self, service):
+        result = service.dominating({**STAT_LINE, "sack_yards_lost": "-46"})
+
+        assert result == {"count": 0, "last_gameday": None}
+
+    def test_team(self, service):
+        result = service.team({**STAT_LINE, "team": "BUF"})
+
+        assert result["team"] == {
+            "count": 1,
+            "last_gameday": {"season": 2025, "week": 16},
+        }
+        assert result["matchup"] is None
+
+    def test_as_of(self, service):
+        result = service.as_of({**STAT_LINE, "season": "2025", "week": "1"})
+
+        assert result == {"count": 1, "last_gameday": {"season": 1999, "week": 5}}
+
+    def test_near_matches_brute_force(self, random_stats):
+        service = QueryService(random_stats)
+        params = {
+            "sacks_suffered": "4",
+            "sack_yards_lost": "-30",
+            "sack_fumbles": "1",
+            "sack_fumbles_lost": "1",
+            "tolerance": "2",
+        }
+
+        expected = random_stats.filter(
+            (random_stats["sacks_suffered"] - 4).abs() <= 2,
+            (random_stats["sack_yards_lost"].abs() - 30).abs() <= 2,
+            (random_stats["sack_fumbles"] - 1).abs() <= 2,
+            (random_stats["sack_fumbles_lost"] - 1).abs() <= 2,
+        ).height
+
+        assert service.near(params) == {"count": expected, "tolerance": 2}
+
+
+def test_http_and_load_test(service):
+    server = QueryServer(("127.0.0.1", 0), service)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    query = "&".join(f"{key}={value}" for key, value in STAT_LINE.items())
+
+    with urllib.request.urlopen(f"{base_url}/similar?{query}") as response:
+        assert json.loads(response.read())["count"] == 4
+
+    with pytest.raises(urllib.error.HTTPError) as error:
+        urllib.request.urlopen(f"{base_url}/similar?sacks_suffered=7")
+    assert error.value.code == 400
+
+    result = load_test(f"{base_url}/similar?{query}", clients=2, requests=20)
+
+    assert result.requests == 40
+    assert result.errors == 0
+    assert len(result.latencies_ms) == 40
+
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,47 @@
+import time
+
+from startup import PhaseTiming, Startup, run_phases
+
+
+def sleeping(seconds: float, result: str):
+    def phase() -> str:
+        time.sleep(seconds)
+        return result
+
+    return phase
+
+
+class TestRunPhases:
+    def test_results(self):
+        results, timings = run_phases(
+            {"first": sleeping(0.01, "a"), "second": sleeping(0.0, "b")},
+            time.perf_counter(),
+        )
+
+        assert results == {"first": "a", "second": "b"}
+        assert [timing.name for timing in timings] == ["first", "second"]
+
+    def test_overlap(self):
+        origin = time.perf_counter()
+        _, timings = run_phases(
+            {name: sleeping(0.2, name) for name in ["a", "b", "c"]}, origin
+        )
+
+        assert time.perf_counter() - origin < 0.5
+        assert max(timing.start for timing in timings) < min(
+            timing.end for timing in timings
+        )
+
+
+def test_report():
+    startup = Startup(
+        context=None,
+        schedule=None,
+        timings=[PhaseTiming("history", 0.0, 2.0), PhaseTiming("ledger", 0.0, 0.5)],
+    )
+
+    lines = startup.report().splitlines()
+
+    assert lines[0].startswith("history")
+    assert "#" * 40 in lines[0]
+    assert lines[-1] == "Ready after 2.00s, 2.50s of work"
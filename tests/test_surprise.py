@@ -0,0 +1,150 @@
+import random
+
+import polars as pl
+import pytest
+from surprise import (
+    SurpriseModel,
+    _solve,
+    load_surprise_model,
+    sack_features,
+    surprise_index,
+)
+
+
+@pytest.fixture
+def league_stats() -> pl.DataFrame:
+    rng = random.Random(26)
+    teams = ["A", "B", "C", "D", "E", "F"]
+    rows = []
+    for season in range(2000, 2004):
+        for week in range(1, 16):
+            shift = week % (len(teams) - 1) + 1
+            for number, team in enumerate(teams):
+                opponent = teams[(number + shift) % len(teams)]
+                rows.append(
+                    {
+                        "season": season,
+                        "week": week,
+                        "team": team,
+                        "opponent_team": opponent,
+                        "sacks_suffered": rng.randint(0, 2 + number),
+                    }
+                )
+    return pl.DataFrame(rows)
+
+
+@pytest.fixture
+def linear_features() -> pl.DataFrame:
+    rng = random.Random(47)
+    offense = [rng.uniform(0, 5) for _ in range(200)]
+    defense = [rng.uniform(0, 5) for _ in range(200)]
+    return pl.DataFrame(
+        {
+            "offense_rate": offense,
+            "defense_rate": defense,
+            "sacks_suffered": [
+                1 + 0.5 * o + 0.25 * d for o, d in zip(offense, defense)
+            ],
+        }
+    )
+
+
+def test_solve():
+    solution = _solve([[2.0, 1.0], [1.0, 3.0]], [3.0, 5.0])
+
+    assert solution == pytest.approx([0.8, 1.4])
+
+
+def test_solve_singular():
+    with pytest.raises(ValueError):
+        _solve([[1.0, 2.0], [2.0, 4.0]], [1.0, 2.0])
+
+
+class TestSurpriseModel:
+    def test_fit(self, linear_features):
+        model = SurpriseModel()
+        model.add(linear_features)
+
+        beta, sigma = model.fit()
+
+        assert model.games == 200
+        assert beta == pytest.approx([1.0, 0.5, 0.25])
+        assert sigma == pytest.approx(0.0, abs=1e-5)
+
+    def test_incremental(self, league_stats):
+        features = sack_features(league_stats, window=8, min_games=2)
+        whole = SurpriseModel()
+        whole.add(features)
+        weekly = SurpriseModel()
+        for _, week in features.group_by("season", "week", maintain_order=True):
+            weekly.add(week)
+
+        assert weekly.games == whole.games
+        assert weekly.fit()[0] == pytest.approx(whole.fit()[0])
+        assert weekly.fit()[1] == pytest.approx(whole.fit()[1])
+
+    def test_too_few_games(self, linear_features):
+        model = SurpriseModel()
+        model.add(linear_features.head(3))
+
+        with pytest.raises(ValueError):
+            model.fit()
+
+    def test_score(self, league_stats):
+        features = sack_features(league_stats, window=8, min_games=2)
+        model = SurpriseModel()
+        model.add(features)
+        beta, sigma = model.fit()
+
+        scored = model.score(features).drop_nulls("expected_sacks")
+        row = scored.row(0, named=True)
+        expected = (
+            beta[0] + beta[1] * row["offense_rate"] + beta[2] * row["defense_rate"]
+        )
+
+        assert row["expected_sacks"] == pytest.approx(expected)
+        assert row["surprise"] == pytest.approx(
+            (row["sacks_suffered"] - expected) / sigma
+        )
+
+
+def test_features_only_use_prior_games(league_stats):
+    features = sack_features(league_stats, window=3, min_games=2)
+    team = league_stats.with_row_index("row").filter(pl.col("team") == "A")
+    sacks = team.get_column("sacks_suffered").to_list()
+
+    offense = features.filter(pl.col("team") == "A").get_column("offense_rate")
+
+    assert offense[0] is None
+    assert offense[1] is None
+    assert offense[2] == pytest.approx(sum(sacks[:2]) / 2)
+    assert offense[10] == pytest.approx(sum(sacks[7:10]) / 3)
+
+
+def test_surprise_index(league_stats):
+    surprises = surprise_index(league_stats)
+
+    assert surprises
+    assert {key[:2] for key in surprises} == {(2003, 15)}
+
+
+def test_load_surprise_model(league_stats, tmp_path):
+    earlier = league_stats.filter((pl.col("season") < 2003) | (pl.col("week") < 10))
+    load_surprise_model(earlier, tmp_path)
+
+    model = load_surprise_model(league_stats, tmp_path)
+    loaded = SurpriseModel.load(tmp_path / "surprise.json")
+    whole = SurpriseModel()
+    features = sack_features(league_stats)
+    whole.add(features.filter((pl.col("season") < 2003) | (pl.col("week") < 15)))
+
+    assert loaded is not None
+    assert (loaded.last_gameday.season, loaded.last_gameday.week) == (2003, 14)
+    assert model.games == loaded.games == whole.games
+    assert model.fit()[0] == pytest.approx(whole.fit()[0])
+    assert loaded.fit()[1] == pytest.approx(whole.fit()[1])
+    incremental = surprise_index(league_stats, model)
+    rebuilt = surprise_index(league_stats)
+    assert incremental.keys() == rebuilt.keys()
+    for key, surprise in rebuilt.items():
+        assert incremental[key].z_score == pytest.approx(surprise.z_score)
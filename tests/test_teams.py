@@ -1,4 +1,6 @@
+import http.server
 import random
+import threading
 
 import polars as pl
 import pytest
@@ -8,7 +10,10 @@ from teams import (
     SackStatLine,
     SimilarStatLines,
     find_similar_stat_lines,
+    retrieve_complete_team_stats,
     retrieve_weekly_stats,
+    team_name,
+    with_team_names,
 )
 
 # TODO: Test SimilarStackLines from methods
@@ -275,3 +280,116 @@ class TestFindSimilarStatLines:
         sim = find_similar_stat_lines(complete_stats_no_repeats, sack_stat_line)
 
         assert sim is None
+
+
+@pytest.fixture
+def team_stats_server(tmp_path):
+    """Local stand-in for the nflverse releases, failing every first request."""
+    served = tmp_path / "served"
+    (served / "stats_team").mkdir(parents=True)
+    for season in range(1999, 2003):
+        pl.DataFrame(
+            {
+                "season": [season, season],
+                "week": [1, 2],
+                "team": ["WAS", "WAS"],
+                "sacks_suffered": [season - 1999, 1],
+            }
+        ).write_parquet(served / "stats_team" / f"stats_team_week_{season}.parquet")
+
+    requested: list[str] = []
+
+    class FlakyHandler(http.server.SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, directory=str(served), **kwargs)
+
+        def do_GET(self):
+            requested.append(self.path)
+            if requested.count(self.path) == 1:
+                self.send_error(503)
+            else:
+                super().do_GET()
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), FlakyHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/", requested
+    server.shutdown()
+
+
+class TestRetrieveCompleteTeamStats:
+    def test_cold_cache(self, team_stats_server, tmp_path):
+        base_url, requested = team_stats_server
+
+        complete = retrieve_complete_team_stats(tmp_path / "cache", base_url, 2002)
+
+        assert complete.select("season", "sacks_suffered").rows() == [
+            (1999, 0),
+            (1999, 1),
+            (2000, 1),
+            (2000, 1),
+            (2001, 2),
+            (2001, 1),
+            (2002, 3),
+            (2002, 1),
+        ]
+        # Every season failed once and was retried
+        assert len(requested) == 8
+
+    def test_warm_cache_only_downloads_current_season(
+        self, team_stats_server, tmp_path
+    ):
+        base_url, requested = team_stats_server
+        retrieve_complete_team_stats(tmp_path / "cache", base_url, 2002)
+        requested.clear()
+
+        complete = retrieve_complete_team_stats(tmp_path / "cache", base_url, 2002)
+
+        assert complete.height == 8
+        assert set(requested) == {"/stats_team/stats_team_week_2002.parquet"}
+
+    def test_current_season_falls_back_to_cache(
+        self, team_stats_server, tmp_path, monkeypatch
+    ):
+        base_url, _ = team_stats_server
+        retrieve_complete_team_stats(tmp_path / "cache", base_url, 2002)
+        monkeypatch.setattr("time.sleep", lambda seconds: None)
+
+        # Nothing listens on the discard port
+        with pytest.warns(UserWarning, match="using the cached 2002 season"):
+            complete = retrieve_complete_team_stats(
+                tmp_path / "cache", "http://127.0.0.1:9/", 2002
+            )
+
+        assert complete.height == 8
+
+    def test_missing_season_fails(self, tmp_path, monkeypatch):
+        monkeypatch.setattr("time.sleep", lambda seconds: None)
+
+        with pytest.raises(ConnectionError):
+            retrieve_complete_team_stats(
+                tmp_path / "cache", "http://127.0.0.1:9/", 2002
+            )
+
+
+class TestTeamDimension:
+    def test_team_name(self):
+        assert team_name("LV") == "Las Vegas Raiders"
+        assert team_name("OAK") == "Oakland Raiders"
+        assert team_name("XYZ") == "XYZ"
+
+    def test_with_team_names(self):
+        lines = pl.LazyFrame({"team": ["STL", "XYZ"], "opponent_team": ["SF", "SD"]})
+
+        joined = with_team_names(lines).collect()
+
+        assert joined.get_column("franchise").to_list() == ["LA", "XYZ"]
+        assert joined.get_column("team_name").to_list() == ["St. Louis Rams", "XYZ"]
+        assert joined.get_column("opponent_franchise").to_list() == ["SF", "LAC"]
+        assert joined.get_column("opponent_team_name").to_list() == [
+            "San Francisco 49ers",
+            "San Diego Chargers",
+        ]
@@ -0,0 +1,81 @@
+import polars as pl
+import pytest
+from teams import SackStatLine, find_similar_stat_lines
+from test_history import random_stats
+from tuning import candidate_grid, evaluate_grid, pareto_front
+
+GRID: dict[str, list[int]] = {
+    "sacks_suffered": [6, 8],
+    "sack_yards_lost": [-40, -55],
+    "sack_fumbles": [3],
+    "sack_fumbles_lost": [2],
+    "count_cutoff": [0, 1],
+    "years_cutoff": [3, 100],
+}
+
+
+def brute_force_weekly_posts(stats: pl.DataFrame, candidate: dict) -> dict:
+    posts: dict = {}
+    for row, game in enumerate(stats.iter_rows(named=True)):
+        line = SackStatLine.from_dict(game)
+        similar = find_similar_stat_lines(stats.head(row + 1), line)
+        worth = (
+            similar is None
+            or similar.count <= candidate["count_cutoff"]
+            or similar.last_gameday.season <= game["season"] - candidate["years_cutoff"]
+            or game["sacks_suffered"] >= candidate["sacks_suffered"]
+            or abs(game["sack_yards_lost"]) >= abs(candidate["sack_yards_lost"])
+            or game["sack_fumbles"] >= candidate["sack_fumbles"]
+            or game["sack_fumbles_lost"] >= candidate["sack_fumbles_lost"]
+        )
+        key = (game["season"], game["week"])
+        posts[key] = posts.get(key, 0) + worth
+    return posts
+
+
+def test_candidate_grid():
+    candidates = candidate_grid(GRID)
+
+    assert candidates.height == 16
+    assert candidates.get_column("candidate").to_list() == list(range(16))
+    assert candidates.unique(subset=list(GRID)).height == 16
+
+
+def test_matches_replay(random_stats):
+    candidates = candidate_grid(GRID)
+
+    results = evaluate_grid(random_stats, candidates)
+
+    for candidate in candidates.iter_rows(named=True):
+        weekly = list(brute_force_weekly_posts(random_stats, candidate).values())
+        result = results.row(candidate["candidate"], named=True)
+        assert result["posts_per_week"] == pytest.approx(sum(weekly) / len(weekly))
+        assert result["max"] == max(weekly)
+
+
+def test_since(random_stats):
+    results = evaluate_grid(random_stats, candidate_grid(GRID), since=2005)
+    replayed = evaluate_grid(
+        random_stats.filter(pl.col("season") >= 2005), candidate_grid(GRID)
+    )
+
+    # Earlier seasons still count as similar stat lines
+    assert (
+        results.get_column("posts_per_week").sum()
+        <= replayed.get_column("posts_per_week").sum()
+    )
+
+
+def test_pareto_front():
+    results = pl.DataFrame(
+        {
+            "candidate": [0, 1, 2, 3],
+            "posts_per_week": [3.0, 3.0, 5.0, 2.5],
+            "std": [1.0, 2.0, 0.5, 1.0],
+            "sackigami_share": [0.5, 0.4, 0.5, 0.6],
+        }
+    )
+
+    front = pareto_front(results, target=3.0)
+
+    assert front.get_column("candidate").to_list() == [0, 3, 2]
@@ -0,0 +1,81 @@
+import json
+
+import polars as pl
+import pytest
+from test_history import random_stats
+from website import Page, build_site, combination_path, site_pages
+
+
+@pytest.fixture
+def league(random_stats) -> pl.DataFrame:
+    codes = ["OAK", "LV", "SD", "WAS"]
+    return random_stats.with_columns(
+        pl.Series("team", [codes[i % 4] for i in range(random_stats.height)]),
+        pl.Series(
+            "opponent_team", [codes[(i + 1) % 4] for i in range(random_stats.height)]
+        ),
+    )
+
+
+def test_digest_changes_with_rows():
+    page = Page("teams/LV", "LV", ("a",), [(1,)])
+
+    assert page.digest() == Page("teams/LV", "LV", ("a",), [(1,)]).digest()
+    assert page.digest() != Page("teams/LV", "LV", ("a",), [(2,)]).digest()
+
+
+def test_render_escapes():
+    page = Page("teams/X", "<b>", ("a",), [("<i>",)], (("index", "&"),))
+
+    rendered = page.render()
+
+    assert "<h1>&lt;b&gt;</h1>" in rendered
+    assert "<td>&lt;i&gt;</td>" in rendered
+    assert '<a href="../index.html">&amp;</a>' in rendered
+
+
+def test_pages(league):
+    posted = [league.row(0, named=True)]
+
+    pages = {page.path: page for page in site_pages(league, posted)}
+
+    # Oakland games are on the page of the Las Vegas franchise
+    assert {path for path in pages if path.startswith("teams/")} == {
+        "teams/LV",
+        "teams/LAC",
+        "teams/WAS",
+    }
+    assert len(pages["teams/LV"].rows) == league.height // 2
+    assert (
+        sum(len(page.rows) for path, page in pages.items() if path.startswith("combin"))
+        == league.height
+    )
+    assert pages["sackigamis"].rows[0][-1] == "yes"
+    assert combination_path(league.row(0, named=True)) in pages
+
+
+def test_incremental_build(league, tmp_path):
+    pages = site_pages(league, [])
+    first = build_site(pages, tmp_path, workers=1)
+
+    assert first.written == len(pages)
+    assert json.loads((tmp_path / "teams" / "WAS.json").read_text())
+    assert (tmp_path / "index.html").exists()
+
+    second = build_site(pages, tmp_path, workers=1)
+
+    assert second.written == 0
+    assert second.unchanged == len(pages)
+
+    updated = league.with_columns(
+        pl.when(pl.int_range(pl.len()) == league.height - 1)
+        .then(99)
+        .otherwise(pl.col("sacks_suffered"))
+        .alias("sacks_suffered")
+    )
+    third = build_site(site_pages(updated, []), tmp_path, workers=2)
+
+    # The team, the new and the old combination, both combination lists,
+    # the leaderboard and possibly the archive
+    assert 0 < third.written < 10
+    assert third.removed <= 1